@@ -1,7 +1,13 @@
-module sky_decode_stage(
+module sky_decode_stage #(
+  // 1 sends execute a bubble for an instruction without an effect and only
+  // loads the data registers for ones that use them (see below)
+  parameter GATE_IDLE = 0
+)(
   input wire clk,
   input wire reset,
   input wire stall,
+  // keep the instruction in decode and send execute a bubble instead
+  input wire hold,
 
   // inputs from fetch stage
   input wire [31:0] pc_in,
@@ -12,22 +18,40 @@ module sky_decode_stage(
   output wire [3:0] rf_read_addr2,
   input wire [31:0] rf_read_data1,
   input wire [31:0] rf_read_data2,
+
+  // rd is read too, as the accumulator of mac
+  output wire [3:0] rf_read_addr3,
+  input wire [31:0] rf_read_data3,
   
   // write-back stage connections (for register forwarding)
   input wire wb_reg_write,
   input wire [3:0] wb_write_addr,
   input wire [31:0] wb_write_data,
+
+  // forwarding from the second writeback lane when dual issuing
+  input wire wb2_reg_write,
+  input wire [3:0] wb2_write_addr,
+  input wire [31:0] wb2_write_data,
+
+  // forwarding from a non-blocking load completing behind the pipeline
+  input wire wb3_reg_write,
+  input wire [3:0] wb3_write_addr,
+  input wire [31:0] wb3_write_data,
   
   // outputs to Execute stage
   output reg [31:0] pc_out,
   output reg [31:0] operand_a,
   output reg [31:0] operand_b,
+  output reg [31:0] operand_c,
   output reg [3:0] rd_addr,
   output reg [3:0] alu_op,
   output reg mem_read,
   output reg mem_write,
+  output reg [2:0] mem_size,
   output reg reg_write,
-  output reg [31:0] store_data
+  output reg [31:0] store_data,
+  // atomics: bit 2 set for one, bits 1-0 the operation (funct)
+  output reg [2:0] mem_atomic
 );
 
 // instr fields
@@ -42,19 +66,24 @@ wire [11:0] imm = instruction[11:0];
 reg [3:0] alu_op_d;
 reg mem_read_d;
 reg mem_write_d;
+reg [2:0] mem_size_d;
 reg reg_write_d;
+reg [2:0] mem_atomic_d;
 reg use_imm;
 
 // connect read addresses to reg file
 assign rf_read_addr1 = rs1;
 assign rf_read_addr2 = rs2;
+assign rf_read_addr3 = rd;
 
 // decode instr
 always @(*) begin
   alu_op_d = 4'b0000;
   mem_read_d = 1'b0;
   mem_write_d = 1'b0;
+  mem_size_d = 3'b000;
   reg_write_d = 1'b0;
+  mem_atomic_d = 3'b000;
   use_imm = 1'b0;
 
   case (opcode)
@@ -70,39 +99,73 @@ always @(*) begin
     4'b0010: begin // load
       alu_op_d = 4'b0000; // add for address calculation
       mem_read_d = 1'b1;
+      mem_size_d = funct[2:0]; // access size, bit 2 zero-extends
       reg_write_d = 1'b1;
       use_imm = 1'b1;
     end
     4'b0011: begin // store
       alu_op_d = 4'b0000; // add for address calculation
       mem_write_d = 1'b1;
+      mem_size_d = funct[2:0];
+      use_imm = 1'b1;
+    end
+    4'b0101: begin // atomic: a word load of the old value, rs2 the operand
+      alu_op_d = 4'b0000;
+      mem_read_d = 1'b1;
+      mem_atomic_d = {1'b1, funct[1:0]};
+      reg_write_d = 1'b1;
       use_imm = 1'b1;
     end
   endcase
 end
 
+// with GATE_IDLE, an instruction that writes no register but r0 and doesn't
+// touch memory (a nop, a loop word) goes to execute as a bubble and leaves
+// the data registers as they were, as a held instruction does, so neither
+// they nor the alu behind them toggle. store_data only loads for stores and
+// atomics and operand_c for mac. The enables are what a clock gating flow turns into
+// gated clocks.
+wire has_effect = (reg_write_d && rd != 4'h0) || mem_read_d || mem_write_d;
+wire bubble = hold || (GATE_IDLE && !has_effect);
+wire load_operand_c = !GATE_IDLE || alu_op_d == 4'b1011;
+wire load_store_data = !GATE_IDLE || mem_write_d || mem_atomic_d[2];
+
 always @(posedge clk or posedge reset) begin
   if (reset) begin
     pc_out <= 32'h0;
     operand_a <= 32'h0;
     operand_b <= 32'h0;
+    operand_c <= 32'h0;
     rd_addr <= 4'h0;
     alu_op <= 4'h0;
     mem_read <= 1'b0;
     mem_write <= 1'b0;
+    mem_size <= 3'b000;
     reg_write <= 1'b0;
     store_data <= 32'h0;
+    mem_atomic <= 3'b000;
+  end else if (!stall && bubble) begin
+    mem_read <= 1'b0;
+    mem_write <= 1'b0;
+    reg_write <= 1'b0;
+    mem_atomic <= 3'b000;
   end else if (!stall) begin
     pc_out <= pc_in;
     alu_op <= alu_op_d;
     mem_read <= mem_read_d;
     mem_write <= mem_write_d;
+    mem_size <= mem_size_d;
     reg_write <= reg_write_d;
+    mem_atomic <= mem_atomic_d;
     rd_addr <= rd;
     
     // handle forwarding from writeback stage
     if (wb_reg_write && wb_write_addr == rs1 && rs1 != 4'h0) begin
       operand_a <= wb_write_data;
+    end else if (wb2_reg_write && wb2_write_addr == rs1 && rs1 != 4'h0) begin
+      operand_a <= wb2_write_data;
+    end else if (wb3_reg_write && wb3_write_addr == rs1 && rs1 != 4'h0) begin
+      operand_a <= wb3_write_data;
     end else begin
       operand_a <= rf_read_data1;
     end
@@ -113,14 +176,36 @@ always @(posedge clk or posedge reset) begin
       operand_b <= {{20{imm[11]}}, imm};
     end else if (wb_reg_write && wb_write_addr == rs2 && rs2 != 4'h0) begin
       operand_b <= wb_write_data;
+    end else if (wb2_reg_write && wb2_write_addr == rs2 && rs2 != 4'h0) begin
+      operand_b <= wb2_write_data;
+    end else if (wb3_reg_write && wb3_write_addr == rs2 && rs2 != 4'h0) begin
+      operand_b <= wb3_write_data;
     end else begin
       operand_b <= rf_read_data2;
     end
     
-    if (wb_reg_write && wb_write_addr == rs2 && rs2 != 4'h0) begin
-      store_data <= wb_write_data;
-    end else begin
-      store_data <= rf_read_data2;
+    if (load_operand_c) begin
+      if (wb_reg_write && wb_write_addr == rd && rd != 4'h0) begin
+        operand_c <= wb_write_data;
+      end else if (wb2_reg_write && wb2_write_addr == rd && rd != 4'h0) begin
+        operand_c <= wb2_write_data;
+      end else if (wb3_reg_write && wb3_write_addr == rd && rd != 4'h0) begin
+        operand_c <= wb3_write_data;
+      end else begin
+        operand_c <= rf_read_data3;
+      end
+    end
+
+    if (load_store_data) begin
+      if (wb_reg_write && wb_write_addr == rs2 && rs2 != 4'h0) begin
+        store_data <= wb_write_data;
+      end else if (wb2_reg_write && wb2_write_addr == rs2 && rs2 != 4'h0) begin
+        store_data <= wb2_write_data;
+      end else if (wb3_reg_write && wb3_write_addr == rs2 && rs2 != 4'h0) begin
+        store_data <= wb3_write_data;
+      end else begin
+        store_data <= rf_read_data2;
+      end
     end
   end
 end
@@ -1,4 +1,7 @@
-module sky_execute_stage(
+module sky_execute_stage #(
+  // 1 only loads the data registers for an instruction that uses them
+  parameter GATE_IDLE = 0
+)(
   input wire clk,
   input wire reset,
   input wire stall,
@@ -7,16 +10,20 @@ module sky_execute_stage(
   input wire [31:0] pc_in,
   input wire [31:0] operand_a,
   input wire [31:0] operand_b,
+  input wire [31:0] operand_c,
   input wire [3:0] rd_addr,
   input wire [3:0] alu_op,
   input wire mem_read,
   input wire mem_write,
+  input wire [2:0] mem_size,
   input wire reg_write,
   input wire [31:0] store_data,
+  input wire [2:0] mem_atomic,
   
   // ALU interface
   output wire [31:0] alu_operand_a,
   output wire [31:0] alu_operand_b,
+  output wire [31:0] alu_operand_c,
   output wire [3:0] alu_operation,
   input wire [31:0] alu_result,
   input wire alu_zero_flag,
@@ -27,18 +34,22 @@ module sky_execute_stage(
   output reg [31:0] branch_target,
   
   // outputs to Memory stage
+  output reg [31:0] pc_out,
   output reg [31:0] result,
   output reg [31:0] mem_addr,
   output reg [31:0] mem_write_data,
   output reg [3:0] wb_rd_addr,
   output reg wb_mem_read,
   output reg wb_mem_write,
-  output reg wb_reg_write
+  output reg [2:0] wb_mem_size,
+  output reg wb_reg_write,
+  output reg [2:0] wb_mem_atomic
 );
 
 // connect operands to alu
 assign alu_operand_a = operand_a;
 assign alu_operand_b = operand_b;
+assign alu_operand_c = operand_c;
 assign alu_operation = alu_op;
 
 // TODO: branch logic
@@ -47,23 +58,37 @@ always @(*) begin
   branch_target = 32'h0;
 end
 
+// with GATE_IDLE a bubble leaves the result, address and pc as they were, and
+// only a store or an atomic loads mem_write_data, the atomic's operand; the
+// control signals always move on
+wire load_result = !GATE_IDLE || reg_write || mem_read || mem_write;
+wire load_write_data = !GATE_IDLE || mem_write || mem_atomic[2];
+
 always @(posedge clk or posedge reset) begin
   if (reset) begin
+    pc_out <= 32'h0;
     result <= 32'h0;
     mem_addr <= 32'h0;
     mem_write_data <= 32'h0;
     wb_rd_addr <= 4'h0;
     wb_mem_read <= 1'b0;
     wb_mem_write <= 1'b0;
+    wb_mem_size <= 3'b000;
     wb_reg_write <= 1'b0;
+    wb_mem_atomic <= 3'b000;
   end else if (!stall) begin
-    result <= alu_result;
-    mem_addr <= alu_result; // Address for load/store
-    mem_write_data <= store_data;
+    if (load_result) begin
+      pc_out <= pc_in;
+      result <= alu_result;
+      mem_addr <= alu_result; // Address for load/store
+    end
+    if (load_write_data) mem_write_data <= store_data;
     wb_rd_addr <= rd_addr;
     wb_mem_read <= mem_read;
     wb_mem_write <= mem_write;
+    wb_mem_size <= mem_size;
     wb_reg_write <= reg_write;
+    wb_mem_atomic <= mem_atomic;
   end
 end
 
@@ -1,27 +1,333 @@
-module sky_fetch_stage(
+module sky_fetch_stage #(
+  parameter ISSUE_WIDTH = 1,
+  // 0 fetches straight into decode, one word (or pair) a cycle, and holds
+  // whenever decode does. Otherwise fetch runs ahead into a queue of this
+  // many words, reading FETCH_WIDTH (2 or 4) words a cycle, and issue takes
+  // from the queue, so fetch keeps reading while decode is stalled.
+  parameter FETCH_QUEUE_DEPTH = 0,
+  parameter FETCH_WIDTH = 2
+)(
   input wire clk,
   input wire reset,
   input wire stall,
   input wire [31:0] branch_target,
   input wire branch_taken,
   output reg [31:0] pc_out,
-  output reg [31:0] instruction
+  output reg [31:0] instruction,
+
+  // second issue slot, a nop unless the pair can issue together
+  output reg [31:0] pc_out1,
+  output reg [31:0] instruction1,
+
+  // host launch: run the `launch_count` words from `launch_pc`, then issue
+  // nops until the next launch. Until the first launch fetch runs freely from 0.
+  input wire launch,
+  input wire [31:0] launch_pc,
+  input wire [31:0] launch_count,
+  output wire fetch_idle
 );
 
+// next word fetch reads from instruction memory
 reg [31:0] pc;
 
+reg launched;
+reg [31:0] launch_end;
+
 reg [31:0] instr_mem[0:1023];
 
-always @(posedge clk or posedge reset) begin
-  if (reset) pc <= 32'h0;
-  else if (!stall) pc <= branch_taken ? branch_target :  pc + 4;
-end
+// hardware loop: `loop count, length` repeats the `length` words after it
+// `count` times with no branch overhead. The loop word itself issues as a
+// nop, a count or length of 0 skips the body, and loops don't nest.
+reg loop_active;
+reg [31:0] loop_start;
+reg [31:0] loop_end;
+reg [11:0] loop_remaining;
+
+// the next two words in program order, checked against the pairing rules
+// before they are latched so both issue without a bubble, and the pc of the
+// first
+wire [31:0] issue_word0, issue_word1;
+wire [31:0] issue_pc;
+wire pairable, pair_issue;
+
+wire word0_loop = issue_word0[31:28] == 4'b0100;
+
+// words in the fetch queue summed over every cycle since reset, and the
+// cycles it was full, for benchmarks; 0 without a queue
+wire [31:0] queue_occupancy, queue_full_cycles;
+
+generate
+  if (ISSUE_WIDTH == 2) begin : dual
+    sky_issue_pair pairing(
+      .first(issue_word0),
+      .second(issue_word1),
+      .pair(pairable)
+    );
+  end else begin : single
+    assign pairable = 1'b0;
+  end
+endgenerate
+
+generate
+  if (FETCH_QUEUE_DEPTH == 0) begin : coupled
+    // fetch has run off the end of the launched program
+    assign fetch_idle = launched && pc == launch_end;
+
+    assign issue_word0 = instr_mem[pc[11:2]];
+    assign issue_word1 = instr_mem[pc[11:2] + 10'd1];
+    assign issue_pc = pc;
+
+    wire [11:0] loop_count = issue_word0[11:0];
+    wire [31:0] loop_length = {18'h0, issue_word0[27:16], 2'b00};
+
+    // last word issued this cycle, the one checked against the loop end
+    wire [31:0] last_pc = pair_issue ? pc + 32'd4 : pc;
+
+    // never pair past the end of a launched program or of a loop body, or
+    // behind a loop word
+    assign pair_issue = pairable && !word0_loop && !(launched && pc + 32'd4 == launch_end) &&
+                        !(loop_active && pc == loop_end);
+
+    assign queue_occupancy = 32'h0;
+    assign queue_full_cycles = 32'h0;
+
+    always @(posedge clk or posedge reset) begin
+      if (reset) begin
+        pc <= 32'h0;
+        launched <= 1'b0;
+        launch_end <= 32'h0;
+        loop_active <= 1'b0;
+        loop_start <= 32'h0;
+        loop_end <= 32'h0;
+        loop_remaining <= 12'h0;
+      end else if (launch) begin
+        pc <= launch_pc;
+        launched <= 1'b1;
+        launch_end <= launch_pc + {launch_count[29:0], 2'b00};
+        loop_active <= 1'b0;
+      end else if (!stall && !fetch_idle) begin
+        if (branch_taken) begin
+          pc <= branch_target;
+        end else if (word0_loop) begin
+          if (loop_count == 12'h0 || loop_length == 32'h0) begin
+            pc <= pc + 32'd4 + loop_length;
+          end else begin
+            pc <= pc + 32'd4;
+            loop_active <= 1'b1;
+            loop_start <= pc + 32'd4;
+            loop_end <= pc + loop_length;
+            loop_remaining <= loop_count;
+          end
+        end else if (loop_active && last_pc == loop_end) begin
+          if (loop_remaining == 12'h1) begin
+            pc <= last_pc + 32'd4;
+            loop_active <= 1'b0;
+          end else begin
+            pc <= loop_start;
+            loop_remaining <= loop_remaining - 12'h1;
+          end
+        end else begin
+          pc <= pc + (pair_issue ? 32'd8 : 32'd4);
+        end
+      end
+    end
+
+    // hold a nop (add r0, r0, r0) while in reset so the first instruction isn't
+    // handed to decode twice when reset is released
+    always @(posedge clk) begin
+      if (reset) begin
+        instruction <= 32'h0;
+        pc_out <= 32'h0;
+        instruction1 <= 32'h0;
+        pc_out1 <= 32'h0;
+      end else if (launch || (fetch_idle && !stall)) begin
+        instruction <= 32'h0;
+        pc_out <= pc;
+        instruction1 <= 32'h0;
+        pc_out1 <= pc + 4;
+      end else if (!stall) begin
+        instruction <= issue_word0;
+        pc_out <= pc;
+        instruction1 <= pair_issue ? issue_word1 : 32'h0;
+        pc_out1 <= pc + 4;
+      end
+    end
+  end else begin : decoupled
+    localparam WINDOW = FETCH_QUEUE_DEPTH + FETCH_WIDTH;
+
+    // queued words in program order, head first, with their pcs and whether
+    // each ends an iteration of a loop body, which nothing pairs across
+    reg [32*FETCH_QUEUE_DEPTH-1:0] queue_word, queue_pc;
+    reg [FETCH_QUEUE_DEPTH-1:0] queue_seam;
+    reg [7:0] queue_count;
+
+    // this cycle's read: up to FETCH_WIDTH words from pc, cut short by the
+    // queue space free before this cycle's issue and by the end of the
+    // launched program, and ending early at a loop word or the end of a
+    // loop body, either of which moves the next read somewhere other than
+    // just past it
+    reg [32*FETCH_WIDTH-1:0] read_word;
+    reg [FETCH_WIDTH-1:0] read_seam;
+    reg [7:0] read_count;
+    reg [31:0] last_word, last_pc;
+
+    // the queue followed by this cycle's read. Issue takes from its head and
+    // the rest is queued, so a word read into an empty queue issues in the
+    // same cycle, just as without one.
+    reg [32*WINDOW-1:0] window_word, window_pc;
+    reg [WINDOW-1:0] window_seam;
+    wire [7:0] window_count = queue_count + read_count;
+
+    // fetch has run off the end of the launched program and issued the
+    // last word it queued
+    assign fetch_idle = launched && pc == launch_end && queue_count == 8'd0;
+
+    always @(*) begin : read
+      integer k;
+      reg stop;
+      reg [9:0] address;
+      stop = 1'b0;
+      read_count = 8'd0;
+      last_word = 32'h0;
+      last_pc = pc;
+      for (k = 0; k < FETCH_WIDTH; k = k + 1) begin
+        address = pc[11:2] + k;
+        read_word[32*k +: 32] = instr_mem[address];
+        read_seam[k] = loop_active && pc + 4 * k == loop_end;
+        if (!stop) begin
+          if (queue_count + k < FETCH_QUEUE_DEPTH && !(launched && pc + 4 * k == launch_end)) begin
+            read_count = k + 1;
+            last_word = read_word[32*k +: 32];
+            last_pc = pc + 4 * k;
+            stop = last_word[31:28] == 4'b0100 || read_seam[k];
+          end else begin
+            stop = 1'b1;
+          end
+        end
+      end
+    end
+
+    always @(*) begin : window
+      integer i, k;
+      window_word = {32*WINDOW{1'b0}};
+      window_pc = {32*WINDOW{1'b0}};
+      window_seam = {WINDOW{1'b0}};
+      for (i = 0; i < FETCH_QUEUE_DEPTH; i = i + 1) begin
+        if (i < queue_count) begin
+          window_word[32*i +: 32] = queue_word[32*i +: 32];
+          window_pc[32*i +: 32] = queue_pc[32*i +: 32];
+          window_seam[i] = queue_seam[i];
+        end
+      end
+      for (i = 0; i < WINDOW; i = i + 1) begin
+        for (k = 0; k < FETCH_WIDTH; k = k + 1) begin
+          if (k < read_count && i == queue_count + k) begin
+            window_word[32*i +: 32] = read_word[32*k +: 32];
+            window_pc[32*i +: 32] = pc + 4 * k;
+            window_seam[i] = read_seam[k];
+          end
+        end
+      end
+    end
+
+    assign issue_word0 = window_word[31:0];
+    assign issue_word1 = window_word[63:32];
+    assign issue_pc = window_count != 8'd0 ? window_pc[31:0] : pc;
+
+    // the end of a launched program is never in the window, so only loops
+    // and a second word still to be read keep a pair apart
+    assign pair_issue = pairable && window_count >= 8'd2 && !word0_loop && !window_seam[0];
+
+    // words leaving the head of the window for decode this cycle
+    wire [1:0] issued = stall || window_count == 8'd0 ? 2'd0 : pair_issue ? 2'd2 : 2'd1;
+
+    wire [11:0] loop_count = last_word[11:0];
+    wire [31:0] loop_length = {18'h0, last_word[27:16], 2'b00};
+
+    always @(posedge clk or posedge reset) begin
+      if (reset) begin
+        pc <= 32'h0;
+        launched <= 1'b0;
+        launch_end <= 32'h0;
+        loop_active <= 1'b0;
+        loop_start <= 32'h0;
+        loop_end <= 32'h0;
+        loop_remaining <= 12'h0;
+        queue_count <= 8'd0;
+      end else if (launch) begin
+        pc <= launch_pc;
+        launched <= 1'b1;
+        launch_end <= launch_pc + {launch_count[29:0], 2'b00};
+        loop_active <= 1'b0;
+        queue_count <= 8'd0;
+      end else if (branch_taken && !stall) begin
+        // the head still issues; everything read behind it is dropped
+        pc <= branch_target;
+        queue_count <= 8'd0;
+      end else begin
+        queue_word <= window_word[32*issued +: 32*FETCH_QUEUE_DEPTH];
+        queue_pc <= window_pc[32*issued +: 32*FETCH_QUEUE_DEPTH];
+        queue_seam <= window_seam[issued +: FETCH_QUEUE_DEPTH];
+        queue_count <= window_count - issued;
+        if (read_count == 8'd0) begin
+          // queue full or program finished: nothing read
+        end else if (last_word[31:28] == 4'b0100) begin
+          if (loop_count == 12'h0 || loop_length == 32'h0) begin
+            pc <= last_pc + 32'd4 + loop_length;
+          end else begin
+            pc <= last_pc + 32'd4;
+            loop_active <= 1'b1;
+            loop_start <= last_pc + 32'd4;
+            loop_end <= last_pc + loop_length;
+            loop_remaining <= loop_count;
+          end
+        end else if (loop_active && last_pc == loop_end) begin
+          if (loop_remaining == 12'h1) begin
+            pc <= last_pc + 32'd4;
+            loop_active <= 1'b0;
+          end else begin
+            pc <= loop_start;
+            loop_remaining <= loop_remaining - 12'h1;
+          end
+        end else begin
+          pc <= last_pc + 32'd4;
+        end
+      end
+    end
+
+    always @(posedge clk) begin
+      if (reset) begin
+        instruction <= 32'h0;
+        pc_out <= 32'h0;
+        instruction1 <= 32'h0;
+        pc_out1 <= 32'h0;
+      end else if (launch || (window_count == 8'd0 && !stall)) begin
+        instruction <= 32'h0;
+        pc_out <= issue_pc;
+        instruction1 <= 32'h0;
+        pc_out1 <= issue_pc + 4;
+      end else if (!stall) begin
+        instruction <= issue_word0;
+        pc_out <= issue_pc;
+        instruction1 <= pair_issue ? issue_word1 : 32'h0;
+        pc_out1 <= issue_pc + 4;
+      end
+    end
+
+    reg [31:0] occupancy, full_cycles;
+    assign queue_occupancy = occupancy;
+    assign queue_full_cycles = full_cycles;
 
-always @(posedge clk) begin
-  if (!stall) begin
-    instruction <= instr_mem[pc[11:2]];
-    pc_out <= pc;
+    always @(posedge clk or posedge reset) begin
+      if (reset) begin
+        occupancy <= 32'h0;
+        full_cycles <= 32'h0;
+      end else begin
+        occupancy <= occupancy + queue_count;
+        if (queue_count == FETCH_QUEUE_DEPTH) full_cycles <= full_cycles + 32'h1;
+      end
+    end
   end
-end
+endgenerate
 
 endmodule
@@ -0,0 +1,31 @@
+// fetch's pairing rules for dual issue: whether `second` can issue in the
+// same cycle as `first`. Lane 1 has no data memory port, and nothing is
+// forwarded between the two lanes, so the second instruction must be an alu
+// op that neither reads nor rewrites the first one's destination. Lane 1 has
+// no accumulator read port either, so it never gets a mac.
+module sky_issue_pair(
+  input wire [31:0] first,
+  input wire [31:0] second,
+  output wire pair
+);
+
+wire [3:0] first_opcode = first[31:28];
+wire [3:0] first_rd = first[19:16];
+
+wire [3:0] second_opcode = second[31:28];
+wire [3:0] second_rs1 = second[27:24];
+wire [3:0] second_rs2 = second[23:20];
+wire [3:0] second_rd = second[19:16];
+wire [3:0] second_funct = second[15:12];
+
+// r-type, i-type, loads and atomics write rd
+wire first_writes = (first_opcode == 4'b0000 || first_opcode == 4'b0001 || first_opcode == 4'b0010 || first_opcode == 4'b0101) && first_rd != 4'h0;
+wire second_alu = (second_opcode == 4'b0000 || second_opcode == 4'b0001) && second_funct != 4'b1011;
+wire second_reads_rs2 = second_opcode == 4'b0000;
+
+wire raw = first_writes && (second_rs1 == first_rd || (second_reads_rs2 && second_rs2 == first_rd));
+wire waw = first_writes && second_rd == first_rd;
+
+assign pair = second_alu && !raw && !waw;
+
+endmodule
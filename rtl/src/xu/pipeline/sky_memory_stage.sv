@@ -1,4 +1,20 @@
-module sky_memory_stage(
+module sky_memory_stage #(
+  // cycles from issuing an access until data memory completes it (see
+  // sky_memory_latency in sky_xu.sv); 0 is a combinational memory
+  parameter LATENCY = 0,
+  // with LATENCY > 0: 0 holds the pipeline until each access completes, 1
+  // lets loads complete behind the pipeline (decode's scoreboard waits for
+  // their registers) and keeps stores in a store buffer until they land
+  parameter NONBLOCKING = 0,
+  parameter STORE_BUFFER_DEPTH = 4,
+  // 1 sends accesses in the 4KB window at SCRATCHPAD_BASE to the shared
+  // scratchpad port (sky_scratchpad) instead of data memory
+  parameter SCRATCHPAD = 0,
+  parameter SCRATCHPAD_BASE = 32'h1000,
+  // 1 only loads the writeback registers for an instruction that writes a
+  // register, and the load slots for loads in flight
+  parameter GATE_IDLE = 0
+)(
   input wire clk,
   input wire reset,
   input wire stall,
@@ -10,28 +26,264 @@ module sky_memory_stage(
   input wire [3:0] wb_rd_addr_in,
   input wire wb_mem_read,
   input wire wb_mem_write,
+  input wire [2:0] wb_mem_size_in,
   input wire wb_reg_write_in,
+  // atomics: bit 2 set for one, bits 1-0 the operation
+  input wire [2:0] wb_mem_atomic,
 
-  // memory interface 
+  // memory interface
   output wire[31:0] mem_address,
   output wire mem_read_en,
   output wire mem_write_en,
-  output wire[31:0] mem_write_data_out,
-  output wire [31:0] mem_read_data,
+  output reg [31:0] mem_write_data_out,
+  output reg [3:0] mem_byte_enable,
+  input wire [31:0] mem_read_data,
+
+  // shared scratchpad: an access in its window is requested here and holds
+  // the pipeline until it is granted, then completes at the next edge. The
+  // bank executes atomics itself and returns the word they replaced.
+  output wire sp_request,
+  output wire sp_write,
+  output wire [2:0] sp_atomic,
+  output wire [31:0] sp_address,
+  output wire [31:0] sp_write_data,
+  output wire [3:0] sp_byte_enable,
+  input wire sp_grant,
+  input wire [31:0] sp_read_data,
+
+  // hold the pipeline: an access has not completed yet (blocking) or the
+  // store buffer is full (non-blocking)
+  output wire mem_stall,
+  // loads or stores still in flight after the pipeline has moved on
+  output wire mem_busy,
+
+  // the load's word from the prefetch buffer (sky_prefetcher), which
+  // completes it without going to memory
+  input wire prefetch_hit,
+  input wire [31:0] prefetch_data,
+
+  // the other lane's register write, which supersedes an older load to the
+  // same register still in flight
+  input wire wb2_reg_write,
+  input wire [3:0] wb2_write_addr,
+
+  // non-blocking loads: registers still waiting on their data, and the load
+  // completing this cycle, whose word is on mem_read_data
+  output wire [15:0] load_pending,
+  output wire load_return,
+  output wire [3:0] load_return_rd,
+  output wire [2:0] load_return_size,
+  output wire [1:0] load_return_offset,
 
   // outputs to writeback stage
   output reg [31:0] result_out,
   output reg [31:0] mem_data,
   output reg [3:0] wb_rd_addr_out,
   output reg wb_reg_write_out,
-  output reg wb_from_mem
+  output reg wb_from_mem,
+  output reg [2:0] wb_mem_size_out,
+  output reg [1:0] wb_byte_offset
 );
 
 // memory control signals
 assign mem_address = mem_addr;
-assign mem_read_en = wb_mem_read;
-assign mem_write_en = wb_mem_write;
-assign mem_write_data_out = mem_write_data;
+
+// narrow stores repeat their byte/halfword across the word and only enable
+// the lanes the address selects; halfwords are aligned down. A load needs the
+// same lanes a store of its size would write.
+always @(*) begin
+  case (wb_mem_size_in[1:0])
+    2'b01: begin
+      mem_write_data_out = {4{mem_write_data[7:0]}};
+      mem_byte_enable = 4'b0001 << mem_addr[1:0];
+    end
+    2'b10: begin
+      mem_write_data_out = {2{mem_write_data[15:0]}};
+      mem_byte_enable = mem_addr[1] ? 4'b1100 : 4'b0011;
+    end
+    default: begin
+      mem_write_data_out = mem_write_data;
+      mem_byte_enable = 4'b1111;
+    end
+  endcase
+end
+
+// accesses to the scratchpad never reach data memory, the latency model or
+// the store buffer. Atomics anywhere else read like a word load and write
+// nothing. The pipeline only stalls on this stage's own accesses, so a
+// granted request always leaves at the next edge and is made once.
+wire shared = SCRATCHPAD && mem_addr[31:12] == SCRATCHPAD_BASE[31:12];
+wire data_read = wb_mem_read && !shared;
+wire data_write = wb_mem_write && !shared;
+
+assign sp_request = shared && (wb_mem_read || wb_mem_write);
+assign sp_write = wb_mem_write;
+assign sp_atomic = wb_mem_atomic;
+assign sp_address = mem_addr;
+assign sp_write_data = wb_mem_atomic[2] ? mem_write_data : mem_write_data_out;
+assign sp_byte_enable = mem_byte_enable;
+
+// word handed to writeback for a load from data memory, whether the load's
+// register write is left to the load return instead, and whether data memory
+// holds the pipeline
+wire [31:0] data_word;
+wire load_deferred;
+wire data_stall;
+
+wire [31:0] load_word = shared ? sp_read_data : data_word;
+assign mem_stall = data_stall || (sp_request && !sp_grant);
+
+generate
+  if (LATENCY == 0) begin : combinational
+    assign mem_read_en = data_read;
+    assign mem_write_en = data_write;
+    assign data_word = mem_read_data;
+    assign load_deferred = 1'b0;
+    assign data_stall = 1'b0;
+    assign mem_busy = 1'b0;
+  end else if (!NONBLOCKING) begin : blocking
+    reg [7:0] wait_count;   // cycles since the access was issued
+
+    wire access = (data_read && !prefetch_hit) || data_write;
+    assign data_stall = access && wait_count != LATENCY;
+    assign mem_busy = 1'b0;
+    assign mem_read_en = data_read && !prefetch_hit && wait_count == 8'd0;
+    assign mem_write_en = data_write && wait_count == 8'd0;
+    assign data_word = prefetch_hit ? prefetch_data : mem_read_data;
+    assign load_deferred = 1'b0;
+
+    always @(posedge clk or posedge reset) begin
+      if (reset) wait_count <= 8'd0;
+      else if (!stall) wait_count <= 8'd0;
+      else if (access) wait_count <= wait_count + 8'd1;
+    end
+  end else begin : nonblocking
+    // store buffer: stores issued to memory that have not landed yet, oldest
+    // at head. A load whose bytes the youngest matching store covers takes
+    // its data from here and completes like a zero-latency load, as does one
+    // the prefetch buffer holds.
+    reg [29:0] sb_word [0:STORE_BUFFER_DEPTH-1];
+    reg [31:0] sb_data [0:STORE_BUFFER_DEPTH-1];
+    reg [3:0] sb_enable [0:STORE_BUFFER_DEPTH-1];
+    reg [7:0] sb_head, sb_tail, sb_count;
+    reg [LATENCY-1:0] store_inflight;   // one bit per cycle since each store was issued
+
+    // loads in flight, one slot per cycle since issue
+    reg ld_valid [0:LATENCY-1];
+    reg [3:0] ld_rd [0:LATENCY-1];
+    reg [2:0] ld_size [0:LATENCY-1];
+    reg [1:0] ld_offset [0:LATENCY-1];
+
+    integer i;
+    reg [7:0] index;
+    reg forward_match;
+    reg [31:0] forward_data;
+    reg [3:0] forward_enable;
+
+    always @(*) begin : forward_search
+      integer k;
+      forward_match = 1'b0;
+      forward_data = 32'h0;
+      forward_enable = 4'h0;
+      index = sb_head;
+      // oldest to youngest, so the youngest matching store wins
+      for (k = 0; k < STORE_BUFFER_DEPTH; k = k + 1) begin
+        if (k < sb_count && sb_word[index] == mem_addr[31:2]) begin
+          forward_match = 1'b1;
+          forward_data = sb_data[index];
+          forward_enable = sb_enable[index];
+        end
+        index = index == STORE_BUFFER_DEPTH - 1 ? 8'd0 : index + 8'd1;
+      end
+    end
+
+    wire forward_cover = forward_match && (forward_enable & mem_byte_enable) == mem_byte_enable;
+    wire forward = forward_cover || prefetch_hit;
+    wire store_done = store_inflight[LATENCY-1];
+    wire sb_full = sb_count == STORE_BUFFER_DEPTH && !store_done;
+
+    wire load_issue = data_read && !forward && !stall;
+    wire store_issue = data_write && !stall;
+
+    assign data_stall = data_write && sb_full;
+    assign mem_read_en = load_issue;
+    assign mem_write_en = store_issue;
+    assign data_word = forward_cover ? forward_data : prefetch_data;
+    assign load_deferred = data_read && !forward;
+
+    // registers written back this cycle, by instructions younger than every
+    // load in flight: those loads must not overwrite them when they return
+    wire [15:0] written =
+      (wb_reg_write_out ? 16'h1 << wb_rd_addr_out : 16'h0) |
+      (wb2_reg_write ? 16'h1 << wb2_write_addr : 16'h0);
+
+    reg [15:0] pending;
+    always @(*) begin : pending_loads
+      integer k;
+      pending = 16'h0;
+      for (k = 0; k < LATENCY - 1; k = k + 1) begin
+        if (ld_valid[k] && !written[ld_rd[k]]) pending = pending | (16'h1 << ld_rd[k]);
+      end
+    end
+
+    assign load_pending = pending & 16'hFFFE;
+    assign load_return = ld_valid[LATENCY-1] && !written[ld_rd[LATENCY-1]];
+    assign load_return_rd = ld_rd[LATENCY-1];
+    assign load_return_size = ld_size[LATENCY-1];
+    assign load_return_offset = ld_offset[LATENCY-1];
+
+    reg any_load;
+    always @(*) begin : loads_in_flight
+      integer k;
+      any_load = 1'b0;
+      for (k = 0; k < LATENCY; k = k + 1) any_load = any_load || ld_valid[k];
+    end
+    assign mem_busy = any_load || sb_count != 8'd0;
+
+    always @(posedge clk or posedge reset) begin
+      if (reset) begin
+        sb_head <= 8'd0;
+        sb_tail <= 8'd0;
+        sb_count <= 8'd0;
+        store_inflight <= 0;
+        for (i = 0; i < LATENCY; i = i + 1) ld_valid[i] <= 1'b0;
+      end else begin
+        store_inflight <= (store_inflight << 1) | store_issue;
+        if (store_issue) begin
+          sb_word[sb_tail] <= mem_addr[31:2];
+          sb_data[sb_tail] <= mem_write_data_out;
+          sb_enable[sb_tail] <= mem_byte_enable;
+          sb_tail <= sb_tail == STORE_BUFFER_DEPTH - 1 ? 8'd0 : sb_tail + 8'd1;
+        end
+        if (store_done) sb_head <= sb_head == STORE_BUFFER_DEPTH - 1 ? 8'd0 : sb_head + 8'd1;
+        sb_count <= sb_count + store_issue - store_done;
+
+        ld_valid[0] <= load_issue && wb_reg_write_in && wb_rd_addr_in != 4'h0;
+        if (!GATE_IDLE || load_issue) begin
+          ld_rd[0] <= wb_rd_addr_in;
+          ld_size[0] <= wb_mem_size_in;
+          ld_offset[0] <= mem_addr[1:0];
+        end
+        for (i = 1; i < LATENCY; i = i + 1) begin
+          ld_valid[i] <= ld_valid[i - 1] && !written[ld_rd[i - 1]];
+          if (!GATE_IDLE || ld_valid[i - 1]) begin
+            ld_rd[i] <= ld_rd[i - 1];
+            ld_size[i] <= ld_size[i - 1];
+            ld_offset[i] <= ld_offset[i - 1];
+          end
+        end
+      end
+    end
+  end
+
+  if (!(LATENCY > 0 && NONBLOCKING)) begin : no_load_return
+    assign load_pending = 16'h0;
+    assign load_return = 1'b0;
+    assign load_return_rd = 4'h0;
+    assign load_return_size = 3'b000;
+    assign load_return_offset = 2'b00;
+  end
+endgenerate
 
 always @(posedge clk or posedge reset) begin
   if (reset) begin
@@ -40,12 +292,18 @@ always @(posedge clk or posedge reset) begin
     wb_rd_addr_out <= 4'h0;
     wb_reg_write_out <= 1'b0;
     wb_from_mem <= 1'b0;
+    wb_mem_size_out <= 3'b000;
+    wb_byte_offset <= 2'b00;
   end else if (!stall) begin
-    result_out <= result_in;
-    mem_data <= mem_read_data;
-    wb_rd_addr_out <= wb_rd_addr_in;
-    wb_reg_write_out <= wb_reg_write_in;
-    wb_from_mem <= wb_mem_read;
+    wb_reg_write_out <= wb_reg_write_in && !load_deferred;
+    if (!GATE_IDLE || wb_reg_write_in) begin
+      result_out <= result_in;
+      wb_rd_addr_out <= wb_rd_addr_in;
+      wb_from_mem <= wb_mem_read;
+      wb_mem_size_out <= wb_mem_size_in;
+      wb_byte_offset <= mem_addr[1:0];
+    end
+    if (!GATE_IDLE || (wb_mem_read && !load_deferred)) mem_data <= load_word;
   end
 end
 
@@ -0,0 +1,25 @@
+// non-blocking load scoreboard: whether `instruction`, about to be decoded,
+// reads a register a load is still fetching. The memory stage reports those
+// registers in `pending`; a load completing this cycle is forwarded instead.
+module sky_scoreboard(
+  input wire [31:0] instruction,
+  input wire [15:0] pending,
+  output wire hazard
+);
+
+wire [3:0] opcode = instruction[31:28];
+wire [3:0] rs1 = instruction[27:24];
+wire [3:0] rs2 = instruction[23:20];
+wire [3:0] rd = instruction[19:16];
+wire [3:0] funct = instruction[15:12];
+
+// alu ops and memory accesses read rs1; r-type, stores and atomics read rs2;
+// mac reads its accumulator through rd
+wire alu = opcode == 4'b0000 || opcode == 4'b0001;
+wire reads_rs1 = alu || opcode == 4'b0010 || opcode == 4'b0011 || opcode == 4'b0101;
+wire reads_rs2 = opcode == 4'b0000 || opcode == 4'b0011 || opcode == 4'b0101;
+wire reads_rd = alu && funct == 4'b1011;
+
+assign hazard = (reads_rs1 && pending[rs1]) || (reads_rs2 && pending[rs2]) || (reads_rd && pending[rd]);
+
+endmodule
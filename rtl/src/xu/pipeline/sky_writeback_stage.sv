@@ -5,6 +5,8 @@ module sky_writeback_stage (
   input wire [3:0] wb_rd_addr,
   input wire wb_reg_write,
   input wire wb_from_mem,
+  input wire [2:0] wb_mem_size,
+  input wire [1:0] wb_byte_offset,
 
   // register file interface
   output wire rf_write_enable,
@@ -12,8 +14,22 @@ module sky_writeback_stage (
   output wire [31:0] rf_write_data
 );
 
+// narrow loads pick their byte/halfword out of the loaded word and sign- or
+// zero-extend it (wb_mem_size bit 2)
+wire [7:0] load_byte = mem_data >> {wb_byte_offset, 3'b000};
+wire [15:0] load_half = wb_byte_offset[1] ? mem_data[31:16] : mem_data[15:0];
+reg [31:0] load_data;
+
+always @(*) begin
+  case (wb_mem_size[1:0])
+    2'b01: load_data = {{24{load_byte[7] & !wb_mem_size[2]}}, load_byte};
+    2'b10: load_data = {{16{load_half[15] & !wb_mem_size[2]}}, load_half};
+    default: load_data = mem_data;
+  endcase
+end
+
 // select data to writeback (alu or memory)
-assign rf_write_data = wb_from_mem ? mem_data : result_in;
+assign rf_write_data = wb_from_mem ? load_data : result_in;
 assign rf_write_addr = wb_rd_addr;
 assign rf_write_enable = wb_reg_write;
 
@@ -3,6 +3,7 @@ module sky_alu (
   input wire          reset,
   input wire [31:0]   operand_a,
   input wire [31:0]   operand_b,
+  input wire [31:0]   operand_c,  // accumulator, only read by MAC
   input wire [3:0]    operation,
   output reg [31:0]   result,
   output wire         zero_flag,
@@ -21,32 +22,32 @@ localparam
   SRA   = 4'b0111,
   SLT   = 4'b1000,
   SLTU  = 4'b1001,
-  MUL   = 4'b1010;
+  MUL   = 4'b1010,
+  MAC   = 4'b1011;
 
 // internal signals for overflow detection
 wire signed_overflow;
 wire [32:0] add_result_ext;
 wire [32:0] sub_result_ext;
 
-always @(posedge clk) begin
-  if (reset) begin
-    result <= 32'h0;
-  end else begin 
-    case (operation)
-      ADD:  result <= operand_a + operand_b;
-      SUB:  result <= operand_a - operand_b;
-      AND:  result <= operand_a & operand_b;
-      OR:   result <= operand_a | operand_b;
-      XOR:  result <= operand_a ^ operand_b;
-      SLL:  result <= operand_a << operand_b[4:0]; // use bottom 5 bits for shift (shifts up to 32-bits)
-      SRL:  result <= operand_a >> operand_b[4:0];
-      SRA:  result <= $signed(operand_a) >>> operand_b[4:0];
-      SLT:  result <= $signed(operand_a) < $signed(operand_b) ? 32'h1 : 32'h0;
-      SLTU: result <= operand_a < operand_b ? 32'h1 : 32'h0;
-      MUL:  result <= operand_a * operand_b; // sets lower 32-bits by default
-      default: result <= 32'h0;
-    endcase
-  end
+// the result is combinational: the execute stage registers it alongside the
+// rest of the instruction's control signals
+always @(*) begin
+  case (operation)
+    ADD:  result = operand_a + operand_b;
+    SUB:  result = operand_a - operand_b;
+    AND:  result = operand_a & operand_b;
+    OR:   result = operand_a | operand_b;
+    XOR:  result = operand_a ^ operand_b;
+    SLL:  result = operand_a << operand_b[4:0]; // use bottom 5 bits for shift (shifts up to 32-bits)
+    SRL:  result = operand_a >> operand_b[4:0];
+    SRA:  result = $signed(operand_a) >>> operand_b[4:0];
+    SLT:  result = $signed(operand_a) < $signed(operand_b) ? 32'h1 : 32'h0;
+    SLTU: result = operand_a < operand_b ? 32'h1 : 32'h0;
+    MUL:  result = operand_a * operand_b; // sets lower 32-bits by default
+    MAC:  result = operand_a * operand_b + operand_c;
+    default: result = 32'h0;
+  endcase
 end
 
 
@@ -0,0 +1,81 @@
+// NUM_XU single-issue XUs sharing a banked scratchpad (sky_scratchpad) at
+// SCRATCHPAD_BASE. Each XU keeps its own instruction and data memories; a
+// launch starts them all on the same range of their instruction memories,
+// and `done` is set once every one of them has finished. Their dma engines
+// are left idle.
+module sky_cluster #(
+  parameter NUM_XU = 4,
+  parameter BANKS = 4,
+  parameter SCRATCHPAD_BASE = 32'h1000
+)(
+  input wire clk,
+  input wire reset,
+
+  input wire launch,
+  input wire [31:0] launch_pc,
+  input wire [31:0] launch_count,
+  output wire done,
+
+  // requests each scratchpad bank turned away since reset
+  output wire [32*BANKS-1:0] bank_conflicts
+);
+
+wire [NUM_XU-1:0] xu_done;
+wire [NUM_XU-1:0] sp_request, sp_write, sp_grant;
+wire [3*NUM_XU-1:0] sp_atomic;
+wire [32*NUM_XU-1:0] sp_address, sp_write_data, sp_read_data;
+wire [4*NUM_XU-1:0] sp_byte_enable;
+
+assign done = &xu_done;
+
+genvar g;
+generate
+  for (g = 0; g < NUM_XU; g = g + 1) begin : xus
+    sky_xu #(
+      .SCRATCHPAD(1),
+      .SCRATCHPAD_BASE(SCRATCHPAD_BASE)
+    ) xu(
+      .clk(clk),
+      .reset(reset),
+      .dma_cfg_write(1'b0),
+      .dma_cfg_addr(3'd0),
+      .dma_cfg_data(32'h0),
+      .dma_busy(),
+      .dma_done(),
+      .dma_host_valid(1'b0),
+      .dma_host_data(32'h0),
+      .dma_host_ready(),
+      .launch(launch),
+      .launch_pc(launch_pc),
+      .launch_count(launch_count),
+      .done(xu_done[g]),
+      .sp_request(sp_request[g]),
+      .sp_write(sp_write[g]),
+      .sp_atomic(sp_atomic[3*g +: 3]),
+      .sp_address(sp_address[32*g +: 32]),
+      .sp_write_data(sp_write_data[32*g +: 32]),
+      .sp_byte_enable(sp_byte_enable[4*g +: 4]),
+      .sp_grant(sp_grant[g]),
+      .sp_read_data(sp_read_data[32*g +: 32])
+    );
+  end
+endgenerate
+
+sky_scratchpad #(
+  .PORTS(NUM_XU),
+  .BANKS(BANKS)
+) scratchpad(
+  .clk(clk),
+  .reset(reset),
+  .request(sp_request),
+  .write(sp_write),
+  .atomic(sp_atomic),
+  .address(sp_address),
+  .write_data(sp_write_data),
+  .byte_enable(sp_byte_enable),
+  .grant(sp_grant),
+  .read_data(sp_read_data),
+  .conflicts(bank_conflicts)
+);
+
+endmodule
@@ -0,0 +1,133 @@
+// skylark DMA engine. A descriptor (source, destination, length in words and
+// a byte stride for each side) is written through the register port, then a
+// write to CTRL starts the transfer. Memory-to-memory copies read and write
+// through the shared data memory port, a word every two cycles; host-to-memory
+// transfers take words from the host stream and write one per cycle. The XU
+// memory stage always wins the port, so the engine only moves data in cycles
+// the pipeline leaves it free. `done` is set when a transfer finishes and
+// cleared by the next start.
+module sky_dma(
+  input wire clk,
+  input wire reset,
+
+  // descriptor registers
+  input wire cfg_write,
+  input wire [2:0] cfg_addr,
+  input wire [31:0] cfg_data,
+  output wire busy,
+  output reg done,
+
+  // host data stream for host-to-memory transfers
+  input wire host_valid,
+  input wire [31:0] host_data,
+  output wire host_ready,
+
+  // shared data memory port
+  input wire grant,
+  output wire [31:0] mem_address,
+  output wire mem_read,
+  output wire mem_write,
+  output wire [31:0] mem_write_data,
+  input wire [31:0] mem_read_data,
+
+  // cycles spent waiting for the memory port, for benchmarks
+  output reg [31:0] stall_cycles
+);
+
+// register map
+localparam
+  SRC = 3'd0,
+  DST = 3'd1,
+  LEN = 3'd2,
+  SRC_STRIDE = 3'd3,
+  DST_STRIDE = 3'd4,
+  CTRL = 3'd5;
+
+// CTRL bits
+localparam
+  CTRL_START = 0,
+  CTRL_HOST = 1;
+
+localparam
+  IDLE = 2'd0,
+  READ = 2'd1,
+  WRITE = 2'd2,
+  STREAM = 2'd3;
+
+reg [1:0] state;
+
+// descriptor as written
+reg [31:0] src, dst, len, src_stride, dst_stride;
+
+// transfer in progress
+reg [31:0] src_ptr, dst_ptr, remaining;
+reg [31:0] buffer;
+
+wire start = cfg_write && cfg_addr == CTRL && cfg_data[CTRL_START] && state == IDLE;
+
+assign busy = state != IDLE;
+assign host_ready = state == STREAM && grant;
+
+assign mem_read = state == READ;
+assign mem_write = state == WRITE || (state == STREAM && host_valid);
+assign mem_address = state == READ ? src_ptr : dst_ptr;
+assign mem_write_data = state == STREAM ? host_data : buffer;
+
+wire moved = grant && mem_write;
+
+always @(posedge clk or posedge reset) begin
+  if (reset) begin
+    state <= IDLE;
+    done <= 1'b0;
+    src <= 32'h0;
+    dst <= 32'h0;
+    len <= 32'h0;
+    src_stride <= 32'h4;
+    dst_stride <= 32'h4;
+    src_ptr <= 32'h0;
+    dst_ptr <= 32'h0;
+    remaining <= 32'h0;
+    buffer <= 32'h0;
+    stall_cycles <= 32'h0;
+  end else begin
+    if (cfg_write && state == IDLE) begin
+      case (cfg_addr)
+        SRC: src <= cfg_data;
+        DST: dst <= cfg_data;
+        LEN: len <= cfg_data;
+        SRC_STRIDE: src_stride <= cfg_data;
+        DST_STRIDE: dst_stride <= cfg_data;
+        default: ;
+      endcase
+    end
+
+    if ((mem_read || mem_write) && !grant) stall_cycles <= stall_cycles + 1;
+
+    case (state)
+      IDLE: if (start) begin
+        src_ptr <= src;
+        dst_ptr <= dst;
+        remaining <= len;
+        done <= len == 32'h0;
+        if (len != 32'h0) state <= cfg_data[CTRL_HOST] ? STREAM : READ;
+      end
+      READ: if (grant) begin
+        buffer <= mem_read_data;
+        src_ptr <= src_ptr + src_stride;
+        state <= WRITE;
+      end
+      WRITE, STREAM: if (moved) begin
+        dst_ptr <= dst_ptr + dst_stride;
+        remaining <= remaining - 1;
+        if (remaining == 32'h1) begin
+          state <= IDLE;
+          done <= 1'b1;
+        end else if (state == WRITE) begin
+          state <= READ;
+        end
+      end
+    endcase
+  end
+end
+
+endmodule
@@ -0,0 +1,233 @@
+// data prefetcher for a memory behind a latency model (sky_memory_latency):
+// trains on the loads leaving the memory stage, reads words it expects to be
+// loaded next into a small buffer through port cycles the memory stage leaves
+// free, and answers a load that finds its word there without going to memory.
+//
+// MODE 1 prefetches DISTANCE words past every load (next line). MODE 2 keeps
+// the last address and stride of each load pc in a small table and, once the
+// same nonzero stride is seen twice in a row, prefetches DISTANCE strides
+// ahead instead, falling back to next line for loads without one.
+//
+// Buffered words are dropped when a store or a dma write hits them, so a load
+// never sees stale data: a prefetch issued after a store reads memory after
+// that store has landed, since accesses complete in order.
+module sky_prefetcher #(
+  parameter LATENCY = 1,
+  parameter MODE = 2,
+  parameter ENTRIES = 4,
+  parameter DISTANCE = 2,
+  parameter TABLE_ENTRIES = 4
+)(
+  input wire clk,
+  input wire reset,
+
+  // a load leaving the memory stage
+  input wire load,
+  input wire [31:0] load_pc,
+  input wire [31:0] load_address,
+
+  // the load in the memory stage, answered from the buffer on a hit
+  input wire [31:0] lookup_address,
+  output wire hit,
+  output wire [31:0] hit_data,
+
+  // writes that make a buffered word stale
+  input wire store,
+  input wire [31:0] store_address,
+  input wire dma_write,
+  input wire [31:0] dma_address,
+
+  // prefetch reads, issued only when `port_free`; `read_data` is the data
+  // memory output in the cycle a read comes back
+  input wire port_free,
+  output wire read,
+  output wire [31:0] read_address,
+  input wire [31:0] read_data,
+
+  // prefetches issued, hit by a load, dropped without a hit, and loads that
+  // found their word still on its way
+  output reg [31:0] issued,
+  output reg [31:0] useful,
+  output reg [31:0] useless,
+  output reg [31:0] late
+);
+
+localparam TABLE_BITS = TABLE_ENTRIES > 1 ? $clog2(TABLE_ENTRIES) : 1;
+
+// buffer slots: a word is pending while its read is in flight, dead if it
+// went stale on the way, and valid once it has arrived
+reg [29:0] slot_word [0:ENTRIES-1];
+reg [31:0] slot_data [0:ENTRIES-1];
+reg slot_valid [0:ENTRIES-1];
+reg slot_pending [0:ENTRIES-1];
+reg slot_dead [0:ENTRIES-1];
+reg slot_used [0:ENTRIES-1];
+
+// reads in flight, one stage per cycle, tagged with their slot
+reg return_valid [0:LATENCY-1];
+reg [7:0] return_slot [0:LATENCY-1];
+
+// stride table, indexed by load pc
+reg [31:0] table_pc [0:TABLE_ENTRIES-1];
+reg [31:0] table_last [0:TABLE_ENTRIES-1];
+reg [31:0] table_stride [0:TABLE_ENTRIES-1];
+reg table_valid [0:TABLE_ENTRIES-1];
+
+// the next word to prefetch
+reg request_valid;
+reg [29:0] request_word;
+
+integer i;
+
+// lookup: a valid slot holding the load's word
+reg hit_found;
+reg [7:0] hit_slot;
+reg late_found;
+always @(*) begin : lookup
+  integer k;
+  hit_found = 1'b0;
+  hit_slot = 8'd0;
+  late_found = 1'b0;
+  for (k = 0; k < ENTRIES; k = k + 1) begin
+    if (slot_valid[k] && slot_word[k] == lookup_address[31:2]) begin
+      hit_found = 1'b1;
+      hit_slot = k;
+    end
+    if (slot_pending[k] && !slot_dead[k] && slot_word[k] == lookup_address[31:2]) late_found = 1'b1;
+  end
+end
+
+assign hit = hit_found;
+assign hit_data = slot_data[hit_slot];
+
+// a slot with no read in flight for the next prefetch, oldest first
+reg [7:0] next_slot;
+reg free_found;
+reg [7:0] alloc_slot;
+always @(*) begin : allocate
+  integer k;
+  free_found = 1'b0;
+  alloc_slot = 8'd0;
+  for (k = ENTRIES - 1; k >= 0; k = k - 1) begin
+    if (!slot_pending[(next_slot + k) % ENTRIES]) begin
+      free_found = 1'b1;
+      alloc_slot = (next_slot + k) % ENTRIES;
+    end
+  end
+end
+
+assign read = request_valid && port_free && free_found;
+assign read_address = {request_word, 2'b00};
+
+// training: the word this load points the prefetcher at
+wire [TABLE_BITS-1:0] table_index = load_pc[TABLE_BITS+1:2];
+wire table_hit = table_valid[table_index] && table_pc[table_index] == load_pc;
+wire [31:0] stride = load_address - table_last[table_index];
+wire strided = MODE == 2 && table_hit && stride != 32'h0 && stride == table_stride[table_index];
+wire [31:0] target = strided ? load_address + DISTANCE * stride : load_address + 4 * DISTANCE;
+
+// whether the target is already buffered or on its way
+reg target_known;
+always @(*) begin : target_lookup
+  integer k;
+  target_known = request_valid && request_word == target[31:2];
+  for (k = 0; k < ENTRIES; k = k + 1) begin
+    if ((slot_valid[k] || (slot_pending[k] && !slot_dead[k])) && slot_word[k] == target[31:2]) target_known = 1'b1;
+  end
+end
+
+// slots a write makes stale, and prefetches dropped without a hit this cycle
+reg [ENTRIES-1:0] stale;
+reg [7:0] dropped;
+always @(*) begin : stale_slots
+  integer k;
+  dropped = 8'd0;
+  for (k = 0; k < ENTRIES; k = k + 1) begin
+    stale[k] = (store && slot_word[k] == store_address[31:2]) || (dma_write && slot_word[k] == dma_address[31:2]);
+    if (stale[k] && ((slot_valid[k] && !slot_used[k]) || (slot_pending[k] && !slot_dead[k]))) dropped = dropped + 8'd1;
+  end
+  if (read && slot_valid[alloc_slot] && !slot_used[alloc_slot] && !stale[alloc_slot]) dropped = dropped + 8'd1;
+end
+
+wire returning = return_valid[LATENCY-1];
+wire [7:0] returning_slot = return_slot[LATENCY-1];
+
+always @(posedge clk or posedge reset) begin
+  if (reset) begin
+    for (i = 0; i < ENTRIES; i = i + 1) begin
+      slot_valid[i] <= 1'b0;
+      slot_pending[i] <= 1'b0;
+      slot_dead[i] <= 1'b0;
+      slot_used[i] <= 1'b0;
+    end
+    for (i = 0; i < LATENCY; i = i + 1) return_valid[i] <= 1'b0;
+    for (i = 0; i < TABLE_ENTRIES; i = i + 1) table_valid[i] <= 1'b0;
+    request_valid <= 1'b0;
+    request_word <= 30'h0;
+    next_slot <= 8'd0;
+    issued <= 32'h0;
+    useful <= 32'h0;
+    useless <= 32'h0;
+    late <= 32'h0;
+  end else begin
+    // reads coming back fill their slot, unless it went stale on the way
+    return_valid[0] <= read;
+    return_slot[0] <= alloc_slot;
+    for (i = 1; i < LATENCY; i = i + 1) begin
+      return_valid[i] <= return_valid[i - 1];
+      return_slot[i] <= return_slot[i - 1];
+    end
+    if (returning) begin
+      slot_pending[returning_slot] <= 1'b0;
+      slot_dead[returning_slot] <= 1'b0;
+      if (!slot_dead[returning_slot] && !stale[returning_slot]) begin
+        slot_valid[returning_slot] <= 1'b1;
+        slot_data[returning_slot] <= read_data;
+        slot_used[returning_slot] <= 1'b0;
+      end
+    end
+
+    for (i = 0; i < ENTRIES; i = i + 1) begin
+      if (stale[i]) begin
+        slot_valid[i] <= 1'b0;
+        if (slot_pending[i] && !(returning && returning_slot == i)) slot_dead[i] <= 1'b1;
+      end
+    end
+
+    if (read) begin
+      slot_word[alloc_slot] <= request_word;
+      slot_valid[alloc_slot] <= 1'b0;
+      slot_pending[alloc_slot] <= 1'b1;
+      slot_dead[alloc_slot] <= 1'b0;
+      next_slot <= (alloc_slot + 8'd1) % ENTRIES;
+      issued <= issued + 32'd1;
+    end
+    useless <= useless + dropped;
+
+    if (load) begin
+      if (hit_found) begin
+        slot_used[hit_slot] <= 1'b1;
+        if (!slot_used[hit_slot]) useful <= useful + 32'd1;
+      end else if (late_found) begin
+        late <= late + 32'd1;
+      end
+
+      if (MODE == 2) begin
+        table_valid[table_index] <= 1'b1;
+        table_pc[table_index] <= load_pc;
+        table_last[table_index] <= load_address;
+        table_stride[table_index] <= table_hit ? stride : 32'h0;
+      end
+    end
+
+    // a new target replaces a request still waiting for the port
+    if (load && !target_known) begin
+      request_valid <= 1'b1;
+      request_word <= target[31:2];
+    end else if (read) begin
+      request_valid <= 1'b0;
+    end
+  end
+end
+
+endmodule
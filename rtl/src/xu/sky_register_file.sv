@@ -1,4 +1,6 @@
-module sky_register_file(
+module sky_register_file #(
+  parameter ISSUE_WIDTH = 1
+)(
   input wire clk,
   input wire reset,
 
@@ -9,7 +11,26 @@ module sky_register_file(
 
   input wire write_enable,
   input wire [3:0] write_addr,
-  input wire [31:0] write_data
+  input wire [31:0] write_data,
+
+  // second read/write port pair, only used when dual issuing
+  input wire [3:0] read_addr3,
+  input wire [3:0] read_addr4,
+  output wire [31:0] read_data3,
+  output wire [31:0] read_data4,
+
+  input wire write_enable2,
+  input wire [3:0] write_addr2,
+  input wire [31:0] write_data2,
+
+  // accumulator read port for mac (first lane only)
+  input wire [3:0] read_addr5,
+  output wire [31:0] read_data5,
+
+  // non-blocking loads completing behind the pipeline
+  input wire write_enable3,
+  input wire [3:0] write_addr3,
+  input wire [31:0] write_data3
 );
 
 // each skylark XU has 16 32-bit registers
@@ -27,12 +48,19 @@ always @(posedge clk or posedge reset) begin
   end
   // write data to register if write enabled
   // data is written synchronously
-  else if (write_enable) begin
-    if (write_addr != 4'h0) registers[write_addr] <= write_data;
+  else begin
+    if (write_enable && write_addr != 4'h0) registers[write_addr] <= write_data;
+    // the pairing rules keep both ports from writing the same register
+    if (ISSUE_WIDTH == 2 && write_enable2 && write_addr2 != 4'h0) registers[write_addr2] <= write_data2;
+    // the memory stage drops a returning load that either lane overwrote
+    if (write_enable3 && write_addr3 != 4'h0) registers[write_addr3] <= write_data3;
   end
 end
 
 assign read_data1 = (read_addr1 == 4'h0) ? 32'h0 : registers[read_addr1];
 assign read_data2 = (read_addr2 == 4'h0) ? 32'h0 : registers[read_addr2];
+assign read_data3 = (read_addr3 == 4'h0) ? 32'h0 : registers[read_addr3];
+assign read_data4 = (read_addr4 == 4'h0) ? 32'h0 : registers[read_addr4];
+assign read_data5 = (read_addr5 == 4'h0) ? 32'h0 : registers[read_addr5];
 
 endmodule
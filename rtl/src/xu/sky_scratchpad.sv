@@ -0,0 +1,132 @@
+// scratchpad shared by the XUs of a cluster (sky_cluster). Words are
+// interleaved across BANKS banks by word address; each bank serves one port a
+// cycle, granted round robin starting after the port it last served, and the
+// others wait. Reads are combinational, so a granted port gets its word in
+// the same cycle and its access completes at the next edge. Atomics execute
+// at the bank: it reads the old word, writes the operation's result at the
+// edge and returns the old word. Each bank counts, every cycle, the requests
+// it had to turn away.
+module sky_scratchpad #(
+  parameter PORTS = 4,
+  parameter BANKS = 4,
+  parameter WORDS = 1024
+)(
+  input wire clk,
+  input wire reset,
+
+  // one port per XU (see sky_memory_stage's sp_ port), packed
+  input wire [PORTS-1:0] request,
+  input wire [PORTS-1:0] write,
+  input wire [3*PORTS-1:0] atomic,
+  input wire [32*PORTS-1:0] address,
+  input wire [32*PORTS-1:0] write_data,
+  input wire [4*PORTS-1:0] byte_enable,
+  output reg [PORTS-1:0] grant,
+  output wire [32*PORTS-1:0] read_data,
+
+  // requests each bank turned away since reset, for benchmarks
+  output wire [32*BANKS-1:0] conflicts
+);
+
+// atomic operations (funct of the atomic opcode)
+localparam
+  AMO_ADD = 2'd0,
+  AMO_SWAP = 2'd1,
+  AMO_MIN = 2'd2,
+  AMO_MAX = 2'd3;
+
+reg [31:0] memory [0:WORDS-1];
+
+function [31:0] word_index;
+  input [31:0] byte_address;
+  word_index = (byte_address >> 2) % WORDS;
+endfunction
+
+function [31:0] bank_of;
+  input [31:0] byte_address;
+  bank_of = word_index(byte_address) % BANKS;
+endfunction
+
+// the word a granted access leaves behind
+function [31:0] update;
+  input [31:0] old;
+  input [31:0] data;
+  input is_write;
+  input [2:0] op;
+  input [3:0] enable;
+  begin
+    update = old;
+    if (op[2]) begin
+      case (op[1:0])
+        AMO_ADD: update = old + data;
+        AMO_SWAP: update = data;
+        AMO_MIN: update = $signed(data) < $signed(old) ? data : old;
+        AMO_MAX: update = $signed(data) > $signed(old) ? data : old;
+      endcase
+    end else if (is_write) begin
+      if (enable[0]) update[7:0] = data[7:0];
+      if (enable[1]) update[15:8] = data[15:8];
+      if (enable[2]) update[23:16] = data[23:16];
+      if (enable[3]) update[31:24] = data[31:24];
+    end
+  end
+endfunction
+
+genvar g;
+generate
+  for (g = 0; g < PORTS; g = g + 1) begin : ports
+    assign read_data[32*g +: 32] = memory[word_index(address[32*g +: 32])];
+  end
+endgenerate
+
+// port each bank served last, and the requests waiting on it this cycle
+reg [7:0] last [0:BANKS-1];
+reg [31:0] conflict_count [0:BANKS-1];
+reg [7:0] waiting [0:BANKS-1];
+
+generate
+  for (g = 0; g < BANKS; g = g + 1) begin : banks
+    assign conflicts[32*g +: 32] = conflict_count[g];
+  end
+endgenerate
+
+always @(*) begin : arbitrate
+  integer b, k, p;
+  reg found;
+  grant = {PORTS{1'b0}};
+  for (b = 0; b < BANKS; b = b + 1) begin
+    found = 1'b0;
+    waiting[b] = 8'd0;
+    // nearest requester after the one served last wins
+    for (k = 1; k <= PORTS; k = k + 1) begin
+      p = (last[b] + k) % PORTS;
+      if (request[p] && bank_of(address[32*p +: 32]) == b) begin
+        if (!found) grant[p] = 1'b1;
+        else waiting[b] = waiting[b] + 8'd1;
+        found = 1'b1;
+      end
+    end
+  end
+end
+
+integer i;
+always @(posedge clk) begin
+  if (reset) begin
+    for (i = 0; i < WORDS; i = i + 1) memory[i] <= 32'h0;
+    for (i = 0; i < BANKS; i = i + 1) begin
+      last[i] <= PORTS - 1;
+      conflict_count[i] <= 32'h0;
+    end
+  end else begin
+    for (i = 0; i < PORTS; i = i + 1) begin
+      if (grant[i]) begin
+        memory[word_index(address[32*i +: 32])] <= update(memory[word_index(address[32*i +: 32])],
+          write_data[32*i +: 32], write[i], atomic[3*i +: 3], byte_enable[4*i +: 4]);
+        last[bank_of(address[32*i +: 32])] <= i;
+      end
+    end
+    for (i = 0; i < BANKS; i = i + 1) conflict_count[i] <= conflict_count[i] + waiting[i];
+  end
+end
+
+endmodule
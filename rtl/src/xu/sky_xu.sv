@@ -3,9 +3,10 @@ module sky_data_memory(
   input wire reset,
   input wire [31:0] address,
   input wire write_enable,
+  input wire [3:0] byte_enable,
   input wire read_enable,
   input wire [31:0] write_data,
-  output reg [31:0] read_data
+  output wire [31:0] read_data
 );
 
   reg [31:0] memory [0:1023]; // 1K memory
@@ -18,123 +19,366 @@ module sky_data_memory(
         memory[i] <= 32'h0;
       end
     end else begin
-      if (write_enable) begin
-        memory[address[11:2]] <= write_data;
-      end
-      
-      if (read_enable) begin
-        read_data <= memory[address[11:2]];
+      // byte lanes are written independently for narrow stores
+      if (write_enable && byte_enable[0]) memory[address[11:2]][7:0] <= write_data[7:0];
+      if (write_enable && byte_enable[1]) memory[address[11:2]][15:8] <= write_data[15:8];
+      if (write_enable && byte_enable[2]) memory[address[11:2]][23:16] <= write_data[23:16];
+      if (write_enable && byte_enable[3]) memory[address[11:2]][31:24] <= write_data[31:24];
+    end
+  end
+
+  // reads are combinational so load data is valid in the same cycle the
+  // memory stage latches it
+  assign read_data = read_enable ? memory[address[11:2]] : 32'h0;
+
+endmodule
+
+// memory latency model: delays every access the memory stage makes by
+// LATENCY cycles before it reaches data memory, so a load's data comes back
+// LATENCY cycles after it was issued and a store lands LATENCY cycles later.
+// Accesses are pipelined, one can be issued every cycle, and complete in order.
+module sky_memory_latency #(
+  parameter LATENCY = 0
+)(
+  input wire clk,
+  input wire reset,
+  input wire [31:0] address,
+  input wire read_enable,
+  input wire write_enable,
+  input wire [3:0] byte_enable,
+  input wire [31:0] write_data,
+  output wire [31:0] address_out,
+  output wire read_enable_out,
+  output wire write_enable_out,
+  output wire [3:0] byte_enable_out,
+  output wire [31:0] write_data_out
+);
+
+generate
+  if (LATENCY == 0) begin : passthrough
+    assign address_out = address;
+    assign read_enable_out = read_enable;
+    assign write_enable_out = write_enable;
+    assign byte_enable_out = byte_enable;
+    assign write_data_out = write_data;
+  end else begin : delay
+    reg [31:0] address_q [0:LATENCY-1];
+    reg read_q [0:LATENCY-1];
+    reg write_q [0:LATENCY-1];
+    reg [3:0] byte_enable_q [0:LATENCY-1];
+    reg [31:0] write_data_q [0:LATENCY-1];
+    integer i;
+
+    always @(posedge clk or posedge reset) begin
+      if (reset) begin
+        for (i = 0; i < LATENCY; i = i + 1) begin
+          read_q[i] <= 1'b0;
+          write_q[i] <= 1'b0;
+        end
+      end else begin
+        address_q[0] <= address;
+        read_q[0] <= read_enable;
+        write_q[0] <= write_enable;
+        byte_enable_q[0] <= byte_enable;
+        write_data_q[0] <= write_data;
+        for (i = 1; i < LATENCY; i = i + 1) begin
+          address_q[i] <= address_q[i - 1];
+          read_q[i] <= read_q[i - 1];
+          write_q[i] <= write_q[i - 1];
+          byte_enable_q[i] <= byte_enable_q[i - 1];
+          write_data_q[i] <= write_data_q[i - 1];
+        end
       end
     end
+
+    assign address_out = address_q[LATENCY - 1];
+    assign read_enable_out = read_q[LATENCY - 1];
+    assign write_enable_out = write_q[LATENCY - 1];
+    assign byte_enable_out = byte_enable_q[LATENCY - 1];
+    assign write_data_out = write_data_q[LATENCY - 1];
   end
+endgenerate
 
 endmodule
 
-module sky_xu(
+module sky_xu #(
+  // 2 adds a second, alu-only lane fed by fetch's pairing rules
+  parameter ISSUE_WIDTH = 1,
+  // data memory latency in cycles (sky_memory_latency), and how the memory
+  // stage copes with it: blocking, or non-blocking loads with a store buffer
+  parameter MEM_LATENCY = 0,
+  parameter NONBLOCKING = 1,
+  parameter STORE_BUFFER_DEPTH = 4,
+  // data prefetcher in front of the latency model (sky_prefetcher): 0 off,
+  // 1 next line, 2 per-pc stride; only built with MEM_LATENCY > 0
+  parameter PREFETCH = 0,
+  parameter PREFETCH_DISTANCE = 2,
+  parameter PREFETCH_ENTRIES = 4,
+  // 1 holds the data registers of stages without a valid instruction, and
+  // with them the alu operands: nops and other instructions without an
+  // effect become bubbles in decode
+  parameter GATE_IDLE = 0,
+  // 1 sends the memory stage's accesses to the 4KB window at SCRATCHPAD_BASE
+  // out on the sp_ port, to a scratchpad shared with other XUs (sky_cluster)
+  parameter SCRATCHPAD = 0,
+  parameter SCRATCHPAD_BASE = 32'h1000,
+  // 0 couples fetch to decode; otherwise fetch runs ahead of issue into a
+  // queue of FETCH_QUEUE_DEPTH words, reading FETCH_WIDTH (2 or 4) words of
+  // instruction memory a cycle (see sky_fetch_stage)
+  parameter FETCH_QUEUE_DEPTH = 0,
+  parameter FETCH_WIDTH = 2
+)(
   input wire clk,
   input wire reset,
+
+  // dma descriptor registers and completion flag
+  input wire dma_cfg_write,
+  input wire [2:0] dma_cfg_addr,
+  input wire [31:0] dma_cfg_data,
+  output wire dma_busy,
+  output wire dma_done,
+
+  // host data stream for host-to-memory dma transfers
+  input wire dma_host_valid,
+  input wire [31:0] dma_host_data,
+  output wire dma_host_ready,
+
+  // host launch: run the `launch_count` words from `launch_pc`; `done` is set
+  // once fetch has run past them and the pipeline has drained, and cleared by
+  // the next launch
+  input wire launch,
+  input wire [31:0] launch_pc,
+  input wire [31:0] launch_count,
+  output wire done,
+
+  // shared scratchpad port (sky_scratchpad); the pipeline waits on sp_grant
+  output wire sp_request,
+  output wire sp_write,
+  output wire [2:0] sp_atomic,
+  output wire [31:0] sp_address,
+  output wire [31:0] sp_write_data,
+  output wire [3:0] sp_byte_enable,
+  input wire sp_grant,
+  input wire [31:0] sp_read_data
 );
 
 // pipeline stage connections
 wire [31:0] if_pc, if_instruction;
-wire [31:0] id_pc, id_operand_a, id_operand_b, id_store_data;
+wire [31:0] id_pc, id_operand_a, id_operand_b, id_operand_c, id_store_data;
 wire [3:0] id_rd_addr, id_alu_op;
 wire id_mem_read, id_mem_write, id_reg_write;
+wire [2:0] id_mem_size, id_mem_atomic;
 
-wire [31:0] ex_result, ex_mem_addr, ex_mem_write_data;
+wire [31:0] ex_pc, ex_result, ex_mem_addr, ex_mem_write_data;
 wire [3:0] ex_wb_rd_addr;
 wire ex_wb_mem_read, ex_wb_mem_write, ex_wb_reg_write;
+wire [2:0] ex_wb_mem_size, ex_wb_mem_atomic;
 wire ex_branch_taken;
 wire [31:0] ex_branch_target;
 
 wire [31:0] mem_result, mem_data;
 wire [3:0] mem_wb_rd_addr;
 wire mem_wb_reg_write, mem_wb_from_mem;
+wire [2:0] mem_wb_mem_size;
+wire [1:0] mem_wb_byte_offset;
 
 // register file connections
-wire [3:0] rf_read_addr1, rf_read_addr2;
-wire [31:0] rf_read_data1, rf_read_data2;
+wire [3:0] rf_read_addr1, rf_read_addr2, rf_read_addr5;
+wire [31:0] rf_read_data1, rf_read_data2, rf_read_data5;
 wire rf_write_enable;
 wire [3:0] rf_write_addr;
 wire [31:0] rf_write_data;
 
 // ALU connections
-wire [31:0] alu_operand_a, alu_operand_b, alu_result;
+wire [31:0] alu_operand_a, alu_operand_b, alu_operand_c, alu_result;
 wire [3:0] alu_operation;
 wire alu_zero_flag, alu_overflow_flag;
 
 // memory connections
 wire [31:0] mem_address, mem_write_data_out, mem_read_data;
+wire [3:0] mem_byte_enable;
 wire mem_read_en, mem_write_en;
+wire mem_stall, mem_busy;
+
+// memory stage accesses after the latency model, as data memory sees them
+wire [31:0] lat_address, lat_write_data;
+wire [3:0] lat_byte_enable;
+wire lat_read_en, lat_write_en;
+
+// prefetcher connections; its reads share the latency model with the
+// memory stage, which they only use in cycles it leaves free
+wire prefetch_hit, prefetch_read;
+wire [31:0] prefetch_data, prefetch_address;
+wire [31:0] prefetch_issued, prefetch_useful, prefetch_useless, prefetch_late;
+
+// non-blocking loads completing behind the pipeline, written through a third
+// register file port
+wire [15:0] load_pending;
+wire load_return;
+wire [3:0] load_return_rd;
+wire [2:0] load_return_size;
+wire [1:0] load_return_offset;
+wire rf_write_enable3;
+wire [3:0] rf_write_addr3;
+wire [31:0] rf_write_data3;
+
+// dma connections
+wire [31:0] dma_mem_address, dma_mem_write_data, dma_stall_cycles;
+wire dma_mem_read, dma_mem_write;
+
+// data memory port, shared between the memory stage and the dma engine;
+// accesses the memory stage has issued can't be held back, so they always
+// have priority. The dma sits in front of the latency model and only uses
+// the cycles its pipeline leaves free.
+wire xu_mem_access = lat_read_en || lat_write_en;
+wire dma_grant = !xu_mem_access;
+wire [31:0] dm_address = xu_mem_access ? lat_address : dma_mem_address;
+wire dm_write_enable = lat_write_en || (dma_grant && dma_mem_write);
+wire dm_read_enable = lat_read_en || (dma_grant && dma_mem_read);
+wire [31:0] dm_write_data = lat_write_en ? lat_write_data : dma_mem_write_data;
+wire [3:0] dm_byte_enable = lat_write_en ? lat_byte_enable : 4'hF;
+
+// second lane register file ports, tied off when single issuing
+wire [3:0] rf_read_addr3, rf_read_addr4;
+wire [31:0] rf_read_data3, rf_read_data4;
+wire rf_write_enable2;
+wire [3:0] rf_write_addr2;
+wire [31:0] rf_write_data2;
+wire [31:0] if_pc1, if_instruction1;
+
+// hazard control: the memory stage holds the whole pipeline while an access
+// can't complete (blocking), the store buffer is full or the scratchpad
+// hasn't granted its request yet. Otherwise an instruction that reads a
+// register a non-blocking load is still fetching waits in decode, and execute
+// gets bubbles until the load returns; every other hazard is left to the
+// program (see sky_scheduler).
+wire scoreboard_hazard, scoreboard_hazard1;
+wire pipeline_stall = mem_stall;
+wire scoreboard_stall = scoreboard_hazard || scoreboard_hazard1;
+wire fetch_stall = pipeline_stall || scoreboard_stall;
+
+sky_scoreboard scoreboard(
+  .instruction(if_instruction),
+  .pending(load_pending),
+  .hazard(scoreboard_hazard)
+);
+
+// launch completion: the last word issued is written back PIPELINE_DRAIN
+// unstalled cycles after fetch goes idle, and done waits for loads and
+// stores still in flight behind it
+localparam PIPELINE_DRAIN = 3'd4;
+wire fetch_idle;
+reg [2:0] drain;
+
+always @(posedge clk or posedge reset) begin
+  if (reset) drain <= 3'd0;
+  else if (launch) drain <= 3'd0;
+  else if (fetch_idle && !fetch_stall && drain != PIPELINE_DRAIN) drain <= drain + 3'd1;
+end
 
-// hazard and forwarding control (simplified)
-wire pipeline_stall = 1'b0; // would be connected to hazard detection
+assign done = fetch_idle && drain == PIPELINE_DRAIN && !mem_busy;
 
-sky_fetch_stage fetch(
+sky_fetch_stage #(
+  .ISSUE_WIDTH(ISSUE_WIDTH),
+  .FETCH_QUEUE_DEPTH(FETCH_QUEUE_DEPTH),
+  .FETCH_WIDTH(FETCH_WIDTH)
+) fetch(
   .clk(clk),
   .reset(reset),
-  .stall(pipeline_stall),
+  .stall(fetch_stall),
   .branch_target(ex_branch_target),
   .branch_taken(ex_branch_taken),
   .pc_out(if_pc),
-  .instruction(if_instruction)
+  .instruction(if_instruction),
+  .pc_out1(if_pc1),
+  .instruction1(if_instruction1),
+  .launch(launch),
+  .launch_pc(launch_pc),
+  .launch_count(launch_count),
+  .fetch_idle(fetch_idle)
 );
 
-sky_decode_stage decode(
+sky_decode_stage #(.GATE_IDLE(GATE_IDLE)) decode(
   .clk(clk),
   .reset(reset),
   .stall(pipeline_stall),
+  .hold(scoreboard_stall),
   .pc_in(if_pc),
   .instruction(if_instruction),
   .rf_read_addr1(rf_read_addr1),
   .rf_read_addr2(rf_read_addr2),
   .rf_read_data1(rf_read_data1),
   .rf_read_data2(rf_read_data2),
+  .rf_read_addr3(rf_read_addr5),
+  .rf_read_data3(rf_read_data5),
   .wb_reg_write(rf_write_enable),
   .wb_write_addr(rf_write_addr),
   .wb_write_data(rf_write_data),
+  .wb2_reg_write(rf_write_enable2),
+  .wb2_write_addr(rf_write_addr2),
+  .wb2_write_data(rf_write_data2),
+  .wb3_reg_write(rf_write_enable3),
+  .wb3_write_addr(rf_write_addr3),
+  .wb3_write_data(rf_write_data3),
   .pc_out(id_pc),
   .operand_a(id_operand_a),
   .operand_b(id_operand_b),
+  .operand_c(id_operand_c),
   .rd_addr(id_rd_addr),
   .alu_op(id_alu_op),
   .mem_read(id_mem_read),
   .mem_write(id_mem_write),
+  .mem_size(id_mem_size),
   .reg_write(id_reg_write),
-  .store_data(id_store_data)
+  .store_data(id_store_data),
+  .mem_atomic(id_mem_atomic)
 );
 
-sky_execute_stage execute(
+sky_execute_stage #(.GATE_IDLE(GATE_IDLE)) execute(
   .clk(clk),
   .reset(reset),
   .stall(pipeline_stall),
   .pc_in(id_pc),
   .operand_a(id_operand_a),
   .operand_b(id_operand_b),
+  .operand_c(id_operand_c),
   .rd_addr(id_rd_addr),
   .alu_op(id_alu_op),
   .mem_read(id_mem_read),
   .mem_write(id_mem_write),
+  .mem_size(id_mem_size),
   .reg_write(id_reg_write),
   .store_data(id_store_data),
+  .mem_atomic(id_mem_atomic),
   .alu_operand_a(alu_operand_a),
   .alu_operand_b(alu_operand_b),
+  .alu_operand_c(alu_operand_c),
   .alu_operation(alu_operation),
   .alu_result(alu_result),
   .alu_zero_flag(alu_zero_flag),
   .alu_overflow_flag(alu_overflow_flag),
   .branch_taken(ex_branch_taken),
   .branch_target(ex_branch_target),
+  .pc_out(ex_pc),
   .result(ex_result),
   .mem_addr(ex_mem_addr),
   .mem_write_data(ex_mem_write_data),
   .wb_rd_addr(ex_wb_rd_addr),
   .wb_mem_read(ex_wb_mem_read),
   .wb_mem_write(ex_wb_mem_write),
-  .wb_reg_write(ex_wb_reg_write)
+  .wb_mem_size(ex_wb_mem_size),
+  .wb_reg_write(ex_wb_reg_write),
+  .wb_mem_atomic(ex_wb_mem_atomic)
 );
 
-sky_memory_stage memory(
+sky_memory_stage #(
+  .LATENCY(MEM_LATENCY),
+  .NONBLOCKING(NONBLOCKING),
+  .STORE_BUFFER_DEPTH(STORE_BUFFER_DEPTH),
+  .SCRATCHPAD(SCRATCHPAD),
+  .SCRATCHPAD_BASE(SCRATCHPAD_BASE),
+  .GATE_IDLE(GATE_IDLE)
+) memory(
   .clk(clk),
   .reset(reset),
   .stall(pipeline_stall),
@@ -144,17 +388,41 @@ sky_memory_stage memory(
   .wb_rd_addr_in(ex_wb_rd_addr),
   .wb_mem_read(ex_wb_mem_read),
   .wb_mem_write(ex_wb_mem_write),
+  .wb_mem_size_in(ex_wb_mem_size),
   .wb_reg_write_in(ex_wb_reg_write),
+  .wb_mem_atomic(ex_wb_mem_atomic),
   .mem_address(mem_address),
   .mem_read_en(mem_read_en),
   .mem_write_en(mem_write_en),
   .mem_write_data_out(mem_write_data_out),
+  .mem_byte_enable(mem_byte_enable),
   .mem_read_data(mem_read_data),
+  .sp_request(sp_request),
+  .sp_write(sp_write),
+  .sp_atomic(sp_atomic),
+  .sp_address(sp_address),
+  .sp_write_data(sp_write_data),
+  .sp_byte_enable(sp_byte_enable),
+  .sp_grant(sp_grant),
+  .sp_read_data(sp_read_data),
+  .prefetch_hit(prefetch_hit),
+  .prefetch_data(prefetch_data),
+  .mem_stall(mem_stall),
+  .mem_busy(mem_busy),
+  .wb2_reg_write(rf_write_enable2),
+  .wb2_write_addr(rf_write_addr2),
+  .load_pending(load_pending),
+  .load_return(load_return),
+  .load_return_rd(load_return_rd),
+  .load_return_size(load_return_size),
+  .load_return_offset(load_return_offset),
   .result_out(mem_result),
   .mem_data(mem_data),
   .wb_rd_addr_out(mem_wb_rd_addr),
   .wb_reg_write_out(mem_wb_reg_write),
-  .wb_from_mem(mem_wb_from_mem)
+  .wb_from_mem(mem_wb_from_mem),
+  .wb_mem_size_out(mem_wb_mem_size),
+  .wb_byte_offset(mem_wb_byte_offset)
 );
 
 sky_writeback_stage writeback(
@@ -163,12 +431,44 @@ sky_writeback_stage writeback(
   .wb_rd_addr(mem_wb_rd_addr),
   .wb_reg_write(mem_wb_reg_write),
   .wb_from_mem(mem_wb_from_mem),
+  .wb_mem_size(mem_wb_mem_size),
+  .wb_byte_offset(mem_wb_byte_offset),
   .rf_write_enable(rf_write_enable),
   .rf_write_addr(rf_write_addr),
   .rf_write_data(rf_write_data)
 );
 
-sky_register_file regfile(
+// a returning load goes through writeback's narrow-load extraction like any
+// other, straight from the data memory word
+sky_writeback_stage load_writeback(
+  .result_in(32'h0),
+  .mem_data(mem_read_data),
+  .wb_rd_addr(load_return_rd),
+  .wb_reg_write(load_return),
+  .wb_from_mem(1'b1),
+  .wb_mem_size(load_return_size),
+  .wb_byte_offset(load_return_offset),
+  .rf_write_enable(rf_write_enable3),
+  .rf_write_addr(rf_write_addr3),
+  .rf_write_data(rf_write_data3)
+);
+
+sky_memory_latency #(.LATENCY(MEM_LATENCY)) memory_latency(
+  .clk(clk),
+  .reset(reset),
+  .address(prefetch_read ? prefetch_address : mem_address),
+  .read_enable(mem_read_en || prefetch_read),
+  .write_enable(mem_write_en),
+  .byte_enable(mem_byte_enable),
+  .write_data(mem_write_data_out),
+  .address_out(lat_address),
+  .read_enable_out(lat_read_en),
+  .write_enable_out(lat_write_en),
+  .byte_enable_out(lat_byte_enable),
+  .write_data_out(lat_write_data)
+);
+
+sky_register_file #(.ISSUE_WIDTH(ISSUE_WIDTH)) regfile(
   .clk(clk),
   .reset(reset),
   .read_addr1(rf_read_addr1),
@@ -177,7 +477,19 @@ sky_register_file regfile(
   .read_data2(rf_read_data2),
   .write_enable(rf_write_enable),
   .write_addr(rf_write_addr),
-  .write_data(rf_write_data)
+  .write_data(rf_write_data),
+  .read_addr3(rf_read_addr3),
+  .read_addr4(rf_read_addr4),
+  .read_data3(rf_read_data3),
+  .read_data4(rf_read_data4),
+  .write_enable2(rf_write_enable2),
+  .write_addr2(rf_write_addr2),
+  .write_data2(rf_write_data2),
+  .read_addr5(rf_read_addr5),
+  .read_data5(rf_read_data5),
+  .write_enable3(rf_write_enable3),
+  .write_addr3(rf_write_addr3),
+  .write_data3(rf_write_data3)
 );
 
 sky_alu alu(
@@ -185,20 +497,274 @@ sky_alu alu(
   .reset(reset),
   .operand_a(alu_operand_a),
   .operand_b(alu_operand_b),
+  .operand_c(alu_operand_c),
   .operation(alu_operation),
   .result(alu_result),
   .zero_flag(alu_zero_flag),
   .overflow_flag(alu_overflow_flag)
 );
 
+generate
+  if (PREFETCH != 0 && MEM_LATENCY > 0) begin : prefetch
+    sky_prefetcher #(
+      .LATENCY(MEM_LATENCY),
+      .MODE(PREFETCH),
+      .ENTRIES(PREFETCH_ENTRIES),
+      .DISTANCE(PREFETCH_DISTANCE)
+    ) prefetcher(
+      .clk(clk),
+      .reset(reset),
+      .load(ex_wb_mem_read && !sp_request && !pipeline_stall),
+      .load_pc(ex_pc),
+      .load_address(ex_mem_addr),
+      .lookup_address(ex_mem_addr),
+      .hit(prefetch_hit),
+      .hit_data(prefetch_data),
+      .store(mem_write_en),
+      .store_address(mem_address),
+      .dma_write(dma_grant && dma_mem_write),
+      .dma_address(dma_mem_address),
+      .port_free(!mem_read_en && !mem_write_en && !dma_busy),
+      .read(prefetch_read),
+      .read_address(prefetch_address),
+      .read_data(mem_read_data),
+      .issued(prefetch_issued),
+      .useful(prefetch_useful),
+      .useless(prefetch_useless),
+      .late(prefetch_late)
+    );
+  end else begin : no_prefetch
+    assign prefetch_hit = 1'b0;
+    assign prefetch_data = 32'h0;
+    assign prefetch_read = 1'b0;
+    assign prefetch_address = 32'h0;
+    assign prefetch_issued = 32'h0;
+    assign prefetch_useful = 32'h0;
+    assign prefetch_useless = 32'h0;
+    assign prefetch_late = 32'h0;
+  end
+endgenerate
+
 sky_data_memory data_mem(
   .clk(clk),
   .reset(reset),
-  .address(mem_address),
-  .write_enable(mem_write_en),
-  .read_enable(mem_read_en),
-  .write_data(mem_write_data_out),
+  .address(dm_address),
+  .write_enable(dm_write_enable),
+  .byte_enable(dm_byte_enable),
+  .read_enable(dm_read_enable),
+  .write_data(dm_write_data),
   .read_data(mem_read_data)
 );
+
+sky_dma dma(
+  .clk(clk),
+  .reset(reset),
+  .cfg_write(dma_cfg_write),
+  .cfg_addr(dma_cfg_addr),
+  .cfg_data(dma_cfg_data),
+  .busy(dma_busy),
+  .done(dma_done),
+  .host_valid(dma_host_valid),
+  .host_data(dma_host_data),
+  .host_ready(dma_host_ready),
+  .grant(dma_grant),
+  .mem_address(dma_mem_address),
+  .mem_read(dma_mem_read),
+  .mem_write(dma_mem_write),
+  .mem_write_data(dma_mem_write_data),
+  .mem_read_data(mem_read_data),
+  .stall_cycles(dma_stall_cycles)
+);
+
+generate
+  if (ISSUE_WIDTH == 2) begin : lane1
+    // the second lane only ever receives alu ops, so its memory stage is a
+    // plain pipeline register with no data memory behind it
+    wire [31:0] id_pc, id_operand_a, id_operand_b, id_operand_c, id_store_data;
+    wire [3:0] id_rd_addr, id_alu_op;
+    wire id_mem_read, id_mem_write, id_reg_write;
+    wire [2:0] id_mem_size, id_mem_atomic;
+
+    wire [31:0] ex_result, ex_mem_addr, ex_mem_write_data;
+    wire [3:0] ex_wb_rd_addr;
+    wire ex_wb_mem_read, ex_wb_mem_write, ex_wb_reg_write;
+    wire [2:0] ex_wb_mem_size, ex_wb_mem_atomic;
+    wire ex_branch_taken;
+    wire [31:0] ex_branch_target;
+
+    wire [31:0] mem_result, mem_data;
+    wire [3:0] mem_wb_rd_addr;
+    wire mem_wb_reg_write, mem_wb_from_mem;
+    wire [2:0] mem_wb_mem_size;
+    wire [1:0] mem_wb_byte_offset;
+
+    wire [31:0] alu_operand_a, alu_operand_b, alu_operand_c, alu_result;
+    wire [3:0] alu_operation;
+    wire alu_zero_flag, alu_overflow_flag;
+
+    wire [31:0] mem_address, mem_write_data_out;
+    wire [3:0] mem_byte_enable;
+    wire [31:0] mem_read_data = 32'h0;
+    wire mem_read_en, mem_write_en;
+
+    sky_decode_stage #(.GATE_IDLE(GATE_IDLE)) decode(
+      .clk(clk),
+      .reset(reset),
+      .stall(pipeline_stall),
+      .hold(scoreboard_stall),
+      .pc_in(if_pc1),
+      .instruction(if_instruction1),
+      .rf_read_addr1(rf_read_addr3),
+      .rf_read_addr2(rf_read_addr4),
+      .rf_read_data1(rf_read_data3),
+      .rf_read_data2(rf_read_data4),
+      .rf_read_addr3(),
+      .rf_read_data3(32'h0),
+      .wb_reg_write(rf_write_enable),
+      .wb_write_addr(rf_write_addr),
+      .wb_write_data(rf_write_data),
+      .wb2_reg_write(rf_write_enable2),
+      .wb2_write_addr(rf_write_addr2),
+      .wb2_write_data(rf_write_data2),
+      .wb3_reg_write(rf_write_enable3),
+      .wb3_write_addr(rf_write_addr3),
+      .wb3_write_data(rf_write_data3),
+      .pc_out(id_pc),
+      .operand_a(id_operand_a),
+      .operand_b(id_operand_b),
+      .operand_c(id_operand_c),
+      .rd_addr(id_rd_addr),
+      .alu_op(id_alu_op),
+      .mem_read(id_mem_read),
+      .mem_write(id_mem_write),
+      .mem_size(id_mem_size),
+      .reg_write(id_reg_write),
+      .store_data(id_store_data),
+      .mem_atomic(id_mem_atomic)
+    );
+
+    sky_execute_stage #(.GATE_IDLE(GATE_IDLE)) execute(
+      .clk(clk),
+      .reset(reset),
+      .stall(pipeline_stall),
+      .pc_in(id_pc),
+      .operand_a(id_operand_a),
+      .operand_b(id_operand_b),
+      .operand_c(id_operand_c),
+      .rd_addr(id_rd_addr),
+      .alu_op(id_alu_op),
+      .mem_read(id_mem_read),
+      .mem_write(id_mem_write),
+      .mem_size(id_mem_size),
+      .reg_write(id_reg_write),
+      .store_data(id_store_data),
+      .mem_atomic(id_mem_atomic),
+      .alu_operand_a(alu_operand_a),
+      .alu_operand_b(alu_operand_b),
+      .alu_operand_c(alu_operand_c),
+      .alu_operation(alu_operation),
+      .alu_result(alu_result),
+      .alu_zero_flag(alu_zero_flag),
+      .alu_overflow_flag(alu_overflow_flag),
+      .branch_taken(ex_branch_taken),
+      .branch_target(ex_branch_target),
+      .pc_out(),
+      .result(ex_result),
+      .mem_addr(ex_mem_addr),
+      .mem_write_data(ex_mem_write_data),
+      .wb_rd_addr(ex_wb_rd_addr),
+      .wb_mem_read(ex_wb_mem_read),
+      .wb_mem_write(ex_wb_mem_write),
+      .wb_mem_size(ex_wb_mem_size),
+      .wb_reg_write(ex_wb_reg_write),
+      .wb_mem_atomic(ex_wb_mem_atomic)
+    );
+
+    sky_memory_stage #(.GATE_IDLE(GATE_IDLE)) memory(
+      .clk(clk),
+      .reset(reset),
+      .stall(pipeline_stall),
+      .result_in(ex_result),
+      .mem_addr(ex_mem_addr),
+      .mem_write_data(ex_mem_write_data),
+      .wb_rd_addr_in(ex_wb_rd_addr),
+      .wb_mem_read(ex_wb_mem_read),
+      .wb_mem_write(ex_wb_mem_write),
+      .wb_mem_size_in(ex_wb_mem_size),
+      .wb_reg_write_in(ex_wb_reg_write),
+      .wb_mem_atomic(ex_wb_mem_atomic),
+      .mem_address(mem_address),
+      .mem_read_en(mem_read_en),
+      .mem_write_en(mem_write_en),
+      .mem_write_data_out(mem_write_data_out),
+      .mem_byte_enable(mem_byte_enable),
+      .mem_read_data(mem_read_data),
+      .sp_request(),
+      .sp_write(),
+      .sp_atomic(),
+      .sp_address(),
+      .sp_write_data(),
+      .sp_byte_enable(),
+      .sp_grant(1'b0),
+      .sp_read_data(32'h0),
+      .prefetch_hit(1'b0),
+      .prefetch_data(32'h0),
+      .mem_stall(),
+      .mem_busy(),
+      .wb2_reg_write(1'b0),
+      .wb2_write_addr(4'h0),
+      .load_pending(),
+      .load_return(),
+      .load_return_rd(),
+      .load_return_size(),
+      .load_return_offset(),
+      .result_out(mem_result),
+      .mem_data(mem_data),
+      .wb_rd_addr_out(mem_wb_rd_addr),
+      .wb_reg_write_out(mem_wb_reg_write),
+      .wb_from_mem(mem_wb_from_mem),
+      .wb_mem_size_out(mem_wb_mem_size),
+      .wb_byte_offset(mem_wb_byte_offset)
+    );
+
+    sky_writeback_stage writeback(
+      .result_in(mem_result),
+      .mem_data(mem_data),
+      .wb_rd_addr(mem_wb_rd_addr),
+      .wb_reg_write(mem_wb_reg_write),
+      .wb_from_mem(mem_wb_from_mem),
+      .wb_mem_size(mem_wb_mem_size),
+      .wb_byte_offset(mem_wb_byte_offset),
+      .rf_write_enable(rf_write_enable2),
+      .rf_write_addr(rf_write_addr2),
+      .rf_write_data(rf_write_data2)
+    );
+
+    sky_alu alu(
+      .clk(clk),
+      .reset(reset),
+      .operand_a(alu_operand_a),
+      .operand_b(alu_operand_b),
+      .operand_c(alu_operand_c),
+      .operation(alu_operation),
+      .result(alu_result),
+      .zero_flag(alu_zero_flag),
+      .overflow_flag(alu_overflow_flag)
+    );
+
+    sky_scoreboard scoreboard(
+      .instruction(if_instruction1),
+      .pending(load_pending),
+      .hazard(scoreboard_hazard1)
+    );
+  end else begin : single
+    assign scoreboard_hazard1 = 1'b0;
+    assign rf_read_addr3 = 4'h0;
+    assign rf_read_addr4 = 4'h0;
+    assign rf_write_enable2 = 1'b0;
+    assign rf_write_addr2 = 4'h0;
+    assign rf_write_data2 = 32'h0;
+  end
+endgenerate
 endmodule
 
@@ -0,0 +1,181 @@
+import argparse
+import json
+from pathlib import Path
+
+from test_runner import duts, cocotb_tests
+from waves import capture
+
+# Toggle activity per module instance. Each workload (one cocotb test) runs
+# once with a VCD dump of the design, windowed like tb/waves.py, and the dump
+# is read once, counting the bits that flip on every value change, so the
+# simulator does the sampling and nothing walks the signals from Python each
+# cycle. Toggles are kept per signal and summed per instance, with signals in
+# generate blocks counted towards the enclosing instance, and a net shared
+# across a port counted once, in the deepest scope declaring it. The
+# activity factor of an instance is its toggles over bits times cycles, the
+# usual proxy for its share of dynamic power. With --against, the same
+# workloads also run on a second build (say sky_xu_gated, which holds idle
+# stages) and the toggles it saves are reported per instance.
+
+def _toggles(old, new) -> int:
+    return bin(old ^ new).count("1")
+
+def _value(bits):
+    """Integer value of a vcd vector, or None if any bit is x or z"""
+    if any(bit in "xXzZ" for bit in bits):
+        return None
+    return int(bits, 2)
+
+def read_vcd(path):
+    """(cycles, {(instance, signal): [bits, toggles]}) of a vcd file; cycles are rising edges of the top clk"""
+    declared = {}     # id code -> (depth, instance, signal, width) of its deepest declaration
+    clock = None
+    stack = []        # (kind, name) of open scopes
+
+    with open(path) as f:
+        for line in f:
+            tokens = line.split()
+            if not tokens:
+                continue
+            if tokens[0] == "$scope":
+                stack.append((tokens[1], tokens[2]))
+            elif tokens[0] == "$upscope":
+                stack.pop()
+            elif tokens[0] == "$var":
+                kind, width, code, name = tokens[1], int(tokens[2]), tokens[3], tokens[4]
+                if kind in ("real", "event", "parameter"):
+                    continue
+                if name == "clk" and len(stack) == 1:
+                    clock = code
+                # a net shared across a port is declared once per scope on the
+                # same id code; it belongs to the deepest one, where it's used
+                if code in declared and declared[code][0] >= len(stack):
+                    continue
+                last = max(i for i, (scope_kind, _) in enumerate(stack) if scope_kind == "module")
+                modules = [scope for scope_kind, scope in stack[:last + 1] if scope_kind == "module"]
+                signal = ".".join([scope for _, scope in stack[last + 1:]] + [name])
+                instance = ".".join(modules[1:]) or modules[0]
+                declared[code] = (len(stack), instance, signal, width)
+            elif tokens[0] == "$enddefinitions":
+                break
+
+        # the clock only counts cycles; it toggles the same in every instance
+        signals = {}  # (instance, signal) -> [bits, toggles]
+        owners = {}   # id code -> the signal's row
+        for code, (_, instance, signal, width) in declared.items():
+            if code != clock:
+                owners[code] = signals.setdefault((instance, signal), [width, 0])
+
+        values = {}
+        cycles = 0
+        for line in f:
+            if line[0] in "#$":
+                continue
+            if line[0] in "bB":
+                bits, code = line[1:].split()
+            elif line[0] in "01xXzZ":
+                bits, code = line[0], line[1:].strip()
+            else:
+                continue
+            if code not in owners and code != clock:
+                continue
+            value = _value(bits)
+            old = values.get(code)
+            if value is None:
+                # x or z, as $dumpoff writes for every signal: the next known
+                # value starts over, so nothing counts across the gap
+                values.pop(code, None)
+                continue
+            values[code] = value
+            if old is None or old == value:
+                continue
+            if code == clock:
+                cycles += value
+                continue
+            owners[code][1] += _toggles(old, value)
+    return cycles, signals
+
+def measure(dut, test_module=None, testcase=None, start=None, stop=None) -> dict:
+    """Run one workload with a vcd dump and return its activity per instance and signal"""
+    dumpfile = capture(dut, test_module, [testcase] if testcase else None, start=start, stop=stop, fmt="vcd")
+    cycles, signals = read_vcd(dumpfile)
+    scopes = {}
+    for (instance, signal), (bits, toggles) in signals.items():
+        scope = scopes.setdefault(instance, {"bits": 0, "toggles": 0, "signals": {}})
+        scope["bits"] += bits
+        scope["toggles"] += toggles
+        scope["signals"][signal] = toggles
+    return {
+        "cycles": cycles,
+        "instances": {
+            instance: {
+                "bits": scope["bits"],
+                "toggles": scope["toggles"],
+                "activity": round(scope["toggles"] / (scope["bits"] * cycles), 5) if scope["bits"] and cycles else 0.0,
+                "signals": dict(sorted(scope["signals"].items(), key=lambda item: (-item[1], item[0]))),
+            }
+            for instance, scope in sorted(scopes.items())
+        },
+    }
+
+def format_report(workload, report, top=3):
+    lines = [f"{workload}: {report['cycles']} cycles"]
+    for instance, row in sorted(report["instances"].items(), key=lambda item: -item[1]["toggles"]):
+        per_cycle = row["toggles"] / report["cycles"] if report["cycles"] else 0.0
+        lines.append(f"  {instance:<32} bits {row['bits']:>6}  toggles {row['toggles']:>9}  per cycle {per_cycle:>8.1f}  activity {row['activity']:.4f}")
+        for signal, toggles in list(row["signals"].items())[:top]:
+            if toggles:
+                lines.append(f"    {signal:<30} toggles {toggles:>9}")
+    return "\n".join(lines)
+
+def savings(before, after) -> dict:
+    """Toggles of each instance in two reports of the same workload, and the share the second saves"""
+    rows = {}
+    for instance in sorted(set(before["instances"]) | set(after["instances"])):
+        old = before["instances"].get(instance, {}).get("toggles", 0)
+        new = after["instances"].get(instance, {}).get("toggles", 0)
+        rows[instance] = {"before": old, "after": new, "saved": round(1 - new / old, 4) if old else 0.0}
+    old = sum(row["before"] for row in rows.values())
+    new = sum(row["after"] for row in rows.values())
+    return {"total": {"before": old, "after": new, "saved": round(1 - new / old, 4) if old else 0.0}, "instances": rows}
+
+def format_savings(workload, dut, against, saved):
+    total = saved["total"]
+    lines = [f"{workload}: {dut} -> {against}: {total['before']} -> {total['after']} toggles, {100 * total['saved']:.1f}% saved"]
+    for instance, row in sorted(saved["instances"].items(), key=lambda item: -item[1]["before"]):
+        lines.append(f"  {instance:<32} {row['before']:>9} -> {row['after']:>9}  saved {100 * row['saved']:>6.1f}%")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-instance toggle activity of workloads run in simulation")
+    parser.add_argument("dut", choices=list(duts))
+    parser.add_argument("test_module", nargs="?", help="workloads, one per test (defaults to the dut's test module)")
+    parser.add_argument("--testcase", action="append", help="only run these workloads")
+    parser.add_argument("--start", type=int, help="first cycle to count")
+    parser.add_argument("--stop", type=int, help="cycle to stop counting at")
+    parser.add_argument("--top", type=int, default=3, help="busiest signals to list per instance")
+    parser.add_argument("--against", choices=list(duts), help="also run the workloads on this dut and report the toggles it saves")
+    parser.add_argument("--output", type=Path, help="write the reports as json (default sim_build/activity_<dut>.json)")
+    args = parser.parse_args()
+
+    test_module = args.test_module or duts[args.dut][1]
+    reports = {}
+    against = {}
+    for workload in args.testcase or cocotb_tests(test_module):
+        reports[workload] = measure(args.dut, test_module, workload, args.start, args.stop)
+        print(format_report(workload, reports[workload], args.top))
+        if args.against:
+            against[workload] = measure(args.against, test_module, workload, args.start, args.stop)
+            print(format_savings(workload, args.dut, args.against, savings(reports[workload], against[workload])))
+
+    result = {"dut": args.dut, "test_module": test_module, "workloads": reports}
+    if args.against:
+        result["against"] = {
+            "dut": args.against,
+            "workloads": against,
+            "savings": {workload: savings(reports[workload], against[workload]) for workload in against},
+        }
+    output = args.output or Path(f"sim_build/activity_{args.dut}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"activity: {output}")
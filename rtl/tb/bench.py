@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from cocotb.runner import get_runner
+
+from test_runner import sim, duts, hdl_toplevel, parameters
+from xu.sky_bench import RESULTS_ENV
+
+# append-only history of every bench run, one json record per line
+history_path = Path(os.getenv("SKY_BENCH_HISTORY", "bench_results.jsonl"))
+
+# data memory latency points the "latency" bench builds sky_xu at; latency 0
+# is the same core either way
+LATENCY_SWEEP = [{"MEM_LATENCY": 0}] + [
+    {"MEM_LATENCY": latency, "NONBLOCKING": nonblocking} for latency in (1, 2, 4, 8) for nonblocking in (0, 1)
+]
+
+# prefetcher modes the "prefetch" bench builds sky_xu with, at a fixed latency
+PREFETCH_SWEEP = [
+    {"MEM_LATENCY": 4, "NONBLOCKING": nonblocking, "PREFETCH": prefetch} for nonblocking in (0, 1) for prefetch in (0, 1, 2)
+]
+
+# cluster sizes the "cluster" bench builds sky_cluster with
+CLUSTER_SWEEP = [{"NUM_XU": count} for count in (1, 2, 4, 8)]
+
+# front ends the "fetch" bench builds a dual issue sky_xu with, against a
+# non-blocking data memory: fetch coupled to decode, then fetch queues
+FETCH_SWEEP = [{"ISSUE_WIDTH": 2, "MEM_LATENCY": 4, "FETCH_QUEUE_DEPTH": 0}] + [
+    {"ISSUE_WIDTH": 2, "MEM_LATENCY": 4, "FETCH_QUEUE_DEPTH": depth, "FETCH_WIDTH": width} for depth in (4, 8) for width in (2, 4)
+]
+
+# bench name -> (dut, bench module[, parameter overrides to sweep, one build each])
+BENCHES = {
+    "alu": ("sky_alu", "xu.sky_alu_bench"),
+    "register_file": ("sky_register_file", "xu.sky_register_file_bench"),
+    "xu": ("sky_xu", "xu.sky_xu_bench"),
+    "issue": ("sky_xu", "xu.sky_issue_bench"),
+    "issue_dual": ("sky_xu_dual", "xu.sky_issue_bench"),
+    "dma": ("sky_xu", "xu.sky_dma_bench"),
+    "runtime": ("sky_xu", "xu.sky_runtime_bench"),
+    "subword": ("sky_xu", "xu.sky_subword_bench"),
+    "loop": ("sky_xu", "xu.sky_loop_bench"),
+    "latency": ("sky_xu", "xu.sky_latency_bench", LATENCY_SWEEP),
+    "prefetch": ("sky_xu", "xu.sky_prefetch_bench", PREFETCH_SWEEP),
+    "cluster": ("sky_cluster", "xu.sky_cluster_bench", CLUSTER_SWEEP),
+    "fetch": ("sky_xu", "xu.sky_fetch_bench", FETCH_SWEEP),
+}
+
+# +1 if a larger value is better, -1 if a smaller value is better
+METRICS = {
+    "wall_time_s": -1,
+    "sim_cycles_per_s": +1,
+    "core_cycles": -1,
+    "ipc": +1,
+    "useful_ipc": +1,
+    "launches_per_kcycle": +1,
+    "mean_latency": -1,
+    "stalls": -1,
+    "stalls_hidden": +1,
+    "elements_per_kcycle": +1,
+    "conflicts": -1,
+    "slot_utilization": +1,
+    "cells": -1,
+    "logic_depth": -1,
+    "fmax_mhz": +1,
+}
+
+def git_revision(rev="HEAD"):
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short=12", rev], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return rev
+
+def git_dirty():
+    try:
+        return bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], text=True).strip())
+    except (OSError, subprocess.CalledProcessError):
+        return False
+
+def run_bench(name):
+    """Build and run one bench module, once per point of its sweep, returning the records it reported"""
+    dut, module, *sweep = BENCHES[name]
+    sources, _ = duts[dut]
+    toplevel = hdl_toplevel(dut)
+
+    records = []
+    for overrides in (sweep[0] if sweep else [{}]):
+        build_dir = f"sim_build/bench_{name}" + "".join(f"_{key.lower()}{value}" for key, value in overrides.items())
+        runner = get_runner(sim)
+        runner.build(sources=sources, hdl_toplevel=toplevel, parameters={**parameters(dut), **overrides}, build_dir=build_dir, timescale=("1ns", "1ns"))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            results = Path(tmp) / "results.jsonl"
+            start = time.perf_counter()
+            runner.test(hdl_toplevel=toplevel, test_module=module, build_dir=build_dir, extra_env={RESULTS_ENV: str(results)})
+            process_time = time.perf_counter() - start
+            point = [json.loads(line) for line in results.read_text().splitlines()] if results.exists() else []
+
+        for record in point:
+            record["process_time_s"] = round(process_time, 3)
+        records += point
+    return records
+
+def run(names):
+    commit = git_revision()
+    dirty = git_dirty()
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    for name in names:
+        for record in run_bench(name):
+            record = {"commit": commit, "dirty": dirty, "timestamp": timestamp, "sim": sim, **record}
+            with open(history_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+            print(format_record(record))
+
+def format_record(record):
+    fields = [f"{record['bench']:<28}", f"wall {record['wall_time_s']:>9.3f}s", f"{record['sim_cycles_per_s']:>12.1f} cyc/s"]
+    if "core_cycles" in record:
+        fields.append(f"core {record['core_cycles']:>7} cyc  ipc {record['ipc']:.3f}")
+    return "  ".join(fields)
+
+def load_history(commit):
+    """Average every metric per bench over all runs recorded for `commit`"""
+    runs = {}
+    if history_path.exists():
+        for line in history_path.read_text().splitlines():
+            record = json.loads(line)
+            if record["commit"] == commit:
+                runs.setdefault(record["bench"], []).append(record)
+
+    averages = {}
+    for bench, records in runs.items():
+        averages[bench] = {
+            metric: sum(r[metric] for r in records) / len(records)
+            for metric in METRICS
+            if all(metric in r for r in records)
+        }
+    return averages
+
+def compare(base_rev, new_rev, threshold):
+    """Print per-metric changes between two commits and return the number of regressions"""
+    base_commit, new_commit = git_revision(base_rev), git_revision(new_rev)
+    base, new = load_history(base_commit), load_history(new_commit)
+    if not base or not new:
+        missing = base_commit if not base else new_commit
+        print(f"no bench results recorded for {missing} in {history_path}")
+        return 1
+
+    regressions = 0
+    for bench in sorted(base.keys() & new.keys()):
+        for metric, direction in METRICS.items():
+            if metric not in base[bench] or metric not in new[bench] or base[bench][metric] == 0:
+                continue
+            old, cur = base[bench][metric], new[bench][metric]
+            change = 100.0 * (cur - old) / old
+            regressed = direction * change < -threshold
+            regressions += regressed
+            flag = "REGRESSION" if regressed else ""
+            print(f"{bench:<28} {metric:<18} {old:>14.4f} -> {cur:>14.4f} {change:+8.2f}% {flag}")
+
+    print(f"{regressions} regression(s) beyond {threshold}% between {base_commit} and {new_commit}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Skylark simulation and core performance benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benches and append results to the history file")
+    run_parser.add_argument("benches", nargs="*", help=f"benches to run: {', '.join(BENCHES)} (default all)")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two commits")
+    compare_parser.add_argument("base", help="baseline commit")
+    compare_parser.add_argument("new", nargs="?", default="HEAD", help="commit to check (default HEAD)")
+    compare_parser.add_argument("--threshold", type=float, default=5.0, help="allowed change in percent")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        unknown = set(args.benches) - set(BENCHES)
+        if unknown:
+            parser.error(f"unknown bench(es): {', '.join(sorted(unknown))}")
+        run(args.benches or list(BENCHES))
+    else:
+        sys.exit(1 if compare(args.base, args.new, args.threshold) else 0)
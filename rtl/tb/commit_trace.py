@@ -0,0 +1,90 @@
+import argparse
+import sys
+
+from xu.sky_commit_trace import ARCH_FIELDS, FLAG_REG_WRITE, FLAG_MEM_READ, FLAG_MEM_WRITE, read_trace, diff_traces, summarize
+
+# Tools for the binary commit traces the full-core testbench writes when
+# SKY_COMMIT_TRACE_DIR is set, e.g.
+#   SKY_COMMIT_TRACE_DIR=traces python tb/test_runner.py
+#   python tb/commit_trace.py summary traces/test_xu_ipc.ctrace
+
+def format_record(record):
+    flags = int(record["flags"])
+    text = f"{int(record['cycle']):>10}  {int(record['pc']):08x}  {int(record['instr']):08x}"
+    if flags & FLAG_REG_WRITE:
+        text += f"  r{int(record['rd'])} <- {int(record['wdata']):08x}"
+    if flags & FLAG_MEM_READ:
+        text += f"  load  [{int(record['mem_addr']):08x}] = {int(record['mem_data']):08x}"
+    if flags & FLAG_MEM_WRITE:
+        text += f"  store [{int(record['mem_addr']):08x}] = {int(record['mem_data']):08x}"
+    return text
+
+def show(path, head):
+    trace = read_trace(path)
+    for record in trace[:head]:
+        print(format_record(record))
+    if len(trace) > head:
+        print(f"... {len(trace) - head} more")
+
+def diff(path_a, path_b, cycles, limit):
+    fields = ARCH_FIELDS + (("cycle",) if cycles else ())
+    result = diff_traces(read_trace(path_a), read_trace(path_b), fields, limit)
+
+    len_a, len_b = result["length"]
+    print(f"{path_a}: {len_a} instructions, {path_b}: {len_b} instructions")
+    if result["first"] is None:
+        print("traces match")
+        return 0
+
+    print(f"{result['mismatches']} mismatching record(s), first divergence at index {result['first']}")
+    for field, count in result["per_field"].items():
+        if count:
+            print(f"  {field:<9} {count}")
+    for index, a, b in result["rows"]:
+        print(f"[{index}]")
+        print(f"  a: {format_record(a)}")
+        print(f"  b: {format_record(b)}")
+    return 1
+
+def summary(path, window):
+    result = summarize(read_trace(path), window)
+    print(f"instructions {result['instructions']}  cycles {result['cycles']}  ipc {result['ipc']:.3f}")
+    if not result["instructions"]:
+        return
+
+    print(f"stall cycles {result['stall_cycles']}")
+    print("stall gap histogram (cycles between commits -> count):")
+    for gap, count in result["stall_histogram"].items():
+        print(f"  {gap:>4}  {count}")
+    print(f"ipc histogram over {window} cycle windows:")
+    for low, count in result["ipc_histogram"]:
+        print(f"  >= {low:.2f}  {count}")
+    print("opcode mix:")
+    for opcode, count in result["opcode_counts"].items():
+        print(f"  {opcode:04b}  {count}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect, diff and summarize skylark commit traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    show_parser = commands.add_parser("show", help="print records")
+    show_parser.add_argument("trace")
+    show_parser.add_argument("--head", type=int, default=50)
+
+    diff_parser = commands.add_parser("diff", help="compare two traces record by record")
+    diff_parser.add_argument("a")
+    diff_parser.add_argument("b")
+    diff_parser.add_argument("--cycles", action="store_true", help="also compare commit cycles")
+    diff_parser.add_argument("--limit", type=int, default=10, help="mismatching records to print")
+
+    summary_parser = commands.add_parser("summary", help="IPC and stall histograms")
+    summary_parser.add_argument("trace")
+    summary_parser.add_argument("--window", type=int, default=1000, help="cycles per IPC window")
+
+    args = parser.parse_args()
+    if args.command == "show":
+        show(args.trace, args.head)
+    elif args.command == "diff":
+        sys.exit(diff(args.a, args.b, args.cycles, args.limit))
+    else:
+        summary(args.trace, args.window)
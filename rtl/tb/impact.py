@@ -0,0 +1,116 @@
+import ast
+import re
+import subprocess
+from pathlib import Path
+
+from test_runner import duts, hdl_toplevel
+
+# Test-impact selection: maps changed files to the DUTs whose tests could see
+# the change. A DUT depends on the RTL files defining every module reachable
+# from its toplevel through instantiations, and on its test module plus every
+# testbench module that imports, directly or not.
+
+tb_path = Path(__file__).resolve().parent
+
+# tests run alongside any selection with --smoke: toplevel -> testcases
+smoke_tests = {
+    "sky_xu": ["test_xu_alu_program", "test_xu_load_store"],
+}
+
+# changes to these re-run everything
+global_files = {tb_path / "test_runner.py", tb_path / "impact.py"}
+
+_MODULE = re.compile(r"^\s*module\s+(\w+)", re.MULTILINE)
+
+def _strip_comments(text):
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.DOTALL)
+    return re.sub(r"//[^\n]*", "", text)
+
+def module_index(sources) -> dict:
+    """Module name -> (defining file, source text of that file)"""
+    index = {}
+    for source in sources:
+        path = Path(source).resolve()
+        text = _strip_comments(path.read_text())
+        for name in _MODULE.findall(text):
+            index[name] = (path, text)
+    return index
+
+def _instantiated(text, names) -> set:
+    """Names of known modules instantiated anywhere in `text`"""
+    if not names:
+        return set()
+    pattern = re.compile(r"\b(" + "|".join(map(re.escape, names)) + r")\s+(?:#\s*\([^;]*?\)\s*)?\w+\s*\(")
+    return set(pattern.findall(text))
+
+def rtl_dependencies(toplevel, sources) -> set:
+    """RTL files defining `toplevel` and every module it instantiates"""
+    index = module_index(sources)
+    if toplevel not in index:
+        return {Path(source).resolve() for source in sources}
+
+    files = set()
+    pending = [toplevel]
+    seen = set()
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        path, text = index[name]
+        files.add(path)
+        # a file can define several modules; only follow this one's body
+        body = text[re.search(rf"\bmodule\s+{name}\b", text).start():]
+        end = body.find("endmodule")
+        pending.extend(_instantiated(body[:end] if end >= 0 else body, [n for n in index if n != name]))
+    return files
+
+def _module_file(module_name):
+    path = tb_path.joinpath(*module_name.split(".")).with_suffix(".py")
+    return path if path.exists() else None
+
+def python_dependencies(test_module) -> set:
+    """Testbench files `test_module` imports, including itself and imports inside functions"""
+    files = set()
+    pending = [test_module]
+    while pending:
+        path = _module_file(pending.pop())
+        if path is None or path in files:
+            continue
+        files.add(path)
+        for node in ast.walk(ast.parse(path.read_text())):
+            if isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                pending.append(node.module)
+            elif isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names)
+    return files
+
+def dependency_graph() -> dict:
+    """Dut name -> set of files its tests depend on"""
+    return {
+        name: rtl_dependencies(hdl_toplevel(name), sources) | python_dependencies(test_module)
+        for name, (sources, test_module) in duts.items()
+    }
+
+def changed_files(rev="HEAD") -> list:
+    """Files changed between `rev` and the working tree, plus untracked files"""
+    root = Path(subprocess.check_output(["git", "rev-parse", "--show-toplevel"], text=True).strip())
+    diff = subprocess.check_output(["git", "diff", "--name-only", rev], text=True, cwd=root).split()
+    untracked = subprocess.check_output(["git", "ls-files", "--others", "--exclude-standard"], text=True, cwd=root).split()
+    return [root / name for name in diff + untracked]
+
+def affected(changed, graph=None) -> list:
+    """Toplevels whose tests depend on any of the changed files"""
+    graph = graph or dependency_graph()
+    changed = {Path(path).resolve() for path in changed}
+    if changed & global_files:
+        return list(graph)
+    return [toplevel for toplevel, files in graph.items() if files & changed]
+
+def select(changed, smoke=False) -> dict:
+    """Toplevel -> testcases to run (None for the whole test module)"""
+    selection = {toplevel: None for toplevel in affected(changed)}
+    if smoke:
+        for toplevel, tests in smoke_tests.items():
+            selection.setdefault(toplevel, list(tests))
+    return selection
@@ -0,0 +1,51 @@
+import argparse
+import json
+import tempfile
+from pathlib import Path
+from cocotb.runner import get_runner
+
+from test_runner import sim, duts
+from xu.sky_sampling import PROGRAM_ENV, CONFIG_ENV, RESULTS_ENV
+
+# Sampled simulation of a long program on sky_xu, e.g.
+#   python tb/sample.py kernel.s --samples 20 --window 200 --warmup 50
+
+def sample(program, samples, window, warmup, seed):
+    sources, _ = duts["sky_xu"]
+    build_dir = "sim_build/sample_sky_xu"
+    config = {"samples": samples, "window": window, "warmup": warmup, "seed": seed}
+
+    runner = get_runner(sim)
+    runner.build(sources=sources, hdl_toplevel="sky_xu", build_dir=build_dir, timescale=("1ns", "1ns"))
+    with tempfile.TemporaryDirectory() as tmp:
+        results = Path(tmp) / "sample.json"
+        runner.test(
+            hdl_toplevel="sky_xu",
+            test_module="xu.sky_sampling",
+            testcase="sample_program",
+            build_dir=build_dir,
+            extra_env={
+                PROGRAM_ENV: str(Path(program).resolve()),
+                CONFIG_ENV: json.dumps(config),
+                RESULTS_ENV: str(results),
+            },
+        )
+        return json.loads(results.read_text())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate cycles and IPC of a sky_xu program from sampled RTL windows")
+    parser.add_argument("program", help="assembly (.s) or hex (.hex) program")
+    parser.add_argument("--samples", type=int, default=10, help="detailed windows")
+    parser.add_argument("--window", type=int, default=100, help="measured instructions per window")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured instructions before each window")
+    parser.add_argument("--seed", type=int, default=None, help="randomize the sample grid offset")
+    args = parser.parse_args()
+    if args.window < 1:
+        parser.error("--window must be at least 1")
+
+    result = sample(args.program, args.samples, args.window, args.warmup, args.seed)
+    low, high = result["cycles_ci"]
+    ipc_low, ipc_high = result["ipc_ci"]
+    print(f"instructions {result['instructions']}  detailed {result['detailed']}  wall {result['wall_time_s']:.2f}s")
+    print(f"cycles {result['cycles']:.0f}  95% ci [{low:.0f}, {high:.0f}]")
+    print(f"ipc    {result['ipc']:.3f}  95% ci [{ipc_low:.3f}, {ipc_high:.3f}]")
@@ -0,0 +1,33 @@
+import argparse
+
+from xu.sky_isa import read_program, disassemble
+from xu.sky_scheduler import FORWARD_DISTANCE, ISSUE_WIDTHS, schedule, pad
+
+# Schedule straight-line XU assembly for the current forwarding distance, e.g.
+#   python tb/schedule.py kernel.s -o kernel.sched.s
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reorder XU assembly to hide result latency and report predicted cycles")
+    parser.add_argument("program", help="assembly (.s) or hex (.hex) program")
+    parser.add_argument("-o", "--output", help="write the scheduled assembly here instead of stdout")
+    parser.add_argument("--distance", type=int, default=FORWARD_DISTANCE, help="cycles before a result can be read")
+    parser.add_argument("--issue-width", type=int, choices=ISSUE_WIDTHS, default=1, help="schedule for sky_xu built with this ISSUE_WIDTH")
+    args = parser.parse_args()
+
+    program = read_program(args.program)
+    try:
+        baseline = pad(program, args.distance)
+        result = schedule(program, args.distance, args.issue_width)
+    except ValueError as e:
+        parser.error(str(e))
+
+    text = "\n".join(disassemble(word) for word in result.program) + "\n"
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text, end="")
+
+    instructions = len(result.program) - result.nops
+    print(f"# {instructions} instructions, {result.nops} nops, predicted {result.cycles} cycles "
+          f"at issue width {args.issue_width} (single-issue in-order padding: {baseline.nops} nops, {baseline.cycles} cycles)")
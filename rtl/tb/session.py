@@ -0,0 +1,124 @@
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from cocotb.runner import get_runner
+
+from test_runner import sim, duts, hdl_toplevel, parameters
+from session_server import SOCKET_ENV
+
+# Persistent simulation sessions. `start` builds a toplevel once and leaves a
+# simulator running session_server; `run` queues test modules or programs
+# against it (with a reset before each) so only the first job pays for
+# simulator startup, elaboration and importing cocotb.
+
+def build_dir(toplevel):
+    return Path(f"sim_build/session_{toplevel}").resolve()
+
+def socket_path(toplevel):
+    return build_dir(toplevel) / "session.sock"
+
+def serve(toplevel):
+    """Build the toplevel and run the session server in this process until stopped"""
+    sources, _ = duts[toplevel]
+    runner = get_runner(sim)
+    runner.build(
+        sources=sources,
+        hdl_toplevel=hdl_toplevel(toplevel),
+        parameters=parameters(toplevel),
+        build_dir=build_dir(toplevel),
+        timescale=("1ns", "1ns"),
+    )
+    runner.test(
+        hdl_toplevel=hdl_toplevel(toplevel),
+        test_module="session_server",
+        build_dir=build_dir(toplevel),
+        extra_env={SOCKET_ENV: str(socket_path(toplevel))},
+    )
+
+def request(toplevel, message):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(str(socket_path(toplevel)))
+        s.sendall((json.dumps(message) + "\n").encode())
+        with s.makefile("r") as f:
+            line = f.readline()
+    if not line:
+        raise RuntimeError(f"{toplevel} session exited while running the job (see its log)")
+    return json.loads(line)
+
+def is_running(toplevel):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(str(socket_path(toplevel)))
+        return True
+    except OSError:
+        return False
+
+def start(toplevel, timeout=120.0):
+    """Start a background session for the toplevel, returning once it accepts jobs"""
+    if socket_path(toplevel).exists():
+        socket_path(toplevel).unlink()
+    build_dir(toplevel).mkdir(parents=True, exist_ok=True)
+    log = open(build_dir(toplevel) / "session.log", "w")
+    subprocess.Popen([sys.executable, __file__, "serve", toplevel], stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+
+    deadline = time.monotonic() + timeout
+    while not is_running(toplevel):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{toplevel} session did not start, see {log.name}")
+        time.sleep(0.05)
+
+def stop(toplevel):
+    request(toplevel, {"command": "stop"})
+
+def run(toplevel, modules, programs, testcases=None):
+    """Queue jobs on a running session and print their results, returning the number of failures"""
+    jobs = [{"module": module, "testcase": testcases} for module in modules]
+    jobs += [{"program": str(Path(program).resolve())} for program in programs]
+
+    start_time = time.perf_counter()
+    reply = request(toplevel, {"jobs": jobs})
+    elapsed = time.perf_counter() - start_time
+    if "error" in reply:
+        print(f"ERROR: {reply['error']}")
+        return 1
+
+    failures = 0
+    for result in reply["results"]:
+        status = "PASS" if result["pass"] else "SKIP" if result["pass"] is None else "FAIL"
+        failures += result["pass"] is False
+        line = f"{status}  {result['test']:<60} {result['real'] * 1000:>9.1f} ms"
+        if result.get("stats"):
+            stats = result["stats"]
+            line += f"  {stats['cycles']} cycles, ipc {stats['ipc']:.3f}"
+        print(line)
+    print(f"{len(reply['results'])} test(s), {failures} failure(s) in {elapsed:.3f}s")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run tests against a persistent simulator session")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command in ("serve", "start", "stop"):
+        commands.add_parser(command).add_argument("toplevel", choices=list(duts))
+
+    run_parser = commands.add_parser("run", help="queue test modules and/or programs on a session")
+    run_parser.add_argument("toplevel", choices=list(duts))
+    run_parser.add_argument("modules", nargs="*", help="test modules, e.g. xu.sky_xu_tb (default: the toplevel's tests)")
+    run_parser.add_argument("--program", action="append", default=[], help="assembly (.s) or hex (.hex) program to run on sky_xu")
+    run_parser.add_argument("--testcase", action="append", help="only run these tests from the modules")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.toplevel)
+    elif args.command == "start":
+        start(args.toplevel)
+    elif args.command == "stop":
+        stop(args.toplevel)
+    else:
+        if not is_running(args.toplevel):
+            start(args.toplevel)
+        modules = args.modules or ([] if args.program else [duts[args.toplevel][1]])
+        sys.exit(1 if run(args.toplevel, modules, args.program, args.testcase) else 0)
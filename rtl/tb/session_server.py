@@ -0,0 +1,171 @@
+import importlib
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge
+
+try:
+    from cocotb.decorators import test as Test
+except ImportError:
+    Test = None
+
+# cocotb test module that keeps one elaborated design alive and runs jobs
+# sent by session.py over a unix socket. Jobs are turned into cocotb tests and
+# appended to the running regression, so each one still gets cocotb's usual
+# per-test task cleanup and result reporting. cocotb has no public way to add
+# tests to a running regression, so that goes through RegressionManager
+# internals that only cocotb 1.x has; everything touching them is in
+# _unsupported and _schedule.
+
+SOCKET_ENV = "SKY_SESSION_SOCKET"
+INTERNAL_TESTS = ("session_reset", "session_serve")
+
+# RegressionManager attributes jobs are scheduled and reported through
+REGRESSION_INTERNALS = ("_queue", "ntests", "test_results")
+
+_listener = None
+_connection = None
+_results_start = 0
+_program_stats = {}
+
+def _listen():
+    global _listener
+    path = os.environ[SOCKET_ENV]
+    if os.path.exists(path):
+        os.unlink(path)
+    _listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    _listener.bind(path)
+    _listener.listen(1)
+
+def _receive():
+    """Block until a client sends the next request"""
+    global _connection
+    while True:
+        connection, _ = _listener.accept()
+        with connection.makefile("r") as f:
+            line = f.readline()
+        # clients probing whether the session is up connect without sending anything
+        if line:
+            _connection = connection
+            return json.loads(line)
+        connection.close()
+
+def _reply(message):
+    global _connection
+    _connection.sendall((json.dumps(message) + "\n").encode())
+    _connection.close()
+    _connection = None
+
+def _unsupported(manager):
+    """Why jobs can't be scheduled on this cocotb, or None if they can"""
+    missing = [name for name in REGRESSION_INTERNALS if not hasattr(manager, name)]
+    if Test is None or missing or not cocotb.__version__.startswith("1."):
+        return (f"sessions need cocotb 1.x regression manager internals, found cocotb {cocotb.__version__}"
+                f"{' without ' + ', '.join(missing) if missing else ''}; run tests with tb/test_runner.py instead")
+    return None
+
+def _schedule(manager, tests):
+    """Append tests to the running regression"""
+    manager._queue.extend(tests)
+    manager.ntests += len(tests)
+
+def _make_test(func, name):
+    func.__name__ = func.__qualname__ = name
+    return Test(func)
+
+async def _reset(dut):
+    """Reset the design between jobs"""
+    if not (hasattr(dut, "clk") and hasattr(dut, "reset")):
+        return
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    dut.reset.value = 1
+    await RisingEdge(dut.clk)
+    await RisingEdge(dut.clk)
+    dut.reset.value = 0
+
+def _module_tests(module_name, testcases=None):
+    """Import (or re-import, picking up edits) a test module and collect its tests"""
+    if module_name in sys.modules:
+        module = importlib.reload(sys.modules[module_name])
+    else:
+        module = importlib.import_module(module_name)
+
+    tests = [thing for thing in vars(module).values() if isinstance(thing, Test)]
+    if testcases:
+        tests = [test for test in tests if test.name in testcases]
+        missing = set(testcases) - {test.name for test in tests}
+        if missing:
+            raise AttributeError(f"test(s) {sorted(missing)} not found in {module_name}")
+    for test in tests:
+        test.skip = False
+    return tests
+
+def _program_test(path):
+    """Wrap an assembly (.s) or hex (.hex) program as a test that runs it on sky_xu"""
+    from xu.sky_isa import read_program
+    from xu.sky_xu_harness import start_clock, run_program, read_registers
+
+    program = read_program(path)
+    name = f"program_{Path(path).stem}"
+
+    async def run(dut):
+        start_clock(dut)
+        stats = await run_program(dut, program)
+        _program_stats[name] = {
+            "cycles": stats.cycles,
+            "retired": stats.retired,
+            "ipc": stats.ipc,
+            "registers": read_registers(dut),
+        }
+
+    return _make_test(run, name)
+
+def _queue_jobs(jobs):
+    tests = []
+    for job in jobs:
+        tests.append(_make_test(_reset, "session_reset"))
+        if "module" in job:
+            tests.extend(_module_tests(job["module"], job.get("testcase")))
+        else:
+            tests.append(_program_test(job["program"]))
+    return tests
+
+@cocotb.test
+async def session_serve(dut):
+    """Report the previous job's results and wait for the next one"""
+    global _results_start
+    manager = cocotb.regression_manager
+
+    if _listener is None:
+        _listen()
+    if _connection is not None:
+        results = []
+        for result in manager.test_results[_results_start:]:
+            name = result["test"].rsplit(".", 1)[-1]
+            if name not in INTERNAL_TESTS:
+                results.append({**result, "stats": _program_stats.pop(name, None)})
+        _reply({"results": results})
+
+    unsupported = _unsupported(manager)
+    while True:
+        request = _receive()
+        if request.get("command") == "stop":
+            _reply({"results": []})
+            return
+        if unsupported:
+            _reply({"error": unsupported})
+            continue
+        try:
+            tests = _queue_jobs(request["jobs"])
+            break
+        except Exception as e:
+            _reply({"error": f"{type(e).__name__}: {e}"})
+
+    # results recorded after this test's own entry belong to the new job
+    _results_start = len(manager.test_results) + 1
+    _schedule(manager, tests + [session_serve])
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from test_runner import duts, hdl_toplevel, parameters
+from bench import history_path, git_revision, git_dirty
+from impact import module_index
+
+# Synthesis report: every DUT in the test manifest goes through yosys with its
+# manifest parameters, is mapped to generic two-input gates, and reports its
+# cell count, register bits and longest combinational path. Timing uses an
+# abstract delay model, every gate the same delay plus a fixed register
+# overhead, so the Fmax figures are for comparing revisions of this design,
+# not for sign-off. Results are appended to the bench history, where
+# `bench.py compare` flags area and timing regressions with the rest.
+
+yosys = os.getenv("YOSYS", "yosys")
+
+GATES = "AND,NAND,OR,NOR,XOR,XNOR,ANDNOT,ORNOT,MUX"
+GATE_DELAY_PS = 50
+REGISTER_OVERHEAD_PS = 150   # clock to q plus setup
+
+# modules standing for storage outside the design, kept as black boxes
+EXTERNAL = ["sky_data_memory"]
+
+# memories only a testbench writes (instruction memory) read as undefined and
+# would be folded away with everything behind them; they get fixed random
+# contents instead and stay as one memory cell
+ROM_SEED = 0
+
+FRONT = """\
+read_verilog -sv {sources}
+{blackboxes}
+{parameters}
+hierarchy -top {top}
+proc
+flatten
+memory_collect
+"""
+
+def _script(dut, roms=None) -> str:
+    sources, _ = duts[dut]
+    top = hdl_toplevel(dut)
+    external = [name for name in EXTERNAL if name in module_index(sources)]
+    script = FRONT.format(
+        sources=" ".join(str(Path(source).resolve()) for source in sources),
+        blackboxes="\n".join(f"blackbox {name}" for name in external),
+        parameters="\n".join(f"chparam -set {key} {value} {top}" for key, value in parameters(dut).items()),
+        top=top,
+    )
+    if roms is None:
+        return script + "tee -q -o roms.txt dump t:$mem_v2 r:WR_PORTS=0\n"
+
+    rng = random.Random(ROM_SEED)
+    for name, bits in roms.items():
+        contents = "".join(rng.choice("01") for _ in range(bits))
+        script += f"setparam -set INIT {bits}'b{contents} {top}/{name}\n"
+    script += "".join(f"setattr -set keep 1 t:{name}\n" for name in external)
+    return script + f"""\
+synth -top {top} -run coarse:fine
+opt -fast -full
+opt -full
+techmap
+opt -fast
+abc -g {GATES}
+opt -fast
+opt_clean
+tee -q -o stat.json stat -json
+tee -q -o ltp.txt ltp -noff
+"""
+
+def _run_yosys(script, workdir):
+    path = Path(workdir) / "synth.ys"
+    path.write_text(script)
+    subprocess.run([yosys, "-q", "-s", path.name], cwd=workdir, check=True, stdout=subprocess.DEVNULL)
+
+def _roms(text) -> dict:
+    """Cell name -> size in bits of every memory cell in a yosys dump"""
+    roms = {}
+    for name, body in re.findall(r"cell \$mem_v2 (\S+)(.*?)\n\s*end", text, re.DOTALL):
+        size = int(re.search(r"parameter \\SIZE (\d+)", body).group(1))
+        width = int(re.search(r"parameter \\WIDTH (\d+)", body).group(1))
+        roms[name.lstrip("\\")] = size * width
+    return roms
+
+def _path_ends(text):
+    """(depth, start, last named net) of the longest path in an `ltp` report"""
+    depth = int(re.search(r"\(length=(\d+)\)", text).group(1))
+    nodes = [node.lstrip("\\") for node in re.findall(r"^\s*\d+: (\S+(?: \[\d+\])?)", text, re.MULTILINE)]
+    named = [node for node in nodes[1:] if not node.startswith("$")] or nodes
+    return depth, nodes[0], named[-1]
+
+def synthesize(dut) -> dict:
+    """Synthesize one manifest DUT and return its report"""
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as workdir:
+        _run_yosys(_script(dut), workdir)
+        roms_file = Path(workdir) / "roms.txt"
+        roms = _roms(roms_file.read_text()) if roms_file.exists() else {}
+        _run_yosys(_script(dut, roms), workdir)
+        stat = json.loads((Path(workdir) / "stat.json").read_text())["design"]
+        depth, path_from, path_to = _path_ends((Path(workdir) / "ltp.txt").read_text())
+
+    cells = {kind: count for kind, count in stat["num_cells_by_type"].items() if kind != "$scopeinfo"}
+    period_ps = depth * GATE_DELAY_PS + REGISTER_OVERHEAD_PS
+    return {
+        "bench": f"synth_{dut}",
+        "toplevel": hdl_toplevel(dut),
+        "parameters": parameters(dut),
+        "wall_time_s": round(time.perf_counter() - start, 3),
+        "cells": sum(cells.values()),
+        "flops": sum(count for kind, count in cells.items() if "DFF" in kind or "DLATCH" in kind),
+        "memory_bits": sum(roms.values()),
+        "logic_depth": depth,
+        "fmax_mhz": round(1e6 / period_ps, 1),
+        "path_from": path_from,
+        "path_to": path_to,
+    }
+
+def format_report(report):
+    return (f"{report['bench']:<28} cells {report['cells']:>7}  flops {report['flops']:>6}  "
+            f"depth {report['logic_depth']:>4}  fmax {report['fmax_mhz']:>7.1f} MHz  "
+            f"{report['path_from']} -> {report['path_to']}")
+
+def run(names):
+    commit = git_revision()
+    dirty = git_dirty()
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    for name in names:
+        report = {"commit": commit, "dirty": dirty, "timestamp": timestamp, "tool": "yosys", **synthesize(name)}
+        with open(history_path, "a") as f:
+            f.write(json.dumps(report) + "\n")
+        print(format_report(report))
+
+def trend(names):
+    """Print the recorded synthesis results of each DUT, oldest first"""
+    if not history_path.exists():
+        print(f"no results recorded in {history_path}")
+        return
+    benches = {f"synth_{name}" for name in names}
+    for line in history_path.read_text().splitlines():
+        record = json.loads(line)
+        if record["bench"] in benches:
+            print(f"{record['commit']}{'+' if record['dirty'] else ' '} {record['timestamp']}  {format_report(record)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Skylark per-module area and timing from yosys")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="synthesize DUTs and append results to the bench history")
+    run_parser.add_argument("duts", nargs="*", help=f"manifest DUTs: {', '.join(duts)} (default all)")
+
+    trend_parser = commands.add_parser("trend", help="print recorded results per commit")
+    trend_parser.add_argument("duts", nargs="*", help="manifest DUTs (default all)")
+
+    args = parser.parse_args()
+    unknown = set(args.duts) - set(duts)
+    if unknown:
+        parser.error(f"unknown dut(s): {', '.join(sorted(unknown))}")
+    if args.command == "run":
+        run(args.duts or list(duts))
+    else:
+        trend(args.duts or list(duts))
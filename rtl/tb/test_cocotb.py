@@ -0,0 +1,63 @@
+import fcntl
+from pathlib import Path
+
+import pytest
+from cocotb.runner import get_runner
+
+from test_runner import sim, duts, cocotb_tests, hdl_toplevel, parameters
+
+# Every cocotb test as its own pytest item, run from this directory's parent:
+#   pytest tb/test_cocotb.py -k test_alu_shifts
+#   pytest tb/test_cocotb.py -n auto          (with pytest-xdist)
+# Each item runs in its own simulator process against one image per toplevel,
+# built by whichever worker gets there first and shared by the rest.
+
+build_root = Path("sim_build")
+# toplevel -> the runner that built it; test() relies on what build() set up,
+# such as the source language
+_runners = {}
+
+def build_dir(toplevel) -> Path:
+    return build_root / f"pytest_{toplevel}"
+
+def build(toplevel):
+    """The runner for a toplevel, building its image on first use in this worker"""
+    if toplevel in _runners:
+        return _runners[toplevel]
+
+    sources, _ = duts[toplevel]
+    directory = build_dir(toplevel)
+    directory.mkdir(parents=True, exist_ok=True)
+    runner = get_runner(sim)
+    # workers serialize on the lock; later ones find the image up to date
+    with open(directory / "build.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        runner.build(
+            sources=sources,
+            hdl_toplevel=hdl_toplevel(toplevel),
+            parameters=parameters(toplevel),
+            build_dir=directory,
+            timescale=("1ns", "1ns"),
+        )
+    _runners[toplevel] = runner
+    return runner
+
+cases = [
+    pytest.param(toplevel, testcase, id=f"{toplevel}::{testcase}")
+    for toplevel, (_, test_module) in duts.items()
+    for testcase in cocotb_tests(test_module)
+]
+
+@pytest.mark.parametrize("toplevel, testcase", cases)
+def test_cocotb(toplevel, testcase):
+    runner = build(toplevel)
+    _, test_module = duts[toplevel]
+    # a directory per test keeps results and any files a test writes apart
+    runner.test(
+        hdl_toplevel=hdl_toplevel(toplevel),
+        hdl_toplevel_lang="verilog",
+        test_module=test_module,
+        testcase=testcase,
+        build_dir=build_dir(toplevel),
+        test_dir=build_dir(toplevel) / testcase,
+    )
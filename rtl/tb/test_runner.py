@@ -1,3 +1,5 @@
+import argparse
+import ast
 import os
 from pathlib import Path
 from cocotb.runner import get_runner
@@ -5,45 +7,135 @@ from cocotb.runner import get_runner
 sim = os.getenv("SIM", "icarus")
 proj_path = Path("src/")
 
-def run_alu_tests():
-    sources = [proj_path / "xu/sky_alu.sv"]
+xu_sources = [
+    proj_path / "xu/sky_alu.sv",
+    proj_path / "xu/sky_register_file.sv",
+    proj_path / "xu/pipeline/sky_issue_pair.sv",
+    proj_path / "xu/pipeline/sky_scoreboard.sv",
+    proj_path / "xu/pipeline/sky_fetch_stage.sv",
+    proj_path / "xu/pipeline/sky_decode_stage.sv",
+    proj_path / "xu/pipeline/sky_execute_stage.sv",
+    proj_path / "xu/pipeline/sky_memory_stage.sv",
+    proj_path / "xu/pipeline/sky_writeback_stage.sv",
+    proj_path / "xu/sky_dma.sv",
+    proj_path / "xu/sky_prefetcher.sv",
+    proj_path / "xu/sky_xu.sv",
+]
+
+cluster_sources = xu_sources + [
+    proj_path / "xu/sky_scratchpad.sv",
+    proj_path / "xu/sky_cluster.sv",
+]
+
+# test manifest: dut name -> (sources, test module)
+duts = {
+    "sky_alu": ([proj_path / "xu/sky_alu.sv"], "xu.sky_alu_tb"),
+    "sky_register_file": ([proj_path / "xu/sky_register_file.sv"], "xu.sky_register_file_tb"),
+    "sky_fetch_stage": ([proj_path / "xu/pipeline/sky_issue_pair.sv", proj_path / "xu/pipeline/sky_fetch_stage.sv"], "xu.sky_xu_fetch_stage_tb"),
+    "sky_fetch_stage_queue": ([proj_path / "xu/pipeline/sky_issue_pair.sv", proj_path / "xu/pipeline/sky_fetch_stage.sv"], "xu.sky_xu_fetch_stage_tb"),
+    "sky_decode_stage": ([proj_path / "xu/pipeline/sky_decode_stage.sv"], "xu.sky_xu_decode_stage_tb"),
+    "sky_execute_stage": ([proj_path / "xu/pipeline/sky_execute_stage.sv"], "xu.sky_xu_execute_stage_tb"),
+    "sky_memory_stage": ([proj_path / "xu/pipeline/sky_memory_stage.sv"], "xu.sky_xu_memory_stage_tb"),
+    "sky_writeback_stage": ([proj_path / "xu/pipeline/sky_writeback_stage.sv"], "xu.sky_xu_writeback_stage_tb"),
+    "sky_xu": (xu_sources, "xu.sky_xu_tb"),
+    "sky_xu_dual": (xu_sources, "xu.sky_xu_dual_tb"),
+    "sky_xu_latency": (xu_sources, "xu.sky_xu_latency_tb"),
+    "sky_xu_latency_blocking": (xu_sources, "xu.sky_xu_latency_tb"),
+    "sky_xu_prefetch": (xu_sources, "xu.sky_xu_prefetch_tb"),
+    "sky_xu_gated": (xu_sources, "xu.sky_xu_tb"),
+    "sky_xu_fetch_queue": (xu_sources, "xu.sky_xu_dual_tb"),
+    "sky_cluster": (cluster_sources, "xu.sky_cluster_tb"),
+}
+
+# duts that build another toplevel with its parameters overridden:
+# dut name -> (hdl toplevel, parameters)
+variants = {
+    "sky_fetch_stage_queue": ("sky_fetch_stage", {"FETCH_QUEUE_DEPTH": 4, "FETCH_WIDTH": 4}),
+    "sky_xu_dual": ("sky_xu", {"ISSUE_WIDTH": 2}),
+    "sky_xu_latency": ("sky_xu", {"MEM_LATENCY": 4, "NONBLOCKING": 1}),
+    "sky_xu_latency_blocking": ("sky_xu", {"MEM_LATENCY": 4, "NONBLOCKING": 0}),
+    "sky_xu_prefetch": ("sky_xu", {"MEM_LATENCY": 4, "NONBLOCKING": 0, "PREFETCH": 2}),
+    "sky_xu_gated": ("sky_xu", {"GATE_IDLE": 1}),
+    "sky_xu_fetch_queue": ("sky_xu", {"ISSUE_WIDTH": 2, "FETCH_QUEUE_DEPTH": 4, "FETCH_WIDTH": 2}),
+}
+
+def hdl_toplevel(name) -> str:
+    return variants[name][0] if name in variants else name
+
+def parameters(name) -> dict:
+    return dict(variants[name][1]) if name in variants else {}
+
+def cocotb_tests(test_module) -> list:
+    """Names of the @cocotb.test coroutines in a test module, found without importing it"""
+    path = Path(__file__).parent.joinpath(*test_module.split(".")).with_suffix(".py")
+    names = []
+    for node in ast.parse(path.read_text()).body:
+        if isinstance(node, ast.AsyncFunctionDef):
+            for decorator in node.decorator_list:
+                target = decorator.func if isinstance(decorator, ast.Call) else decorator
+                if ast.unparse(target) == "cocotb.test":
+                    names.append(node.name)
+    return names
+
+def run_tests(name, testcase=None):
+    sources, test_module = duts[name]
     runner = get_runner(sim)
-    runner.build(sources=sources, hdl_toplevel="sky_alu", always=True, timescale=("1ns", "1ns"))
-    runner.test(hdl_toplevel="sky_alu", test_module="xu.sky_alu_tb")
+    runner.build(sources=sources, hdl_toplevel=hdl_toplevel(name), parameters=parameters(name), always=True, timescale=("1ns", "1ns"))
+    runner.test(hdl_toplevel=hdl_toplevel(name), test_module=test_module, testcase=testcase)
+
+def run_alu_tests():
+    run_tests("sky_alu")
 
 def run_register_file_tests():
-    sources = [proj_path / "xu/sky_register_file.sv"]
-    runner = get_runner(sim)
-    runner.build(sources=sources, hdl_toplevel="sky_register_file", always=True, timescale=("1ns", "1ns"))
-    runner.test(hdl_toplevel="sky_register_file", test_module="xu.sky_register_file_tb")
+    run_tests("sky_register_file")
 
 def run_xu_pipeline_tests():
-    sources = [proj_path / "xu/pipeline/sky_fetch_stage.sv"]
-    runner = get_runner(sim)
-    runner.build(sources=sources, hdl_toplevel="sky_fetch_stage", always=True, timescale=("1ns", "1ns"))
-    runner.test(hdl_toplevel="sky_fetch_stage", test_module="xu.sky_xu_fetch_stage_tb")
+    run_tests("sky_fetch_stage")
+    run_tests("sky_fetch_stage_queue")
+    run_tests("sky_decode_stage")
+    run_tests("sky_execute_stage")
+    run_tests("sky_memory_stage")
+    run_tests("sky_writeback_stage")
 
-    sources = [proj_path / "xu/pipeline/sky_decode_stage.sv"]
-    runner = get_runner(sim)
-    runner.build(sources=sources, hdl_toplevel="sky_decode_stage", always=True, timescale=("1ns", "1ns"))
-    runner.test(hdl_toplevel="sky_decode_stage", test_module="xu.sky_xu_decode_stage_tb")
+def run_xu_tests():
+    run_tests("sky_xu")
+    run_tests("sky_xu_dual")
+    run_tests("sky_xu_latency")
+    run_tests("sky_xu_latency_blocking")
+    run_tests("sky_xu_prefetch")
+    run_tests("sky_xu_gated")
+    run_tests("sky_xu_fetch_queue")
 
-    sources = [proj_path / "xu/pipeline/sky_execute_stage.sv"]
-    runner = get_runner(sim)
-    runner.build(sources=sources, hdl_toplevel="sky_execute_stage", always=True, timescale=("1ns", "1ns"))
-    runner.test(hdl_toplevel="sky_execute_stage", test_module="xu.sky_xu_execute_stage_tb")
+def run_cluster_tests():
+    run_tests("sky_cluster")
 
-    sources = [proj_path / "xu/pipeline/sky_memory_stage.sv"]
-    runner = get_runner(sim)
-    runner.build(sources=sources, hdl_toplevel="sky_memory_stage", always=True, timescale=("1ns", "1ns"))
-    runner.test(hdl_toplevel="sky_memory_stage", test_module="xu.sky_xu_memory_stage_tb")
-
-    sources = [proj_path / "xu/pipeline/sky_writeback_stage.sv"]
-    runner = get_runner(sim)
-    runner.build(sources=sources, hdl_toplevel="sky_writeback_stage", always=True, timescale=("1ns", "1ns"))
-    runner.test(hdl_toplevel="sky_writeback_stage", test_module="xu.sky_xu_writeback_stage_tb")
+def run_affected(changed, smoke=False, dry_run=False):
+    """Run only the DUTs whose sources or testbench modules are in `changed`"""
+    from impact import select
+    selection = select(changed, smoke)
+    for toplevel, testcases in selection.items():
+        print(f"{toplevel}: {', '.join(testcases) if testcases else 'all tests'}")
+    if not selection:
+        print("no tests affected")
+    if not dry_run:
+        for toplevel, testcases in selection.items():
+            run_tests(toplevel, testcases)
 
 if __name__ == "__main__":
-    run_alu_tests()
-    run_register_file_tests()
-    run_xu_pipeline_tests()
+    parser = argparse.ArgumentParser(description="Run the skylark testbenches")
+    parser.add_argument("--changed", nargs="+", metavar="FILE", help="only run tests affected by these files")
+    parser.add_argument("--diff", nargs="?", const="HEAD", metavar="REV", help="only run tests affected by changes since REV (default HEAD)")
+    parser.add_argument("--smoke", action="store_true", help="always include the smoke tests")
+    parser.add_argument("--dry-run", action="store_true", help="print the selection without running it")
+    args = parser.parse_args()
+
+    if args.changed or args.diff:
+        from impact import changed_files
+        changed = args.changed or changed_files(args.diff)
+        run_affected(changed, args.smoke, args.dry_run)
+    else:
+        run_alu_tests()
+        run_register_file_tests()
+        run_xu_pipeline_tests()
+        run_xu_tests()
+        run_cluster_tests()
@@ -0,0 +1,164 @@
+import argparse
+from pathlib import Path
+from cocotb.runner import get_runner
+
+from test_runner import sim, duts, hdl_toplevel, parameters
+from xu.sky_pipeline_ring import RING_ENV
+
+# Windowed, scoped waveform capture. Instead of cocotb's whole-design dump for
+# the entire run, a generated dump module only calls $dumpvars for the chosen
+# scopes, and only between a start and a stop cycle. The start is either a
+# fixed cycle or the first cycle a trigger condition holds; starting N cycles
+# before a trigger takes a second run, since the first one is needed to find
+# the trigger cycle (the simulation is deterministic for a fixed seed).
+
+DUMP_MODULE = "sky_trace_dump"
+TRIGGER_FILE = "sky_trace_trigger.txt"
+
+DUMP_TEMPLATE = """\
+module {module}();
+
+integer cycle = 0;
+integer start_cycle;  // -1 starts at the trigger, -2 never dumps
+integer stop_cycle;
+integer trigger_file;
+reg dumping = 1'b0;
+reg triggered = 1'b0;
+
+initial begin
+  if (!$value$plusargs("sky_trace_start=%d", start_cycle)) start_cycle = -1;
+  if (!$value$plusargs("sky_trace_stop=%d", stop_cycle)) stop_cycle = -1;
+  $dumpfile("{dumpfile}");
+end
+
+always @(posedge {top}.clk) begin
+  if (!triggered && ({trigger})) begin
+    triggered = 1'b1;
+    trigger_file = $fopen("{trigger_file}", "w");
+    $fdisplay(trigger_file, "%0d", cycle);
+    $fclose(trigger_file);
+    if (start_cycle == -1) start_cycle = cycle;
+    if (stop_cycle < 0 && {post} > 0) stop_cycle = cycle + {post};
+  end
+  if (!dumping && cycle == start_cycle) begin
+    dumping = 1'b1;
+{dumpvars}
+  end
+  if (dumping && cycle == stop_cycle) begin
+    $dumpoff;
+    $dumpflush;
+  end
+  cycle = cycle + 1;
+end
+
+endmodule
+"""
+
+def parse_trigger(toplevel, condition):
+    """Turn `decode.pc_out=0x40` into a verilog comparison on the toplevel's hierarchy"""
+    signal, sep, value = condition.partition("=")
+    if not sep:
+        raise ValueError(f"trigger must look like signal=value, got {condition!r}")
+    return f"{toplevel}.{signal.strip()} == {int(value, 0)}"
+
+def write_dump_module(path, toplevel, scopes, triggers, post, dumpfile):
+    dumpvars = "\n".join(f"    $dumpvars(0, {toplevel}{'.' + scope if scope else ''});" for scope in scopes or [""])
+    trigger = " && ".join(parse_trigger(toplevel, t) for t in triggers) if triggers else "1'b0"
+    path.write_text(DUMP_TEMPLATE.format(
+        module=DUMP_MODULE,
+        top=toplevel,
+        dumpfile=dumpfile,
+        trigger=trigger,
+        trigger_file=TRIGGER_FILE,
+        post=post,
+        dumpvars=dumpvars,
+    ))
+
+def capture(toplevel, test_module=None, testcase=None, scopes=(), triggers=(), pre=0, post=0,
+          start=None, stop=None, fmt="fst", ring=0, seed=1):
+    """Run a test module with windowed, scoped waveform capture and return the dump path"""
+    if sim != "icarus":
+        raise SystemExit(f"ERROR: trace capture is only implemented for icarus, not {sim}")
+
+    sources, default_module = duts[toplevel]
+    top = hdl_toplevel(toplevel)
+    build_dir = Path(f"sim_build/trace_{toplevel}").resolve()
+    build_dir.mkdir(parents=True, exist_ok=True)
+    dumpfile = build_dir / f"{toplevel}.{fmt}"
+    dump_module = build_dir / f"{DUMP_MODULE}.v"
+    trigger_file = build_dir / TRIGGER_FILE
+    write_dump_module(dump_module, top, scopes, triggers, post, dumpfile.as_posix())
+
+    runner = get_runner(sim)
+    runner.build(
+        sources=list(sources) + [dump_module],
+        hdl_toplevel=top,
+        parameters=parameters(toplevel),
+        build_args=["-s", DUMP_MODULE],
+        build_dir=build_dir,
+        always=True,
+        timescale=("1ns", "1ns"),
+    )
+
+    def run(plusargs):
+        if trigger_file.exists():
+            trigger_file.unlink()
+        runner.test(
+            hdl_toplevel=top,
+            test_module=test_module or default_module,
+            testcase=testcase,
+            build_dir=build_dir,
+            plusargs=(["-fst"] if fmt == "fst" else []) + plusargs,
+            extra_env={RING_ENV: str(ring)},
+            seed=seed,
+        )
+        return int(trigger_file.read_text()) if trigger_file.exists() else None
+
+    plusargs = []
+    if not triggers:
+        plusargs.append(f"+sky_trace_start={start or 0}")
+    elif start is not None:
+        plusargs.append(f"+sky_trace_start={start}")
+    if stop is not None:
+        plusargs.append(f"+sky_trace_stop={stop}")
+
+    if triggers and pre > 0:
+        # find the trigger without dumping anything, then rerun with a window around it
+        trigger_cycle = run(["+sky_trace_start=-2"])
+        if trigger_cycle is None:
+            print("trigger never fired, nothing dumped")
+            return None
+        window = [f"+sky_trace_start={max(0, trigger_cycle - pre)}"]
+        if post > 0:
+            window.append(f"+sky_trace_stop={trigger_cycle + post}")
+        print(f"trigger fired at cycle {trigger_cycle}, dumping cycles {max(0, trigger_cycle - pre)}..{trigger_cycle + post if post else 'end'}")
+        run(window)
+    else:
+        trigger_cycle = run(plusargs)
+        if triggers and trigger_cycle is None:
+            print("trigger never fired, nothing dumped")
+            return None
+
+    print(f"waveform: {dumpfile}")
+    return dumpfile
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capture a scoped, windowed waveform of a test run")
+    parser.add_argument("toplevel", choices=list(duts))
+    parser.add_argument("test_module", nargs="?", help="defaults to the toplevel's test module")
+    parser.add_argument("--testcase", action="append", help="only run these tests")
+    parser.add_argument("--scope", action="append", default=[], help="instance to dump, relative to the toplevel (e.g. decode); default everything")
+    parser.add_argument("--trigger", action="append", default=[], help="start dumping when signal=value holds, e.g. fetch.pc_out=0x40 or rf_write_addr=5; repeat to AND conditions")
+    parser.add_argument("--pre", type=int, default=0, help="cycles to include before the trigger (reruns the test)")
+    parser.add_argument("--post", type=int, default=0, help="cycles to dump after the trigger (default until the end)")
+    parser.add_argument("--start", type=int, help="first cycle to dump when there is no trigger")
+    parser.add_argument("--stop", type=int, help="cycle to stop dumping at")
+    parser.add_argument("--format", choices=["fst", "vcd"], default="fst")
+    parser.add_argument("--ring", type=int, default=0, help="keep the last N cycles of pipeline state and dump them if an assertion fails")
+    parser.add_argument("--seed", type=int, default=1, help="random seed, kept fixed so trigger reruns are identical")
+    args = parser.parse_args()
+
+    capture(
+        args.toplevel, args.test_module, args.testcase, args.scope, args.trigger,
+        args.pre, args.post, args.start, args.stop, args.format, args.ring, args.seed,
+    )
@@ -0,0 +1,31 @@
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge
+
+import random
+
+from xu.sky_bench import BenchTimer, record
+
+NUM_VECTORS = 10000
+
+@cocotb.test
+async def bench_alu_vector_throughput(dut):
+    """Stream one random operand vector per cycle through the ALU"""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    dut.reset.value = 1
+    await RisingEdge(dut.clk)
+    dut.reset.value = 0
+
+    rng = random.Random(0)
+    vectors = [(rng.getrandbits(32), rng.getrandbits(32), rng.randint(0, 10)) for _ in range(NUM_VECTORS)]
+
+    checksum = 0
+    timer = BenchTimer()
+    for a, b, op in vectors:
+        dut.operand_a.value = a
+        dut.operand_b.value = b
+        dut.operation.value = op
+        await RisingEdge(dut.clk)
+        checksum ^= int(dut.result.value)
+
+    record("alu_vector_throughput", timer, vectors=NUM_VECTORS, checksum=checksum)
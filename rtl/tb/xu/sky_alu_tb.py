@@ -18,6 +18,7 @@ OP_SRA  = 7
 OP_SLT  = 8
 OP_SLTU = 9
 OP_MUL  = 10
+OP_MAC  = 11
 
 async def reset_dut(dut):
     """Reset the DUT"""
@@ -192,6 +193,24 @@ async def test_alu_multiplication(dut):
     await RisingEdge(dut.clk)
     assert dut.result.value == expected, f"Multiplication failed: got {int(dut.result.value)} expected {expected}"
 
+@cocotb.test
+async def test_alu_mac(dut):
+    """Test ALU multiply-accumulate op"""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    await reset_dut(dut)
+
+    for a, b, c in [(0x1234, 0x5678, 0x9ABC), (0xFFFFFFFF, 3, 7), (0x80000000, 2, 0xFFFFFFFF)]:
+        expected = (a * b + c) & 0xFFFFFFFF
+
+        dut.operand_a.value = a
+        dut.operand_b.value = b
+        dut.operand_c.value = c
+        dut.operation.value = OP_MAC
+
+        await RisingEdge(dut.clk)
+        await RisingEdge(dut.clk)
+        assert dut.result.value == expected, f"MAC failed for 0x{a:08x} * 0x{b:08x} + 0x{c:08x}: got 0x{int(dut.result.value):08x} expected 0x{expected:08x}"
+
 @cocotb.test
 async def test_alu_overflow(dut):
     """Test ALU overflow detection"""
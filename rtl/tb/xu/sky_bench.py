@@ -0,0 +1,44 @@
+import json
+import os
+import time
+
+import cocotb
+from cocotb.utils import get_sim_time
+
+# set by bench.py; each record is appended as one json line
+RESULTS_ENV = "SKY_BENCH_RESULTS"
+CLOCK_PERIOD_NS = 10
+
+class BenchTimer:
+    """Measures wall time and simulated clock cycles for one workload"""
+
+    def __init__(self):
+        self.wall_start = time.perf_counter()
+        self.sim_start = get_sim_time("ns")
+
+    @property
+    def wall_time(self) -> float:
+        return time.perf_counter() - self.wall_start
+
+    @property
+    def sim_cycles(self) -> int:
+        return int((get_sim_time("ns") - self.sim_start) // CLOCK_PERIOD_NS)
+
+def record(name, timer, **metrics):
+    """Report a workload's wall time, simulation speed and any core metrics (cycles, ipc, ...)"""
+    wall_time = timer.wall_time
+    sim_cycles = timer.sim_cycles
+    result = {
+        "bench": name,
+        "wall_time_s": round(wall_time, 6),
+        "sim_cycles": sim_cycles,
+        "sim_cycles_per_s": round(sim_cycles / wall_time, 1) if wall_time > 0 else 0.0,
+        **metrics,
+    }
+    cocotb.log.info(f"bench {name}: {result}")
+
+    path = os.getenv(RESULTS_ENV)
+    if path:
+        with open(path, "a") as f:
+            f.write(json.dumps(result) + "\n")
+    return result
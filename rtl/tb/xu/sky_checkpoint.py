@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+# Architectural state of one XU: everything needed to resume a program from an
+# instruction boundary in a freshly reset core. Pipeline registers are not
+# saved; checkpoints are only taken with the pipeline drained (see
+# checkpoint_program in sky_xu_harness).
+
+NUM_REGISTERS = 16
+INSTR_MEM_WORDS = 1024
+DATA_MEM_WORDS = 1024
+
+# stages an instruction passes through after fetch before it is written back
+# (decode, execute, memory); the register file write happens on the edge that
+# moves it out of the memory stage
+PIPELINE_DEPTH = 3
+
+# nops after a program: enough for fetch to keep feeding the pipeline until the
+# last instruction is written back, two words a cycle when dual issuing
+DRAIN_NOPS = 2 * (PIPELINE_DEPTH + 2)
+
+@dataclass
+class Checkpoint:
+    pc: int                 # byte address of the next instruction to fetch
+    registers: np.ndarray   # uint32[16]
+    instr_mem: np.ndarray   # uint32[1024]
+    data_mem: np.ndarray    # uint32[1024]
+
+    def __post_init__(self):
+        self.registers = _words(self.registers, NUM_REGISTERS, "registers")
+        self.instr_mem = _words(self.instr_mem, INSTR_MEM_WORDS, "instr_mem")
+        self.data_mem = _words(self.data_mem, DATA_MEM_WORDS, "data_mem")
+
+    def save(self, path):
+        """Write the checkpoint as an uncompressed .npz archive"""
+        with open(path, "wb") as f:
+            np.savez(f, pc=np.uint32(self.pc), registers=self.registers, instr_mem=self.instr_mem, data_mem=self.data_mem)
+
+    @classmethod
+    def load(cls, path) -> "Checkpoint":
+        with np.load(path) as archive:
+            return cls(int(archive["pc"]), archive["registers"], archive["instr_mem"], archive["data_mem"])
+
+    def __eq__(self, other):
+        return (isinstance(other, Checkpoint) and self.pc == other.pc
+                and np.array_equal(self.registers, other.registers)
+                and np.array_equal(self.instr_mem, other.instr_mem)
+                and np.array_equal(self.data_mem, other.data_mem))
+
+def _words(values, count, name) -> np.ndarray:
+    words = np.asarray(values, dtype=np.uint32)
+    if words.shape != (count,):
+        raise ValueError(f"checkpoint {name} should hold {count} words, got shape {words.shape}")
+    return words
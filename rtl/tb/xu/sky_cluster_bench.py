@@ -0,0 +1,82 @@
+import random
+
+import cocotb
+
+from xu.sky_bench import BenchTimer, record
+from xu.sky_iss import executed
+from xu.sky_xu_harness import start_clock
+from xu.sky_cluster_harness import (
+    ELEMENTS_BASE, HISTOGRAM_BASE, REDUCTION_BASE, REDUCTION_INIT,
+    num_xu, num_banks, run_cluster, read_scratchpad, histogram, reduction,
+)
+
+# Reductions across the XUs of a cluster through scratchpad atomics. The same
+# ELEMENTS elements are split evenly over however many XUs bench.py built
+# sky_cluster with (the "cluster" sweep), so throughput in elements per
+# thousand cycles shows how well the work scales and bank conflicts how much
+# of the lost scaling is the XUs waiting on each other at the scratchpad.
+
+ELEMENTS = 480
+SEED = 47
+
+def _elements():
+    rng = random.Random(SEED)
+    return [rng.randint(-1000, 1000) for _ in range(ELEMENTS)]
+
+def _split(values, count) -> list:
+    share = len(values) // count
+    return [{ELEMENTS_BASE: values[i * share:(i + 1) * share]} for i in range(count)]
+
+def _signed(value):
+    return value - (1 << 32) if value >> 31 else value
+
+async def bench_workload(dut, name, programs, data, shared=None):
+    start_clock(dut)
+    count = num_xu(dut)
+    timer = BenchTimer()
+    run = await run_cluster(dut, programs, data=data, shared=shared)
+    retired = sum(executed(program) for program in programs)
+    record(
+        f"cluster{count}_{name}", timer,
+        num_xu=count,
+        banks=num_banks(dut),
+        elements=ELEMENTS,
+        retired=retired,
+        core_cycles=run.cycles,
+        ipc=round(retired / run.cycles, 4),
+        elements_per_kcycle=round(1000 * ELEMENTS / run.cycles, 2),
+        conflicts=run.total_conflicts,
+        bank_conflicts=run.conflicts,
+    )
+
+async def bench_histogram(dut, bins):
+    count = num_xu(dut)
+    values = _elements()
+    await bench_workload(dut, f"histogram{bins}", [histogram(ELEMENTS // count, bins)] * count, _split(values, count))
+    expected = [0] * bins
+    for value in values:
+        expected[value & (bins - 1)] += 1
+    got = read_scratchpad(dut, HISTOGRAM_BASE, bins)
+    assert got == expected, f"histogram{bins}: got {got}, expected {expected}"
+
+@cocotb.test
+async def bench_cluster_histogram16(dut):
+    """Histogram into 16 bins spread over the banks"""
+    await bench_histogram(dut, 16)
+
+@cocotb.test
+async def bench_cluster_histogram4(dut):
+    """Histogram into 4 bins, more XUs on each word"""
+    await bench_histogram(dut, 4)
+
+@cocotb.test
+async def bench_cluster_reduction(dut):
+    """Sum, minimum and maximum of every element, each into one word"""
+    count = num_xu(dut)
+    values = _elements()
+    await bench_workload(
+        dut, "reduction", [reduction(ELEMENTS // count)] * count, _split(values, count), {REDUCTION_BASE: REDUCTION_INIT},
+    )
+    got = [_signed(value) for value in read_scratchpad(dut, REDUCTION_BASE, 3)]
+    expected = [sum(values), min(values), max(values)]
+    assert got == expected, f"reduction: got {got}, expected {expected}"
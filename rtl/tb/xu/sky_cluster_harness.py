@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+
+from cocotb.triggers import RisingEdge, Timer
+
+from xu.sky_isa import NOP, SCRATCHPAD_BASE, SCRATCHPAD_WORDS, assemble
+from xu.sky_iss import XuIss, executed
+from xu.sky_scheduler import schedule, schedule_loop, join
+from xu.sky_xu_harness import INSTR_MEM_WORDS, load_data, read_data
+
+# Harness for sky_cluster. Each XU gets a program of its own, padded with nops
+# to the longest so one launch covers them all, and the launch is held over
+# the edge that releases reset so no XU fetches anything before it. A run
+# ends when the cluster's done is set, every XU drained.
+
+# where the kernels below find their elements in each XU's data memory, and
+# where they leave their results in the scratchpad
+ELEMENTS_BASE = 0x100
+HISTOGRAM_BASE = SCRATCHPAD_BASE
+REDUCTION_BASE = SCRATCHPAD_BASE + 0x100
+
+@dataclass
+class ClusterRun:
+    cycles: int
+    # requests each scratchpad bank turned away
+    conflicts: list
+
+    @property
+    def total_conflicts(self) -> int:
+        return sum(self.conflicts)
+
+def num_xu(dut) -> int:
+    """NUM_XU the cluster DUT was built with"""
+    return int(dut.NUM_XU.value)
+
+def num_banks(dut) -> int:
+    """Scratchpad BANKS the cluster DUT was built with"""
+    return int(dut.BANKS.value)
+
+def xu(dut, index):
+    """Handle of one XU of the cluster, usable with the sky_xu_harness accessors"""
+    return dut.xus[index].xu
+
+def load_programs(dut, programs) -> int:
+    """Write one program per XU into its instruction memory, padded to the longest; returns that length"""
+    length = max(len(program) for program in programs)
+    assert length <= INSTR_MEM_WORDS, f"program too large: {length} words"
+    for index, program in enumerate(programs):
+        for i, word in enumerate(list(program) + [NOP] * (length - len(program))):
+            xu(dut, index).fetch.instr_mem[i].value = word
+    return length
+
+def load_scratchpad(dut, base, words):
+    """Write words into the scratchpad starting at byte address `base` (within its window)"""
+    for i, word in enumerate(words):
+        dut.scratchpad.memory[((base - SCRATCHPAD_BASE) >> 2) + i].value = word & 0xFFFFFFFF
+
+def read_scratchpad(dut, base, count) -> list:
+    return [int(dut.scratchpad.memory[((base - SCRATCHPAD_BASE) >> 2) + i].value) for i in range(count)]
+
+def read_xu_data(dut, index, base, count) -> list:
+    """Words of one XU's data memory"""
+    return read_data(xu(dut, index), base, count)
+
+def bank_conflicts(dut) -> list:
+    value = int(dut.bank_conflicts.value)
+    return [value >> 32 * bank & 0xFFFFFFFF for bank in range(num_banks(dut))]
+
+async def run_cluster(dut, programs, data=None, shared=None, max_cycles=None) -> ClusterRun:
+    """Launch one program per XU together and wait until all of them are done
+
+    `data` is a list of per-XU {byte address: words} preloaded into each XU's
+    data memory, `shared` the same for the scratchpad.
+    """
+    assert len(programs) == num_xu(dut), f"{len(programs)} programs for {num_xu(dut)} XUs"
+    length = load_programs(dut, programs)
+    if max_cycles is None:
+        # every scratchpad access may wait on all the other XUs
+        max_cycles = 4 * len(programs) * max(executed(program) for program in programs) + 100
+
+    dut.launch_pc.value = 0
+    dut.launch_count.value = length
+    dut.launch.value = 1
+    dut.reset.value = 1
+    await RisingEdge(dut.clk)
+    await RisingEdge(dut.clk)
+    dut.reset.value = 0
+
+    # memories are cleared synchronously during reset, so preload afterwards
+    for index, regions in enumerate(data or []):
+        for base, words in regions.items():
+            load_data(xu(dut, index), base, words)
+    for base, words in (shared or {}).items():
+        load_scratchpad(dut, base, words)
+
+    await RisingEdge(dut.clk)
+    dut.launch.value = 0
+
+    # flags read after an edge are the ones it sampled, so done from the
+    # launch edge itself is never looked at
+    cycles = 0
+    while True:
+        assert cycles < max_cycles, f"cluster did not finish in {max_cycles} cycles"
+        await RisingEdge(dut.clk)
+        cycles += 1
+        if dut.done.value:
+            break
+
+    await Timer(1, units="ns")
+    return ClusterRun(cycles=cycles, conflicts=bank_conflicts(dut))
+
+def reference(programs, data=None, shared=None) -> tuple:
+    """(ISS per XU, scratchpad words) after running each program in turn against one shared scratchpad
+
+    Only a valid model of the cluster when the order the XUs reach the
+    scratchpad in can't change the outcome: atomic adds, mins and maxes, and
+    plain accesses no other XU touches.
+    """
+    scratchpad = [0] * SCRATCHPAD_WORDS
+    for base, words in (shared or {}).items():
+        for i, word in enumerate(words):
+            scratchpad[((base - SCRATCHPAD_BASE) >> 2) + i] = word & 0xFFFFFFFF
+    models = []
+    for index, program in enumerate(programs):
+        iss = XuIss(program, (data or [{}] * len(programs))[index], scratchpad=scratchpad)
+        iss.run_to(4 * len(program))
+        models.append(iss)
+    return models, scratchpad
+
+def _kernel(prologue, body, count) -> list:
+    return join([
+        schedule(assemble("\n".join(prologue))).program,
+        schedule_loop(assemble("\n".join(body)), count).program,
+    ])
+
+def histogram(count, bins) -> list:
+    """Count `count` elements into `bins` (a power of two) scratchpad words by their low bits, one atomic add each"""
+    return _kernel(
+        ["addi r1, r0, 1", "slli r1, r1, 12", "addi r2, r0, 1", f"addi r3, r0, {ELEMENTS_BASE}"],
+        ["lw r4, 0(r3)", f"andi r5, r4, {bins - 1}", "slli r5, r5, 2", "add r5, r5, r1",
+         "amoadd r0, r2, 0(r5)", "addi r3, r3, 4"],
+        count,
+    )
+
+def reduction(count) -> list:
+    """Sum, minimum and maximum of `count` elements, reduced into three scratchpad words with atomics"""
+    offset = REDUCTION_BASE - SCRATCHPAD_BASE
+    return _kernel(
+        ["addi r1, r0, 1", "slli r1, r1, 12", f"addi r3, r0, {ELEMENTS_BASE}"],
+        ["lw r4, 0(r3)", f"amoadd r0, r4, {offset}(r1)", f"amomin r0, r4, {offset + 4}(r1)",
+         f"amomax r0, r4, {offset + 8}(r1)", "addi r3, r3, 4"],
+        count,
+    )
+
+# initial words of the reduction: an empty sum, the largest and smallest word
+REDUCTION_INIT = [0, 0x7FFFFFFF, 0x80000000]
@@ -0,0 +1,118 @@
+import random
+
+import cocotb
+
+from xu.sky_isa import SCRATCHPAD_BASE, assemble
+from xu.sky_scheduler import schedule, schedule_loop, join
+from xu.sky_xu_harness import start_clock, read_registers
+from xu.sky_cluster_harness import (
+    ELEMENTS_BASE, HISTOGRAM_BASE, REDUCTION_BASE, REDUCTION_INIT,
+    num_xu, xu, run_cluster, reference, read_scratchpad, read_xu_data, histogram, reduction,
+)
+
+# Tests for sky_cluster: several XUs running at once against the shared
+# scratchpad. Final scratchpad contents are checked against the instruction
+# set simulator running the XUs one after another, which only works for
+# programs whose outcome doesn't depend on the order the XUs' accesses are
+# granted in; the shared counter test checks atomicity under contention
+# directly.
+
+def _signed(value):
+    return value - (1 << 32) if value >> 31 else value
+
+@cocotb.test
+async def test_cluster_atomic_ops(dut):
+    """Test each atomic operation, plain scratchpad accesses and an atomic to private memory on every XU"""
+    start_clock(dut)
+
+    def program(index):
+        base = 32 * index
+        return schedule(assemble("\n".join([
+            "addi r1, r0, 1", "slli r1, r1, 12",
+            f"addi r2, r0, {index + 3}", "addi r3, r0, -7",
+            f"amoadd r4, r2, {base}(r1)",
+            f"amoswap r5, r3, {base + 4}(r1)",
+            f"amomin r6, r3, {base + 8}(r1)",
+            f"amomax r7, r2, {base + 14}(r1)",     # aligned down to the word
+            f"lw r8, {base}(r1)",
+            "amoadd r9, r2, 64(r0)",               # private memory: reads like lw
+            "lw r10, 64(r0)",
+            f"sb r3, {base + 17}(r1)",
+            f"sh r2, {base + 22}(r1)",
+            f"lbu r11, {base + 17}(r1)",
+            f"lw r12, {base + 20}(r1)",
+            f"sw r9, {base + 24}(r1)",
+        ]))).program
+
+    count = num_xu(dut)
+    programs = [program(index) for index in range(count)]
+    data = [{64: [1000 + index]} for index in range(count)]
+    shared = {SCRATCHPAD_BASE + 32 * index: [5, 9, 100, -50, 0, 0x01020304, 0] for index in range(count)}
+
+    await run_cluster(dut, programs, data=data, shared=shared)
+    models, scratchpad = reference(programs, data=data, shared=shared)
+    for index, iss in enumerate(models):
+        got = read_registers(xu(dut, index))
+        assert got == iss.registers, f"xu {index}: registers {got}, expected {iss.registers}"
+        assert read_xu_data(dut, index, 64, 1) == [1000 + index], f"xu {index}: private atomic wrote memory"
+    got = read_scratchpad(dut, SCRATCHPAD_BASE, 8 * count)
+    assert got == scratchpad[:8 * count], f"scratchpad {got}, expected {scratchpad[:8 * count]}"
+
+@cocotb.test
+async def test_cluster_shared_counter(dut):
+    """Test that atomic adds from every XU to one word each see a different old value"""
+    start_clock(dut)
+
+    increments = 24
+    program = join([
+        schedule(assemble("addi r1, r0, 1\nslli r1, r1, 12\naddi r2, r0, 1\naddi r3, r0, 256")).program,
+        schedule_loop(assemble("amoadd r4, r2, 0(r1)\nsw r4, 0(r3)\naddi r3, r3, 4"), increments).program,
+    ])
+    count = num_xu(dut)
+    run = await run_cluster(dut, [program] * count)
+
+    total = count * increments
+    assert read_scratchpad(dut, SCRATCHPAD_BASE, 1) == [total], f"counter {read_scratchpad(dut, SCRATCHPAD_BASE, 1)}, expected {total}"
+    seen = sorted(value for index in range(count) for value in read_xu_data(dut, index, 256, increments))
+    assert seen == list(range(total)), f"old values repeat or skip: {seen}"
+    if count > 1:
+        assert run.total_conflicts > 0, f"no bank conflicts recorded with {count} XUs on one word"
+
+@cocotb.test
+async def test_cluster_histogram(dut):
+    """Test a histogram every XU adds its own elements into"""
+    start_clock(dut)
+
+    rng = random.Random(47)
+    elements, bins = 40, 16
+    count = num_xu(dut)
+    data = [{ELEMENTS_BASE: [rng.randint(-500, 500) for _ in range(elements)]} for _ in range(count)]
+    programs = [histogram(elements, bins)] * count
+
+    await run_cluster(dut, programs, data=data)
+    expected = [0] * bins
+    for regions in data:
+        for value in regions[ELEMENTS_BASE]:
+            expected[value & (bins - 1)] += 1
+    got = read_scratchpad(dut, HISTOGRAM_BASE, bins)
+    assert got == expected, f"histogram {got}, expected {expected}"
+    _, scratchpad = reference(programs, data=data)
+    assert got == scratchpad[:bins], f"histogram {got}, iss {scratchpad[:bins]}"
+
+@cocotb.test
+async def test_cluster_reduction(dut):
+    """Test a sum, minimum and maximum reduced across every XU's elements"""
+    start_clock(dut)
+
+    rng = random.Random(4747)
+    elements = 32
+    count = num_xu(dut)
+    data = [{ELEMENTS_BASE: [rng.randint(-100000, 100000) for _ in range(elements)]} for _ in range(count)]
+    shared = {REDUCTION_BASE: REDUCTION_INIT}
+
+    await run_cluster(dut, [reduction(elements)] * count, data=data, shared=shared)
+    values = [value for regions in data for value in regions[ELEMENTS_BASE]]
+    total, low, high = read_scratchpad(dut, REDUCTION_BASE, 3)
+    assert _signed(total) == sum(values), f"sum {_signed(total)}, expected {sum(values)}"
+    assert _signed(low) == min(values), f"min {_signed(low)}, expected {min(values)}"
+    assert _signed(high) == max(values), f"max {_signed(high)}, expected {max(values)}"
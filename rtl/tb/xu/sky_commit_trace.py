@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+
+# Commit traces hold one fixed-width record per retired instruction after a
+# 16 byte header, so a trace of any length can be memory-mapped straight into
+# a numpy structured array.
+
+MAGIC = b"SKYCOMMT"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4")])
+
+COMMIT_DTYPE = np.dtype([
+    ("cycle", "<u8"),     # core cycle the instruction was written back in
+    ("pc", "<u4"),
+    ("instr", "<u4"),
+    ("wdata", "<u4"),     # register file write data (0 if no write)
+    ("mem_addr", "<u4"),  # data memory address (0 if no access)
+    ("mem_data", "<u4"),  # data loaded or stored
+    ("rd", "u1"),
+    ("flags", "u1"),      # FLAG_* bits
+    ("pad", "<u2"),
+])
+
+FLAG_REG_WRITE = 1 << 0
+FLAG_MEM_READ  = 1 << 1
+FLAG_MEM_WRITE = 1 << 2
+
+# fields that depend only on the program, not on pipeline timing
+ARCH_FIELDS = ("pc", "instr", "wdata", "mem_addr", "mem_data", "rd", "flags")
+
+class CommitTraceWriter:
+    """Appends commit records to a trace file, buffering them into numpy chunks"""
+
+    def __init__(self, path, chunk=1 << 16):
+        self.path = path
+        self.chunk = chunk
+        self.pending = []
+        self.count = 0
+        self.file = open(path, "wb")
+        header = np.array([(MAGIC, VERSION, COMMIT_DTYPE.itemsize)], dtype=HEADER_DTYPE)
+        header.tofile(self.file)
+
+    def append(self, cycle, pc, instr, rd=0, wdata=0, mem_addr=0, mem_data=0, flags=0):
+        self.pending.append((cycle, pc, instr, wdata, mem_addr, mem_data, rd, flags, 0))
+        if len(self.pending) >= self.chunk:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            np.array(self.pending, dtype=COMMIT_DTYPE).tofile(self.file)
+            self.count += len(self.pending)
+            self.pending = []
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_trace(path) -> np.ndarray:
+    """Memory-map a commit trace as a structured array with COMMIT_DTYPE fields"""
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) != 1 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} is not a skylark commit trace")
+    if header["version"][0] != VERSION:
+        raise ValueError(f"{path}: unsupported trace version {header['version'][0]}")
+    if header["record_size"][0] != COMMIT_DTYPE.itemsize:
+        raise ValueError(f"{path}: {header['record_size'][0]} byte records, expected {COMMIT_DTYPE.itemsize}")
+    if os.path.getsize(path) == HEADER_DTYPE.itemsize:
+        return np.zeros(0, dtype=COMMIT_DTYPE)  # empty files can't be mapped
+    return np.memmap(path, dtype=COMMIT_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize)
+
+def diff_traces(a, b, fields=ARCH_FIELDS, limit=10) -> dict:
+    """Compare two traces record by record
+
+    Returns the number of mismatching records per field, the index of the first
+    divergence (or None) and up to `limit` mismatching (index, a, b) rows.
+    """
+    n = min(len(a), len(b))
+    mismatch = np.zeros(n, dtype=bool)
+    per_field = {}
+    for field in fields:
+        field_mismatch = a[field][:n] != b[field][:n]
+        per_field[field] = int(field_mismatch.sum())
+        mismatch |= field_mismatch
+
+    indices = np.flatnonzero(mismatch)
+    first = int(indices[0]) if len(indices) else (n if len(a) != len(b) else None)
+    return {
+        "length": (len(a), len(b)),
+        "mismatches": int(len(indices)),
+        "per_field": per_field,
+        "first": first,
+        "rows": [(int(i), a[i], b[i]) for i in indices[:limit]],
+    }
+
+def summarize(trace, window=1000) -> dict:
+    """Instruction count, IPC and histograms of stall gaps and windowed IPC"""
+    if len(trace) == 0:
+        return {"instructions": 0, "cycles": 0, "ipc": 0.0}
+
+    cycles = trace["cycle"].astype(np.int64)
+    total_cycles = int(cycles[-1])
+    # cycles between consecutive commits beyond the ideal one
+    gaps = np.diff(cycles, prepend=cycles[0] - 1) - 1
+    stall_hist = np.bincount(gaps.clip(min=0))
+
+    windows = np.bincount(cycles // window, minlength=int(cycles[-1] // window) + 1)
+    ipc_per_window = windows / window
+    ipc_hist, ipc_edges = np.histogram(ipc_per_window, bins=10, range=(0.0, max(1.0, float(ipc_per_window.max())) + 1e-9))
+
+    opcodes = np.bincount(trace["instr"] >> 28, minlength=16)
+    return {
+        "instructions": len(trace),
+        "cycles": total_cycles,
+        "ipc": len(trace) / total_cycles if total_cycles else 0.0,
+        "stall_cycles": int(gaps.clip(min=0).sum()),
+        "stall_histogram": {int(gap): int(count) for gap, count in enumerate(stall_hist) if count},
+        "ipc_histogram": [(float(ipc_edges[i]), int(count)) for i, count in enumerate(ipc_hist)],
+        "opcode_counts": {int(op): int(count) for op, count in enumerate(opcodes) if count},
+    }
@@ -0,0 +1,113 @@
+from collections import deque
+from dataclasses import dataclass
+
+import cocotb
+from cocotb.triggers import RisingEdge
+
+# Host-side driver for the sky_xu DMA engine (src/xu/sky_dma.sv). Descriptors
+# are queued in Python and handed to the engine one at a time: the driver
+# writes the descriptor registers, starts the transfer, feeds the host stream
+# for host-to-memory descriptors and waits for the completion flag.
+
+# descriptor register addresses
+DMA_SRC = 0
+DMA_DST = 1
+DMA_LEN = 2
+DMA_SRC_STRIDE = 3
+DMA_DST_STRIDE = 4
+DMA_CTRL = 5
+
+# CTRL bits
+CTRL_START = 1 << 0
+CTRL_HOST = 1 << 1
+
+@dataclass
+class DmaDescriptor:
+    dst: int                    # byte address of the first word written
+    length: int                 # words
+    src: int = 0                # byte address of the first word read, memory-to-memory only
+    src_stride: int = 4         # bytes between words read
+    dst_stride: int = 4         # bytes between words written
+    host_data: list = None      # words from the host; makes this a host-to-memory transfer
+
+    @classmethod
+    def copy(cls, src, dst, length, src_stride=4, dst_stride=4):
+        return cls(dst=dst, length=length, src=src, src_stride=src_stride, dst_stride=dst_stride)
+
+    @classmethod
+    def from_host(cls, dst, words, dst_stride=4):
+        words = [word & 0xFFFFFFFF for word in words]
+        return cls(dst=dst, length=len(words), dst_stride=dst_stride, host_data=words)
+
+class DmaHost:
+    """Queues descriptors and runs them on a full-core DUT's DMA engine in order"""
+
+    def __init__(self, dut):
+        self.dut = dut
+        self.pending = deque()
+        # (descriptor, cycles from its first register write until done was seen)
+        self.completed = []
+        # cycles from start() until the queue drained
+        self.cycles = 0
+        self._task = None
+
+    def queue(self, descriptor):
+        self.pending.append(descriptor)
+
+    def start(self):
+        """Start feeding queued descriptors; the XU must be out of reset"""
+        if self._task is None:
+            self._task = cocotb.start_soon(self._run())
+
+    async def wait(self):
+        """Wait until every queued descriptor has completed"""
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _edge(self):
+        await RisingEdge(self.dut.clk)
+        self.cycles += 1
+
+    async def _run(self):
+        self.cycles = 0
+        while self.pending:
+            descriptor = self.pending.popleft()
+            start = self.cycles
+            await self._program(descriptor)
+            if descriptor.host_data is not None:
+                await self._stream(descriptor.host_data)
+            # values read after an edge are the ones the edge sampled, so the
+            # flags seen here were set by the previous edge at the latest
+            while True:
+                await self._edge()
+                if self.dut.dma_done.value and not self.dut.dma_busy.value:
+                    break
+            self.completed.append((descriptor, self.cycles - start))
+
+    async def _program(self, descriptor):
+        ctrl = CTRL_START | (CTRL_HOST if descriptor.host_data is not None else 0)
+        registers = [
+            (DMA_SRC, descriptor.src),
+            (DMA_DST, descriptor.dst),
+            (DMA_LEN, descriptor.length),
+            (DMA_SRC_STRIDE, descriptor.src_stride),
+            (DMA_DST_STRIDE, descriptor.dst_stride),
+            (DMA_CTRL, ctrl),
+        ]
+        self.dut.dma_cfg_write.value = 1
+        for addr, value in registers:
+            self.dut.dma_cfg_addr.value = addr
+            self.dut.dma_cfg_data.value = value & 0xFFFFFFFF
+            await self._edge()
+        self.dut.dma_cfg_write.value = 0
+
+    async def _stream(self, words):
+        """Offer each word until the engine takes it"""
+        self.dut.dma_host_valid.value = 1
+        for word in words:
+            self.dut.dma_host_data.value = word
+            await self._edge()
+            while not self.dut.dma_host_ready.value:
+                await self._edge()
+        self.dut.dma_host_valid.value = 0
@@ -0,0 +1,97 @@
+import cocotb
+
+from xu.sky_bench import BenchTimer, record
+from xu.sky_dma import DmaDescriptor, DmaHost
+from xu.sky_isa import assemble
+from xu.sky_kernel import materialize
+from xu.sky_scheduler import schedule
+from xu.sky_xu_bench import independent_alu_kernel, vector_add_kernel
+from xu.sky_xu_harness import start_clock, run_program
+
+# Copy overhead with and without the DMA engine. Each bench runs a compute
+# kernel three ways: alone, with the data movement done by XU instructions
+# ahead of it, and with the same movement queued on the DMA engine while the
+# kernel runs. The copy overhead is the extra cycles over the kernel alone.
+
+COPY_WORDS = 128
+COPY_SRC = 0x800
+COPY_DST = 0xC00
+
+def copy_program(words=COPY_WORDS, src=COPY_SRC, dst=COPY_DST):
+    """lw/sw pairs through eight registers, scheduled"""
+    lines = []
+    for i in range(words):
+        reg = 1 + i % 8
+        lines += [f"lw r{reg}, {src + 4 * i - 0x1000}(r0)", f"sw r{reg}, {dst + 4 * i - 0x1000}(r0)"]
+    return schedule(assemble("\n".join(lines))).program
+
+def host_fill_program(values, dst=COPY_DST):
+    """Host data carried in the instruction stream: materialize each word, then store it"""
+    words = []
+    for i, value in enumerate(values):
+        reg = 1 + i % 8
+        words += materialize(value, reg)
+        words.append(assemble(f"sw r{reg}, {dst + 4 * i - 0x1000}(r0)")[0])
+    return schedule(words).program
+
+# sized so the instruction-driven versions still fit in instruction memory
+KERNELS = {
+    "independent_alu": lambda: independent_alu_kernel(length=384),
+    "vector_add": lambda: vector_add_kernel(length=96),
+}
+
+async def run_with(dut, program, data, dma=None) -> int:
+    """Cycles until the program has retired and any DMA transfers have completed"""
+    stats = await run_program(dut, program, data=data, dma=dma)
+    if dma is None:
+        return stats.cycles
+    await dma.wait()
+    return max(stats.cycles, dma.cycles)
+
+async def bench_copy(dut, kernel, host=False):
+    start_clock(dut)
+    program, data = KERNELS[kernel]()
+    source = [0x10000 + 0x1111 * i for i in range(COPY_WORDS)]
+    data = dict(data)
+    if not host:
+        data[COPY_SRC] = source
+
+    timer = BenchTimer()
+    alone = await run_with(dut, program, data)
+
+    movement = host_fill_program(source) if host else copy_program()
+    with_xu = await run_with(dut, movement + program, data)
+
+    dma = DmaHost(dut)
+    dma.queue(DmaDescriptor.from_host(COPY_DST, source) if host else DmaDescriptor.copy(COPY_SRC, COPY_DST, COPY_WORDS))
+    with_dma = await run_with(dut, program, data, dma=dma)
+
+    record(
+        f"dma_{'host' if host else 'copy'}_{kernel}", timer,
+        words=COPY_WORDS,
+        kernel_cycles=alone,
+        core_cycles=with_dma,
+        xu_copy_cycles=with_xu,
+        xu_copy_overhead=with_xu - alone,
+        dma_copy_overhead=with_dma - alone,
+    )
+
+@cocotb.test
+async def bench_dma_copy_independent_alu(dut):
+    """Memory-to-memory copy next to a kernel that never touches data memory"""
+    await bench_copy(dut, "independent_alu")
+
+@cocotb.test
+async def bench_dma_copy_vector_add(dut):
+    """Memory-to-memory copy competing with a load/store kernel for the port"""
+    await bench_copy(dut, "vector_add")
+
+@cocotb.test
+async def bench_dma_host_independent_alu(dut):
+    """Host-to-memory transfer next to an ALU kernel, against stores of materialized constants"""
+    await bench_copy(dut, "independent_alu", host=True)
+
+@cocotb.test
+async def bench_dma_host_vector_add(dut):
+    """Host-to-memory transfer competing with a load/store kernel"""
+    await bench_copy(dut, "vector_add", host=True)
@@ -0,0 +1,96 @@
+import cocotb
+
+from xu.sky_bench import BenchTimer, record
+from xu.sky_isa import assemble
+from xu.sky_scheduler import schedule, schedule_loop, join, load_use_distance
+from xu.sky_xu_harness import (
+    start_clock, run_program, read_data, issue_width, mem_latency, fetch_queue_depth, fetch_queue_counters,
+)
+from xu.sky_issue_bench import MIXES
+from xu.sky_latency_bench import A_BASE, B_BASE, OUT_BASE, LENGTH, WORKLOADS, _a, _b, dot
+
+# Fetch queue benches: a kernel mix run on every point of the "fetch" sweep in
+# bench.py, which builds sky_xu dual issue against a non-blocking data memory
+# so decode is held often, with fetch coupled to decode and with queues of a
+# few depths and read widths. Occupancy is the mean number of words queued a
+# cycle and queue_full the share of cycles the queue had no room; slot
+# utilization is the share of issue slots that carried an instruction other
+# than a scheduler nop.
+
+def straight(name):
+    def build(width, latency):
+        body, data = MIXES[name]()
+        return schedule(body, issue_width=width).program, len(body), data, None
+    return build
+
+def dot_product(width, latency):
+    body = assemble("\n".join(dot()))
+    program = schedule(body, issue_width=width, load_distance=load_use_distance(latency)).program
+    return program, len(body), {A_BASE: _a(), B_BASE: _b()}, WORKLOADS["dot"][1]()
+
+def loop_sum(width, latency):
+    """Array sum in a hardware loop, so fetch keeps turning back to the top of the body"""
+    program = join([
+        schedule(assemble(f"addi r3, r0, {A_BASE}"), issue_width=width).program,
+        schedule_loop(assemble("lw r1, 0(r3)\naddi r3, r3, 4\nadd r5, r5, r1"), LENGTH, issue_width=width).program,
+        schedule(assemble(f"sw r5, {OUT_BASE}(r0)"), issue_width=width).program,
+    ], issue_width=width)
+    return program, 2 + 3 * LENGTH, {A_BASE: _a()}, [sum(_a()) & 0xFFFFFFFF]
+
+KERNELS = {
+    "independent": straight("independent"),
+    "load_alu": straight("load_alu"),
+    "dot": dot_product,
+    "loop_sum": loop_sum,
+}
+
+async def bench_kernel(dut, name):
+    start_clock(dut)
+    width = issue_width(dut)
+    depth = fetch_queue_depth(dut)
+    read = int(dut.FETCH_WIDTH.value) if depth else 1
+    program, useful, data, expected = KERNELS[name](width, mem_latency(dut))
+
+    timer = BenchTimer()
+    stats = await run_program(dut, program, data=data)
+    if expected is not None:
+        got = read_data(dut, OUT_BASE, len(expected))
+        assert got == expected, f"{name}: got {got}, expected {expected}"
+
+    counters = fetch_queue_counters(dut)
+    label = f"queue{depth}x{read}" if depth else "coupled"
+    record(
+        f"fetch_{label}_{name}", timer,
+        issue_width=width,
+        fetch_queue_depth=depth,
+        fetch_width=read,
+        instructions=useful,
+        retired=stats.retired,
+        core_cycles=stats.cycles,
+        ipc=round(stats.ipc, 4),
+        useful_ipc=round(useful / stats.cycles, 4),
+        stalls=stats.stalls,
+        slot_utilization=round(useful / (width * stats.cycles), 4),
+        queue_occupancy=round(counters["occupancy"] / stats.cycles, 3),
+        queue_full=round(counters["full"] / stats.cycles, 3),
+    )
+
+@cocotb.test
+async def bench_fetch_independent(dut):
+    """Independent ALU chains, two words issued nearly every cycle"""
+    await bench_kernel(dut, "independent")
+
+@cocotb.test
+async def bench_fetch_load_alu(dut):
+    """Loads feeding ALU ops, held in decode until the loads return"""
+    await bench_kernel(dut, "load_alu")
+
+@cocotb.test
+async def bench_fetch_dot(dut):
+    """Dot product with loads spaced for the latency"""
+    await bench_kernel(dut, "dot")
+
+@cocotb.test
+async def bench_fetch_loop_sum(dut):
+    """Array sum in a hardware loop"""
+    await bench_kernel(dut, "loop_sum")
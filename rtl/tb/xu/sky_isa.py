@@ -0,0 +1,244 @@
+import re
+
+# instruction opcodes (bits 31-28)
+OPC_R_TYPE = 0b0000
+OPC_I_TYPE = 0b0001
+OPC_LOAD   = 0b0010
+OPC_STORE  = 0b0011
+OPC_LOOP   = 0b0100
+OPC_ATOMIC = 0b0101
+
+# alu funct encodings (bits 15-12)
+OP_ADD  = 0
+OP_SUB  = 1
+OP_AND  = 2
+OP_OR   = 3
+OP_XOR  = 4
+OP_SLL  = 5
+OP_SRL  = 6
+OP_SRA  = 7
+OP_SLT  = 8
+OP_SLTU = 9
+OP_MUL  = 10
+OP_MAC  = 11     # rd = rs1 * rs2 + rd
+
+ALU_OPS = {
+    "add": OP_ADD,
+    "sub": OP_SUB,
+    "and": OP_AND,
+    "or": OP_OR,
+    "xor": OP_XOR,
+    "sll": OP_SLL,
+    "srl": OP_SRL,
+    "sra": OP_SRA,
+    "slt": OP_SLT,
+    "sltu": OP_SLTU,
+    "mul": OP_MUL,
+    "mac": OP_MAC,
+}
+
+# load/store funct encodings (bits 15-12): bits 1-0 are the access size and
+# bit 2 zero-extends narrow loads. Halfwords are aligned down to 2 bytes.
+MEM_WORD     = 0b000
+MEM_BYTE     = 0b001
+MEM_HALF     = 0b010
+MEM_UNSIGNED = 0b100
+
+LOAD_OPS = {
+    "lw": MEM_WORD,
+    "lb": MEM_BYTE,
+    "lh": MEM_HALF,
+    "lbu": MEM_BYTE | MEM_UNSIGNED,
+    "lhu": MEM_HALF | MEM_UNSIGNED,
+}
+
+STORE_OPS = {
+    "sw": MEM_WORD,
+    "sb": MEM_BYTE,
+    "sh": MEM_HALF,
+}
+
+# atomic funct encodings (bits 15-12): rd gets the old word and memory the
+# operation of it and rs2; min and max are signed. Atomics move whole words,
+# aligned down, and only write in the shared scratchpad (sky_cluster); to an
+# XU's own data memory they read like lw.
+AMO_ADD  = 0
+AMO_SWAP = 1
+AMO_MIN  = 2
+AMO_MAX  = 3
+
+ATOMIC_OPS = {
+    "amoadd": AMO_ADD,
+    "amoswap": AMO_SWAP,
+    "amomin": AMO_MIN,
+    "amomax": AMO_MAX,
+}
+
+# window of the scratchpad the XUs of a cluster share
+SCRATCHPAD_BASE = 0x1000
+SCRATCHPAD_WORDS = 1024
+
+# immediate forms of the alu ops (addi, xori, sltiu, ...)
+ALU_IMM_OPS = {name + "i": funct for name, funct in ALU_OPS.items()}
+ALU_IMM_OPS["sltiu"] = ALU_IMM_OPS.pop("sltui")
+
+NUM_REGISTERS = 16
+IMM_MIN = -2048
+IMM_MAX = 2047
+
+# hardware loops: the iteration count is the 12-bit immediate and the body
+# length in words sits in bits 27-16
+LOOP_MAX = 0xFFF
+
+# add r0, r0, r0
+NOP = 0x00000000
+
+def encode(opcode: int, rs1: int = 0, rs2: int = 0, rd: int = 0, funct: int = 0, imm: int = 0) -> int:
+    """Pack instruction fields into a 32-bit instruction word"""
+    for name, reg in (("rs1", rs1), ("rs2", rs2), ("rd", rd)):
+        if not 0 <= reg < NUM_REGISTERS:
+            raise ValueError(f"{name} out of range: r{reg}")
+    if not IMM_MIN <= imm <= IMM_MAX:
+        raise ValueError(f"immediate does not fit in 12 bits: {imm}")
+    return (
+        (opcode & 0xF) << 28
+        | rs1 << 24
+        | rs2 << 20
+        | rd << 16
+        | (funct & 0xF) << 12
+        | (imm & 0xFFF)
+    )
+
+def sign_extend(value: int, bits: int = 12) -> int:
+    """Sign-extend a `bits` wide field to a 32-bit word"""
+    value &= (1 << bits) - 1
+    if value >> (bits - 1):
+        value -= 1 << bits
+    return value & 0xFFFFFFFF
+
+def decode_fields(word: int) -> tuple:
+    """Split an instruction word into (opcode, rs1, rs2, rd, funct, imm), imm not sign-extended"""
+    return (
+        (word >> 28) & 0xF,
+        (word >> 24) & 0xF,
+        (word >> 20) & 0xF,
+        (word >> 16) & 0xF,
+        (word >> 12) & 0xF,
+        word & 0xFFF,
+    )
+
+def r_type(funct: int, rd: int, rs1: int, rs2: int) -> int:
+    return encode(OPC_R_TYPE, rs1=rs1, rs2=rs2, rd=rd, funct=funct)
+
+def i_type(funct: int, rd: int, rs1: int, imm: int) -> int:
+    return encode(OPC_I_TYPE, rs1=rs1, rd=rd, funct=funct, imm=imm)
+
+def load(rd: int, rs1: int, imm: int = 0, size: int = MEM_WORD) -> int:
+    return encode(OPC_LOAD, rs1=rs1, rd=rd, funct=size, imm=imm)
+
+def store(rs2: int, rs1: int, imm: int = 0, size: int = MEM_WORD) -> int:
+    return encode(OPC_STORE, rs1=rs1, rs2=rs2, funct=size, imm=imm)
+
+def atomic(funct: int, rd: int, rs2: int, rs1: int, imm: int = 0) -> int:
+    return encode(OPC_ATOMIC, rs1=rs1, rs2=rs2, rd=rd, funct=funct, imm=imm)
+
+def access_bytes(size: int) -> int:
+    """Bytes moved by a load/store with funct `size`; unused sizes move a whole word"""
+    return {MEM_BYTE: 1, MEM_HALF: 2}.get(size & 0b11, 4)
+
+def loop(count: int, length: int) -> int:
+    """Repeat the `length` words after this one `count` times"""
+    for name, value in (("count", count), ("length", length)):
+        if not 0 <= value <= LOOP_MAX:
+            raise ValueError(f"loop {name} out of range: {value}")
+    return OPC_LOOP << 28 | length << 16 | count
+
+def loop_fields(word: int) -> tuple:
+    """(count, length) of a loop word"""
+    return word & LOOP_MAX, (word >> 16) & LOOP_MAX
+
+_REG = r"r(\d+)"
+_MEM = r"(-?(?:0x[0-9a-fA-F]+|\d+))\(\s*r(\d+)\s*\)"
+
+def _reg(token: str) -> int:
+    match = re.fullmatch(_REG, token)
+    if match is None:
+        raise ValueError(f"expected a register, got {token!r}")
+    return int(match.group(1))
+
+def _mem(token: str) -> tuple:
+    match = re.fullmatch(_MEM, token)
+    if match is None:
+        raise ValueError(f"expected offset(register), got {token!r}")
+    return int(match.group(1), 0), int(match.group(2))
+
+def assemble_line(line: str) -> int:
+    """Assemble a single instruction, e.g. `addi r1, r0, 5` or `lw r2, 4(r1)`"""
+    mnemonic, _, rest = line.strip().partition(" ")
+    mnemonic = mnemonic.lower()
+    args = [arg.strip() for arg in rest.split(",")] if rest.strip() else []
+
+    if mnemonic == "nop" and not args:
+        return NOP
+    if mnemonic == ".word" and len(args) == 1:
+        return int(args[0], 0) & 0xFFFFFFFF
+    if mnemonic in ALU_OPS and len(args) == 3:
+        return r_type(ALU_OPS[mnemonic], _reg(args[0]), _reg(args[1]), _reg(args[2]))
+    if mnemonic in ALU_IMM_OPS and len(args) == 3:
+        return i_type(ALU_IMM_OPS[mnemonic], _reg(args[0]), _reg(args[1]), int(args[2], 0))
+    if mnemonic == "loop" and len(args) == 2:
+        return loop(int(args[0], 0), int(args[1], 0))
+    if mnemonic in LOAD_OPS and len(args) == 2:
+        imm, rs1 = _mem(args[1])
+        return load(_reg(args[0]), rs1, imm, LOAD_OPS[mnemonic])
+    if mnemonic in STORE_OPS and len(args) == 2:
+        imm, rs1 = _mem(args[1])
+        return store(_reg(args[0]), rs1, imm, STORE_OPS[mnemonic])
+    if mnemonic in ATOMIC_OPS and len(args) == 3:
+        imm, rs1 = _mem(args[2])
+        return atomic(ATOMIC_OPS[mnemonic], _reg(args[0]), _reg(args[1]), rs1, imm)
+    raise ValueError(f"cannot assemble {line.strip()!r}")
+
+def assemble(source: str) -> list:
+    """Assemble a program, one instruction per line. `#` starts a comment"""
+    program = []
+    for line in source.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            program.append(assemble_line(line))
+    return program
+
+_ALU_NAMES = {funct: name for name, funct in ALU_OPS.items()}
+_ALU_IMM_NAMES = {funct: name for name, funct in ALU_IMM_OPS.items()}
+_LOAD_NAMES = {funct: name for name, funct in LOAD_OPS.items()}
+_STORE_NAMES = {funct: name for name, funct in STORE_OPS.items()}
+_ATOMIC_NAMES = {funct: name for name, funct in ATOMIC_OPS.items()}
+
+def disassemble(word: int) -> str:
+    """Assembly for one instruction word; words with no mnemonic come back as `.word`"""
+    opcode, rs1, rs2, rd, funct, imm = decode_fields(word)
+    imm = imm - 0x1000 if imm & 0x800 else imm
+    if word == NOP:
+        return "nop"
+    if opcode == OPC_R_TYPE and funct in _ALU_NAMES:
+        return f"{_ALU_NAMES[funct]} r{rd}, r{rs1}, r{rs2}"
+    if opcode == OPC_I_TYPE and funct in _ALU_IMM_NAMES:
+        return f"{_ALU_IMM_NAMES[funct]} r{rd}, r{rs1}, {imm}"
+    if opcode == OPC_LOOP and word == loop(*loop_fields(word)):
+        count, length = loop_fields(word)
+        return f"loop {count}, {length}"
+    if opcode == OPC_LOAD and funct in _LOAD_NAMES:
+        return f"{_LOAD_NAMES[funct]} r{rd}, {imm}(r{rs1})"
+    if opcode == OPC_STORE and funct in _STORE_NAMES:
+        return f"{_STORE_NAMES[funct]} r{rs2}, {imm}(r{rs1})"
+    if opcode == OPC_ATOMIC and funct in _ATOMIC_NAMES:
+        return f"{_ATOMIC_NAMES[funct]} r{rd}, r{rs2}, {imm}(r{rs1})"
+    return f".word 0x{word:08x}"
+
+def read_program(path) -> list:
+    """Read a program from an assembly file, or a .hex file with one word per line"""
+    with open(path) as f:
+        source = f.read()
+    if str(path).endswith(".hex"):
+        return [int(word, 16) for word in source.split()]
+    return assemble(source)
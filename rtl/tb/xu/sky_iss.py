@@ -0,0 +1,173 @@
+from xu.sky_isa import (
+    OPC_R_TYPE, OPC_I_TYPE, OPC_LOAD, OPC_STORE, OPC_LOOP, OPC_ATOMIC,
+    AMO_ADD, AMO_SWAP, AMO_MIN, AMO_MAX, SCRATCHPAD_BASE, SCRATCHPAD_WORDS,
+    OP_ADD, OP_SUB, OP_AND, OP_OR, OP_XOR, OP_SLL, OP_SRL, OP_SRA, OP_SLT, OP_SLTU, OP_MUL, OP_MAC,
+    MEM_UNSIGNED, NOP, NUM_REGISTERS, decode_fields, sign_extend, access_bytes, loop_fields,
+)
+from xu.sky_checkpoint import Checkpoint, INSTR_MEM_WORDS, DATA_MEM_WORDS, DRAIN_NOPS
+
+# Instruction set simulator for one XU. It executes instructions one at a
+# time with no pipeline timing, so it only agrees with the RTL on programs
+# that respect the forwarding distance (dependent instructions at least three
+# apart), which is all the harness kernels. Hardware loop state is not part of
+# a checkpoint, so checkpoints are only meaningful outside loop bodies.
+
+MASK = 0xFFFFFFFF
+
+def _signed(value):
+    return value - (1 << 32) if value >> 31 else value
+
+def alu(operation, a, b, c=0) -> int:
+    """Result of sky_alu for 32-bit operands; `c` is the mac accumulator"""
+    if operation == OP_ADD:
+        return (a + b) & MASK
+    if operation == OP_SUB:
+        return (a - b) & MASK
+    if operation == OP_AND:
+        return a & b
+    if operation == OP_OR:
+        return a | b
+    if operation == OP_XOR:
+        return a ^ b
+    if operation == OP_SLL:
+        return (a << (b & 31)) & MASK
+    if operation == OP_SRL:
+        return a >> (b & 31)
+    if operation == OP_SRA:
+        return (_signed(a) >> (b & 31)) & MASK
+    if operation == OP_SLT:
+        return int(_signed(a) < _signed(b))
+    if operation == OP_SLTU:
+        return int(a < b)
+    if operation == OP_MUL:
+        return (a * b) & MASK
+    if operation == OP_MAC:
+        return (a * b + c) & MASK
+    return 0
+
+def store_lanes(value, size, address) -> tuple:
+    """(write data, byte enable) the memory stage drives for a store of `value`"""
+    width = access_bytes(size)
+    if width == 4:
+        return value & MASK, 0b1111
+    lane = address & (4 - width)
+    pattern = value & ((1 << 8 * width) - 1)
+    return pattern * (0x01010101 if width == 1 else 0x00010001), ((1 << width) - 1) << lane
+
+def merge_store(word, value, size, address) -> int:
+    """Memory word after storing `value` into it"""
+    data, enable = store_lanes(value, size, address)
+    mask = sum(0xFF << 8 * lane for lane in range(4) if enable >> lane & 1)
+    return (word & ~mask | data & mask) & MASK
+
+def amo(operation, old, value) -> int:
+    """Word the scratchpad bank writes back for an atomic of `value` into `old`"""
+    if operation == AMO_ADD:
+        return (old + value) & MASK
+    if operation == AMO_SWAP:
+        return value
+    if operation == AMO_MIN:
+        return value if _signed(value) < _signed(old) else old
+    if operation == AMO_MAX:
+        return value if _signed(value) > _signed(old) else old
+    return old
+
+def load_value(word, size, address) -> int:
+    """Register value writeback produces for a load of memory word `word`"""
+    width = access_bytes(size)
+    if width == 4:
+        return word
+    value = word >> 8 * (address & (4 - width)) & ((1 << 8 * width) - 1)
+    return value if size & MEM_UNSIGNED else sign_extend(value, 8 * width)
+
+class XuIss:
+    """Architectural model of sky_xu: registers, data memory and pc. `scratchpad`
+    is a list of SCRATCHPAD_WORDS words shared with the models of the other XUs
+    of a cluster, or None for an XU on its own."""
+
+    def __init__(self, program, data=None, scratchpad=None):
+        self.program = list(program)
+        self.registers = [0] * NUM_REGISTERS
+        self.data_mem = [0] * DATA_MEM_WORDS
+        self.scratchpad = scratchpad
+        self.pc = 0
+        self.retired = 0
+        # active hardware loop: [body start, body end, iterations left], byte addresses
+        self.loop = None
+        for base, words in (data or {}).items():
+            for i, word in enumerate(words):
+                self.data_mem[((base >> 2) + i) % DATA_MEM_WORDS] = word & MASK
+
+    def step(self):
+        """Execute the instruction at pc"""
+        index = self.pc >> 2
+        word = self.program[index] if index < len(self.program) else NOP
+        opcode, rs1, rs2, rd, funct, imm = decode_fields(word)
+
+        a = self.registers[rs1]
+        b = sign_extend(imm) if opcode in (OPC_I_TYPE, OPC_LOAD, OPC_STORE, OPC_ATOMIC) else self.registers[rs2]
+        result = alu(funct if opcode in (OPC_R_TYPE, OPC_I_TYPE) else OP_ADD, a, b, self.registers[rd])
+        shared = self.scratchpad is not None and result >> 12 == SCRATCHPAD_BASE >> 12
+        memory = self.scratchpad if shared else self.data_mem
+        address = (result >> 2) % (SCRATCHPAD_WORDS if shared else DATA_MEM_WORDS)
+
+        if opcode in (OPC_R_TYPE, OPC_I_TYPE):
+            value = result
+        elif opcode == OPC_LOAD:
+            value = load_value(memory[address], funct, result)
+        elif opcode == OPC_ATOMIC:
+            value = memory[address]
+            if shared:
+                memory[address] = amo(funct & 0b11, value, self.registers[rs2])
+        else:
+            value = None
+            if opcode == OPC_STORE:
+                memory[address] = merge_store(memory[address], self.registers[rs2], funct, result)
+        if value is not None and rd != 0:
+            self.registers[rd] = value
+
+        next_pc = self.pc + 4
+        if opcode == OPC_LOOP:
+            count, length = loop_fields(word)
+            if count and length:
+                self.loop = [self.pc + 4, self.pc + 4 * length, count]
+            else:
+                next_pc += 4 * length
+        elif self.loop is not None and self.pc == self.loop[1]:
+            if self.loop[2] > 1:
+                self.loop[2] -= 1
+                next_pc = self.loop[0]
+            else:
+                self.loop = None
+
+        self.pc = next_pc & MASK
+        self.retired += 1
+
+    def run(self, count):
+        for _ in range(count):
+            self.step()
+
+    def run_to(self, pc):
+        """Step until the next instruction to execute is at or past `pc`
+
+        Stops at the first dynamic visit: a target inside a loop body stops
+        in the first iteration, one after the loop runs every iteration, and
+        a skipped loop (count or length 0) may jump past the target.
+        """
+        while self.pc < pc:
+            self.step()
+
+    def checkpoint(self) -> Checkpoint:
+        """Architectural state before the instruction at pc, laid out as the harness loads it"""
+        instr_mem = self.program + [NOP] * DRAIN_NOPS
+        instr_mem += [0] * (INSTR_MEM_WORDS - len(instr_mem))
+        return Checkpoint(self.pc, self.registers, instr_mem, self.data_mem)
+
+def executed(program, start=0) -> int:
+    """Instructions fetch issues from byte address `start` to the end of a program, loop iterations included"""
+    if not any(decode_fields(word)[0] == OPC_LOOP for word in program):
+        return len(program) - start // 4
+    iss = XuIss(program)
+    iss.pc = start
+    iss.run_to(4 * len(program))
+    return iss.retired
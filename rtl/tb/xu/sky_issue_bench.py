@@ -0,0 +1,79 @@
+import cocotb
+
+from xu.sky_bench import BenchTimer, record
+from xu.sky_isa import assemble
+from xu.sky_scheduler import schedule
+from xu.sky_xu_harness import start_clock, run_program, issue_width
+
+# Issue-width benches: the same instruction mixes scheduled for, and run on,
+# whichever sky_xu build the bench is pointed at (`issue` and `issue_dual` in
+# bench.py), so the two runs compare directly. useful_ipc leaves out the nops
+# the scheduler pads with; ipc counts them.
+
+def independent_mix(length=512, chains=12):
+    """Enough independent accumulators to fill both lanes"""
+    ops = ["addi", "xori", "slli", "ori"]
+    lines = [f"{ops[(i // chains) % len(ops)]} r{1 + i % chains}, r{1 + i % chains}, {1 + i % 7}" for i in range(length)]
+    return assemble("\n".join(lines)), {}
+
+def dependent_mix(length=512):
+    """Four dependence chains: enough to hide the forwarding distance on one lane but not two"""
+    return independent_mix(length, chains=4)
+
+def serial_mix(length=256):
+    """One dependence chain, latency bound at any issue width"""
+    return independent_mix(length, chains=1)
+
+def load_alu_mix(length=128, base=0x000):
+    """A load feeding two ALU ops per element; only the first lane reaches data memory"""
+    lines = []
+    for i in range(length):
+        reg, total = 1 + i % 6, 7 + i % 4
+        lines += [f"lw r{reg}, {base + 4 * i}(r0)", f"muli r{reg}, r{reg}, 3", f"add r{total}, r{total}, r{reg}"]
+    return assemble("\n".join(lines)), {base: list(range(length))}
+
+MIXES = {
+    "independent": independent_mix,
+    "dependent": dependent_mix,
+    "serial": serial_mix,
+    "load_alu": load_alu_mix,
+}
+
+async def bench_mix(dut, name):
+    start_clock(dut)
+    width = issue_width(dut)
+    body, data = MIXES[name]()
+    scheduled = schedule(body, issue_width=width)
+
+    timer = BenchTimer()
+    stats = await run_program(dut, scheduled.program, data=data)
+    assert stats.cycles == scheduled.cycles, f"predicted {scheduled.cycles} cycles, took {stats.cycles}"
+    record(
+        f"issue{width}_{name}", timer,
+        issue_width=width,
+        instructions=len(body),
+        core_cycles=stats.cycles,
+        retired=stats.retired,
+        ipc=round(stats.ipc, 4),
+        useful_ipc=round(len(body) / stats.cycles, 4),
+    )
+
+@cocotb.test
+async def bench_issue_independent(dut):
+    """Independent ALU chains"""
+    await bench_mix(dut, "independent")
+
+@cocotb.test
+async def bench_issue_dependent(dut):
+    """Four interleaved dependence chains"""
+    await bench_mix(dut, "dependent")
+
+@cocotb.test
+async def bench_issue_serial(dut):
+    """A single dependence chain"""
+    await bench_mix(dut, "serial")
+
+@cocotb.test
+async def bench_issue_load_alu(dut):
+    """Loads feeding ALU ops"""
+    await bench_mix(dut, "load_alu")
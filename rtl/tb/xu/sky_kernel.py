@@ -0,0 +1,359 @@
+from dataclasses import dataclass
+
+from xu.sky_isa import (
+    OP_ADD, OP_SUB, OP_AND, OP_OR, OP_XOR, OP_SLL, OP_SRL, OP_SRA, OP_SLT, OP_SLTU, OP_MUL,
+    MEM_WORD, MEM_BYTE, MEM_HALF, MEM_UNSIGNED, IMM_MIN, IMM_MAX, NUM_REGISTERS, r_type, i_type, load, store,
+)
+from xu.sky_scheduler import schedule
+
+# A small kernel language embedded in Python. Kernel code is ordinary Python
+# run once at trace time: operators on Values record instructions and Python
+# loops unroll, since the XU has no branches. compile() allocates registers
+# with linear scan, spilling to data memory, then list-schedules the result
+# for the forwarding distance.
+#
+#   k = Kernel()
+#   a = k.array("a", 0x000, init=range(64))
+#   b = k.array("b", 0x100, length=64)
+#   for i in range(len(a)):
+#       b[i] = a[i] * 3 + 0x12345
+#   compiled = k.compile()
+#
+# Arrays of bytes or halfwords (width=1 or 2) use the sized loads and stores,
+# sign-extending elements unless signed=False.
+
+MASK = 0xFFFFFFFF
+DATA_MEM_BYTES = 4096
+
+# r0 is hardwired to zero; everything else is allocatable
+REGISTERS = list(range(1, NUM_REGISTERS))
+# taken from the allocatable set once anything spills, to reload spilled operands
+SCRATCH = REGISTERS[-2:]
+
+# default spill area, the top 64 words of data memory
+SPILL_BASE = 0xF00
+SPILL_WORDS = 64
+
+def _fits(imm) -> bool:
+    return IMM_MIN <= imm <= IMM_MAX
+
+def _signed(value) -> int:
+    value &= MASK
+    return value - (1 << 32) if value >> 31 else value
+
+def _r0_offset(address) -> int:
+    """12-bit offset from r0 that reaches a byte address (data memory only decodes bits 11:2)"""
+    address %= DATA_MEM_BYTES
+    return address if address <= IMM_MAX else address - DATA_MEM_BYTES
+
+# element width in bytes -> load/store size and index shift
+_WIDTHS = {1: (MEM_BYTE, 0), 2: (MEM_HALF, 1), 4: (MEM_WORD, 2)}
+
+def _pack(values, width) -> list:
+    """Little-endian words holding `width` byte elements"""
+    per_word = 4 // width
+    words = [0] * -(-len(values) // per_word)
+    for i, value in enumerate(values):
+        words[i // per_word] |= value << 8 * width * (i % per_word)
+    return words
+
+def _unpack(words, width, length) -> list:
+    per_word = 4 // width
+    mask = (1 << 8 * width) - 1
+    return [words[i // per_word] >> 8 * width * (i % per_word) & mask for i in range(length)]
+
+def materialize(value, rd) -> list:
+    """Instruction words that leave a 32-bit constant in `rd`, using only addi and slli"""
+    value = _signed(value)
+    if _fits(value):
+        return [i_type(OP_ADD, rd, 0, value)]
+    low = ((value & 0xFFF) ^ 0x800) - 0x800
+    words = materialize((value - low) >> 12, rd)
+    words.append(i_type(OP_SLL, rd, rd, 12))
+    if low:
+        words.append(i_type(OP_ADD, rd, rd, low))
+    return words
+
+@dataclass
+class _Op:
+    kind: str           # "const", "alu", "alui", "load" or "store"
+    dst: object         # Value defined, None for stores
+    srcs: tuple         # Values read
+    funct: int = 0
+    imm: int = 0
+
+class Value:
+    """A 32-bit value computed by the kernel, held in a virtual register"""
+    __slots__ = ("kernel", "index")
+
+    def __init__(self, kernel, index):
+        self.kernel = kernel
+        self.index = index
+
+    def __repr__(self):
+        return f"v{self.index}"
+
+    def _binary(self, funct, other, reverse=False):
+        return self.kernel._binary(funct, other, self) if reverse else self.kernel._binary(funct, self, other)
+
+    def __add__(self, other): return self._binary(OP_ADD, other)
+    def __radd__(self, other): return self._binary(OP_ADD, other, reverse=True)
+    def __sub__(self, other): return self._binary(OP_SUB, other)
+    def __rsub__(self, other): return self._binary(OP_SUB, other, reverse=True)
+    def __mul__(self, other): return self._binary(OP_MUL, other)
+    def __rmul__(self, other): return self._binary(OP_MUL, other, reverse=True)
+    def __and__(self, other): return self._binary(OP_AND, other)
+    def __rand__(self, other): return self._binary(OP_AND, other, reverse=True)
+    def __or__(self, other): return self._binary(OP_OR, other)
+    def __ror__(self, other): return self._binary(OP_OR, other, reverse=True)
+    def __xor__(self, other): return self._binary(OP_XOR, other)
+    def __rxor__(self, other): return self._binary(OP_XOR, other, reverse=True)
+    def __lshift__(self, other): return self._binary(OP_SLL, other)
+    def __rshift__(self, other): return self._binary(OP_SRA, other)
+
+    def srl(self, other):
+        """Logical shift right (>> is arithmetic)"""
+        return self._binary(OP_SRL, other)
+
+    def lt(self, other):
+        """1 if self < other as signed integers, else 0"""
+        return self._binary(OP_SLT, other)
+
+    def ltu(self, other):
+        """1 if self < other as unsigned integers, else 0"""
+        return self._binary(OP_SLTU, other)
+
+class Array:
+    """An array of 1, 2 or 4 byte elements at a fixed byte address in data memory"""
+
+    def __init__(self, kernel, name, base, length, init=None, width=4, signed=True):
+        self.kernel = kernel
+        self.name = name
+        self.base = base
+        self.length = length
+        self.init = init
+        self.width = width
+        self.signed = signed
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def end(self) -> int:
+        """Byte address just past the last element"""
+        return self.base + self.width * self.length
+
+    def _address(self, index):
+        """(base Value or None for r0, byte offset) of an element"""
+        if isinstance(index, int):
+            if not 0 <= index < self.length:
+                raise IndexError(f"{self.name}[{index}] out of range (length {self.length})")
+            return None, _r0_offset(self.base + self.width * index)
+        shift = _WIDTHS[self.width][1]
+        return (index << shift) if shift else index, _r0_offset(self.base)
+
+    def __getitem__(self, index):
+        base, offset = self._address(index)
+        size = _WIDTHS[self.width][0]
+        if self.width < 4 and not self.signed:
+            size |= MEM_UNSIGNED
+        return self.kernel._define("load", (base,) if base is not None else (), funct=size, imm=offset)
+
+    def __setitem__(self, index, value):
+        base, offset = self._address(index)
+        value = self.kernel._value(value)
+        srcs = (value,) + ((base,) if base is not None else ())
+        self.kernel._ops.append(_Op("store", None, srcs, funct=_WIDTHS[self.width][0], imm=offset))
+
+@dataclass
+class CompiledKernel:
+    program: list           # instruction words, scheduled
+    data: dict              # byte address -> initial words, for run_program
+    arrays: dict            # name -> Array
+    spills: int             # virtual registers kept in memory
+    nops: int
+    cycles: int             # predicted cycles on sky_xu
+
+    async def run(self, dut):
+        """Run on a full-core DUT through the test harness"""
+        from xu.sky_xu_harness import run_program
+        return await run_program(dut, self.program, data=self.data)
+
+    def read(self, dut, name) -> list:
+        """Elements of an array after a run, narrow ones zero-extended"""
+        from xu.sky_xu_harness import read_data
+        array = self.arrays[name]
+        words = read_data(dut, array.base, -(-(array.end - array.base) // 4))
+        return _unpack(words, array.width, array.length)
+
+class Kernel:
+    def __init__(self, spill_base=SPILL_BASE, spill_words=SPILL_WORDS):
+        self._ops = []
+        self._count = 0
+        self._constants = {}
+        self.arrays = {}
+        self.spill_base = spill_base
+        self.spill_words = spill_words
+
+    def array(self, name, base, length=None, init=None, width=4, signed=True) -> Array:
+        """Declare an array of `width` byte elements at word-aligned byte address `base`, optionally with initial contents"""
+        if width not in _WIDTHS:
+            raise ValueError(f"array {name} has unsupported element width {width}")
+        init = None if init is None else [value & (1 << 8 * width) - 1 for value in init]
+        length = len(init) if length is None else length
+        if base % 4 or base < 0 or base + width * length > DATA_MEM_BYTES:
+            raise ValueError(f"array {name} at {base:#x} ({length} x {width} bytes) is not inside data memory")
+        array = Array(self, name, base, length, init, width, signed)
+        self.arrays[name] = array
+        return array
+
+    def const(self, value) -> Value:
+        """A constant in a register; the same constant is only materialized once"""
+        value &= MASK
+        if value not in self._constants:
+            self._constants[value] = self._define("const", (), imm=value)
+        return self._constants[value]
+
+    def _value(self, value) -> Value:
+        return value if isinstance(value, Value) else self.const(value)
+
+    def _define(self, kind, srcs, funct=0, imm=0) -> Value:
+        value = Value(self, self._count)
+        self._count += 1
+        self._ops.append(_Op(kind, value, srcs, funct, imm))
+        return value
+
+    def _binary(self, funct, a, b) -> Value:
+        if isinstance(b, int):
+            imm = -b if funct == OP_SUB else b
+            if _fits(imm):
+                # subtraction of a constant becomes addi of its negation
+                return self._define("alui", (self._value(a),), OP_ADD if funct == OP_SUB else funct, imm)
+        if isinstance(a, int) and funct in (OP_ADD, OP_MUL, OP_AND, OP_OR, OP_XOR) and _fits(a):
+            return self._define("alui", (b,), funct, a)
+        return self._define("alu", (self._value(a), self._value(b)), funct)
+
+    def compile(self, issue_width=1) -> CompiledKernel:
+        """Allocate, emit and schedule the kernel for sky_xu built with `issue_width`"""
+        ops = _live_ops(self._ops)
+        assignment, spilled = _allocate(ops, REGISTERS)
+        scratch = []
+        if spilled:
+            scratch = SCRATCH
+            assignment, spilled = _allocate(ops, [reg for reg in REGISTERS if reg not in scratch])
+
+        # constants are rematerialized rather than spilled
+        slots = {}
+        for value in sorted(spilled, key=lambda value: value.index):
+            if value not in self._constants.values():
+                slots[value] = self.spill_base + 4 * len(slots)
+        if len(slots) > self.spill_words:
+            raise ValueError(f"kernel needs {len(slots)} spill slots, only {self.spill_words} available")
+        self._check_spill_area(len(slots))
+
+        words = _emit(ops, assignment, slots, scratch)
+        scheduled = schedule(words, issue_width=issue_width)
+        data = {array.base: _pack(array.init, array.width) for array in self.arrays.values() if array.init is not None}
+        return CompiledKernel(
+            program=scheduled.program,
+            data=data,
+            arrays=dict(self.arrays),
+            spills=len(spilled),
+            nops=scheduled.nops,
+            cycles=scheduled.cycles,
+        )
+
+    def _check_spill_area(self, count):
+        end = self.spill_base + 4 * count
+        for array in self.arrays.values():
+            if count and array.base < end and self.spill_base < array.end:
+                raise ValueError(f"array {array.name} overlaps the spill area at {self.spill_base:#x}")
+
+def _live_ops(ops) -> list:
+    """Drop ops whose results are never used by a store, directly or not"""
+    live = set()
+    kept = []
+    for op in reversed(ops):
+        if op.kind == "store" or op.dst in live:
+            kept.append(op)
+            live.update(op.srcs)
+    return kept[::-1]
+
+def _allocate(ops, registers) -> tuple:
+    """Linear-scan allocation of Values to `registers`: (assignment, spilled set)"""
+    start, end = {}, {}
+    for position, op in enumerate(ops):
+        for src in op.srcs:
+            end[src] = position
+        if op.dst is not None:
+            start[op.dst] = position
+            end.setdefault(op.dst, position)
+
+    assignment = {}
+    spilled = set()
+    # registers are handed out least recently freed first, so a register is
+    # rewritten as late as possible and the scheduler has room to reorder
+    free = list(registers)
+    active = []         # (end, Value), sorted by end
+    for value in sorted(start, key=lambda value: start[value]):
+        # a register read for the last time here can be written here too
+        while active and active[0][0] <= start[value]:
+            free.append(assignment[active.pop(0)[1]])
+        if free:
+            assignment[value] = free.pop(0)
+        else:
+            # spill whichever interval lives longest
+            last_end, last = active[-1]
+            if last_end > end[value]:
+                assignment[value] = assignment.pop(last)
+                spilled.add(last)
+                active.pop()
+            else:
+                spilled.add(value)
+                continue
+        active.append((end[value], value))
+        active.sort(key=lambda item: (item[0], item[1].index))
+    return assignment, spilled
+
+def _emit(ops, assignment, slots, scratch) -> list:
+    words = []
+
+    def use(value, n):
+        """Register holding `value`, reloading it into scratch register n if it was spilled"""
+        if value in assignment:
+            return assignment[value]
+        reg = scratch[n]
+        if value in slots:
+            words.append(load(reg, 0, _r0_offset(slots[value])))
+        else:
+            words.extend(materialize(const_values[value], reg))
+        return reg
+
+    def define(value):
+        return assignment[value] if value in assignment else scratch[0]
+
+    def spill(value, reg):
+        if value in slots:
+            words.append(store(reg, 0, _r0_offset(slots[value])))
+
+    const_values = {op.dst: op.imm for op in ops if op.kind == "const"}
+    for op in ops:
+        if op.kind == "const":
+            if op.dst in assignment:
+                words.extend(materialize(op.imm, assignment[op.dst]))
+            continue
+
+        regs = [use(src, n) for n, src in enumerate(op.srcs)]
+        if op.kind == "store":
+            words.append(store(regs[0], regs[1] if len(regs) > 1 else 0, op.imm, op.funct))
+            continue
+
+        rd = define(op.dst)
+        if op.kind == "alu":
+            words.append(r_type(op.funct, rd, regs[0], regs[1]))
+        elif op.kind == "alui":
+            words.append(i_type(op.funct, rd, regs[0], op.imm))
+        else:
+            words.append(load(rd, regs[0] if regs else 0, op.imm, op.funct))
+        spill(op.dst, rd)
+    return words
@@ -0,0 +1,102 @@
+import cocotb
+
+from xu.sky_bench import BenchTimer, record
+from xu.sky_isa import NOP, assemble
+from xu.sky_scheduler import schedule, load_use_distance
+from xu.sky_xu_harness import start_clock, run_program, read_data, mem_latency, nonblocking
+
+# Memory-bound workloads run against the data memory latency model. bench.py
+# builds sky_xu once per MEM_LATENCY/NONBLOCKING point of the "latency"
+# sweep; each workload is scheduled twice, for the usual forwarding distance
+# and with loads spaced for the latency, which only pays off when loads
+# complete behind the pipeline.
+
+A_BASE = 0x000
+B_BASE = 0x200
+OUT_BASE = 0x400
+LENGTH = 64
+
+# loaded elements rotate through r1-r8, so the scheduler can run loads ahead
+ELEMENTS = 8
+ACCUMULATORS = [9, 10, 11, 12]
+
+def _a():
+    return [(3 * i) % 29 - 14 for i in range(LENGTH)]
+
+def _b():
+    return [(11 * i) % 13 + 1 for i in range(LENGTH)]
+
+def _reduce():
+    """Sum the accumulators into the first one and store it"""
+    a, b, c, d = ACCUMULATORS
+    return [f"add r{a}, r{a}, r{b}", f"add r{c}, r{c}, r{d}", f"add r{a}, r{a}, r{c}", f"sw r{a}, {OUT_BASE}(r0)"]
+
+def load_alu():
+    """Sum of an array: every load feeds one add"""
+    lines = []
+    for i in range(LENGTH):
+        x, acc = 1 + i % ELEMENTS, ACCUMULATORS[i % 4]
+        lines += [f"lw r{x}, {A_BASE + 4 * i}(r0)", f"add r{acc}, r{acc}, r{x}"]
+    return lines + _reduce()
+
+def copy():
+    """Word copy: every load feeds one store"""
+    lines = []
+    for i in range(LENGTH):
+        x = 1 + i % ELEMENTS
+        lines += [f"lw r{x}, {A_BASE + 4 * i}(r0)", f"sw r{x}, {OUT_BASE + 4 * i}(r0)"]
+    return lines
+
+def dot():
+    """Dot product: two loads per mac"""
+    lines = []
+    for i in range(LENGTH):
+        x, y, acc = 1 + 2 * i % ELEMENTS, 2 + 2 * i % ELEMENTS, ACCUMULATORS[i % 4]
+        lines += [f"lw r{x}, {A_BASE + 4 * i}(r0)", f"lw r{y}, {B_BASE + 4 * i}(r0)", f"mac r{acc}, r{x}, r{y}"]
+    return lines + _reduce()
+
+WORKLOADS = {
+    "load_alu": (load_alu, lambda: [sum(_a()) & 0xFFFFFFFF]),
+    "copy": (copy, lambda: [x & 0xFFFFFFFF for x in _a()]),
+    "dot": (dot, lambda: [sum(a * b for a, b in zip(_a(), _b())) & 0xFFFFFFFF]),
+}
+
+async def bench_workload(dut, name):
+    start_clock(dut)
+    latency = mem_latency(dut)
+    mode = "nonblocking" if nonblocking(dut) else "blocking"
+    build, expected = WORKLOADS[name]
+    expected = expected()
+    program = assemble("\n".join(build()))
+
+    for scheduling, load_distance in (("plain", None), ("aware", load_use_distance(latency))):
+        scheduled = schedule(program, load_distance=load_distance).program
+        timer = BenchTimer()
+        stats = await run_program(dut, scheduled, data={A_BASE: _a(), B_BASE: _b()})
+        got = read_data(dut, OUT_BASE, len(expected))
+        assert got == expected, f"{name} {scheduling}: got {got[:4]}..., expected {expected[:4]}..."
+        record(
+            f"latency{latency}_{mode}_{name}_{scheduling}", timer,
+            mem_latency=latency,
+            nonblocking=int(mode == "nonblocking"),
+            instructions=sum(word != NOP for word in scheduled),
+            retired=stats.retired,
+            core_cycles=stats.cycles,
+            ipc=round(stats.ipc, 4),
+            stalls=stats.stalls,
+        )
+
+@cocotb.test
+async def bench_latency_load_alu(dut):
+    """Array sum: a load and an add per element"""
+    await bench_workload(dut, "load_alu")
+
+@cocotb.test
+async def bench_latency_copy(dut):
+    """Array copy: a load and a store per element"""
+    await bench_workload(dut, "copy")
+
+@cocotb.test
+async def bench_latency_dot(dut):
+    """Dot product: two loads and a mac per element"""
+    await bench_workload(dut, "dot")
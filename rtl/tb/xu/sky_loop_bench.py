@@ -0,0 +1,148 @@
+import cocotb
+
+from xu.sky_bench import BenchTimer, record
+from xu.sky_isa import NOP, assemble
+from xu.sky_scheduler import schedule, schedule_loop, join, predicted_cycles
+from xu.sky_xu_harness import start_clock, run_program, read_data, issue_width
+
+# Dot product and FIR kernels written three ways: unrolled with a mul and an
+# add per term (the ISA before mac), unrolled with a mac per term, and as a
+# hardware loop around a mac body that walks the arrays with pointers. The
+# XU has no branches, so the loop replaces unrolling rather than a counter
+# and compare: it shrinks the program and pays for pointer updates instead.
+
+X_BASE = 0x000
+Y_BASE = 0x200
+OUT_BASE = 0x400
+
+DOT_LENGTH = 128
+FIR_TAPS = [3, -1, 4, 2]
+FIR_OUTPUTS = 64
+
+# elements are loaded into r1-r8, taps live in r1-r4
+X_PTR, Y_PTR = 13, 14
+ACCUMULATORS = [9, 10, 11, 12]
+
+def _x(length):
+    return [(7 * i) % 23 - 11 for i in range(length)]
+
+def _y(length):
+    return [(5 * i) % 17 + 1 for i in range(length)]
+
+def _reduce():
+    """Sum the accumulators into the first one"""
+    a, b, c, d = ACCUMULATORS
+    return [f"add r{a}, r{a}, r{b}", f"add r{c}, r{c}, r{d}", f"add r{a}, r{a}, r{c}"]
+
+def dot_unrolled(fused, width):
+    """Every term at its own immediate offset, spread over four accumulators"""
+    lines = []
+    for i in range(DOT_LENGTH):
+        x, y, acc = 1 + i % 4, 5 + i % 4, ACCUMULATORS[i % 4]
+        lines += [f"lw r{x}, {X_BASE + 4 * i}(r0)", f"lw r{y}, {Y_BASE + 4 * i}(r0)"]
+        if fused:
+            lines.append(f"mac r{acc}, r{x}, r{y}")
+        else:
+            lines += [f"mul r{x}, r{x}, r{y}", f"add r{acc}, r{acc}, r{x}"]
+    lines += _reduce() + [f"sw r{ACCUMULATORS[0]}, {OUT_BASE}(r0)"]
+    return schedule(assemble("\n".join(lines)), issue_width=width).program
+
+def dot_loop(width, unroll=4):
+    """Four terms per iteration, one per accumulator"""
+    body = []
+    for j in range(unroll):
+        body += [f"lw r{1 + j}, {4 * j}(r{X_PTR})", f"lw r{5 + j}, {4 * j}(r{Y_PTR})", f"mac r{ACCUMULATORS[j]}, r{1 + j}, r{5 + j}"]
+    body += [f"addi r{X_PTR}, r{X_PTR}, {4 * unroll}", f"addi r{Y_PTR}, r{Y_PTR}, {4 * unroll}"]
+    prologue = [f"addi r{X_PTR}, r0, {X_BASE}", f"addi r{Y_PTR}, r0, {Y_BASE}"]
+    epilogue = _reduce() + [f"sw r{ACCUMULATORS[0]}, {OUT_BASE}(r0)"]
+    return join([
+        schedule(assemble("\n".join(prologue)), issue_width=width).program,
+        schedule_loop(assemble("\n".join(body)), DOT_LENGTH // unroll, issue_width=width).program,
+        schedule(assemble("\n".join(epilogue)), issue_width=width).program,
+    ], issue_width=width)
+
+def _load_taps():
+    """Taps into r1-r4"""
+    return [f"addi r{1 + k}, r0, {tap}" for k, tap in enumerate(FIR_TAPS)]
+
+def fir_unrolled(fused, width):
+    """out[i] = sum(taps[k] * x[i + k]), every output written out"""
+    lines = _load_taps()
+    for i in range(FIR_OUTPUTS):
+        acc, x = ACCUMULATORS[i % 4], 5 + i % 4
+        for k in range(len(FIR_TAPS)):
+            lines.append(f"lw r{x}, {X_BASE + 4 * (i + k)}(r0)")
+            if k == 0:
+                lines.append(f"mul r{acc}, r{1 + k}, r{x}")
+            elif fused:
+                lines.append(f"mac r{acc}, r{1 + k}, r{x}")
+            else:
+                lines += [f"mul r{x}, r{1 + k}, r{x}", f"add r{acc}, r{acc}, r{x}"]
+        lines.append(f"sw r{acc}, {OUT_BASE + 4 * i}(r0)")
+    return schedule(assemble("\n".join(lines)), issue_width=width).program
+
+def fir_loop(width, unroll=2):
+    """`unroll` outputs per iteration, sharing the loaded window"""
+    window = len(FIR_TAPS) + unroll - 1
+    body = [f"lw r{5 + k}, {4 * k}(r{X_PTR})" for k in range(window)]
+    # the top accumulators, clear of the window loaded into r5 up
+    accumulators = ACCUMULATORS[len(ACCUMULATORS) - unroll:]
+    for j, acc in enumerate(accumulators):
+        body.append(f"mul r{acc}, r1, r{5 + j}")
+        body += [f"mac r{acc}, r{1 + k}, r{5 + j + k}" for k in range(1, len(FIR_TAPS))]
+        body.append(f"sw r{acc}, {4 * j}(r{Y_PTR})")
+    body += [f"addi r{X_PTR}, r{X_PTR}, {4 * unroll}", f"addi r{Y_PTR}, r{Y_PTR}, {4 * unroll}"]
+    prologue = _load_taps() + [f"addi r{X_PTR}, r0, {X_BASE}", f"addi r{Y_PTR}, r0, {OUT_BASE}"]
+    return join([
+        schedule(assemble("\n".join(prologue)), issue_width=width).program,
+        schedule_loop(assemble("\n".join(body)), FIR_OUTPUTS // unroll, issue_width=width).program,
+    ], issue_width=width)
+
+def dot_expected():
+    return [sum(a * b for a, b in zip(_x(DOT_LENGTH), _y(DOT_LENGTH))) & 0xFFFFFFFF]
+
+def fir_expected():
+    x = _x(FIR_OUTPUTS + len(FIR_TAPS))
+    return [sum(tap * x[i + k] for k, tap in enumerate(FIR_TAPS)) & 0xFFFFFFFF for i in range(FIR_OUTPUTS)]
+
+KERNELS = {
+    "dot": ({"mul_add": lambda width: dot_unrolled(False, width), "mac": lambda width: dot_unrolled(True, width), "loop": dot_loop},
+            {X_BASE: _x(DOT_LENGTH), Y_BASE: _y(DOT_LENGTH)}, dot_expected),
+    "fir": ({"mul_add": lambda width: fir_unrolled(False, width), "mac": lambda width: fir_unrolled(True, width), "loop": fir_loop},
+            {X_BASE: _x(FIR_OUTPUTS + len(FIR_TAPS))}, fir_expected),
+}
+
+async def bench_kernel(dut, name):
+    start_clock(dut)
+    width = issue_width(dut)
+    variants, data, expected = KERNELS[name]
+    expected = expected()
+    instructions = {}
+    for variant, build in variants.items():
+        program = build(width)
+        instructions[variant] = sum(word != NOP for word in program)
+
+        timer = BenchTimer()
+        stats = await run_program(dut, program, data=data)
+        got = read_data(dut, OUT_BASE, len(expected))
+        assert got == expected, f"{name} {variant}: got {got[:4]}..., expected {expected[:4]}..."
+        assert stats.cycles == predicted_cycles(program, width), f"{name} {variant}: predicted {predicted_cycles(program, width)} cycles, took {stats.cycles}"
+        record(
+            f"loop{width}_{name}_{variant}", timer,
+            issue_width=width,
+            instructions=instructions[variant],
+            retired=stats.retired,
+            core_cycles=stats.cycles,
+            ipc=round(stats.ipc, 4),
+        )
+    cocotb.log.info(f"{name}: {instructions['mul_add']} -> {instructions['mac']} (mac) -> {instructions['loop']} (loop) instructions")
+
+@cocotb.test
+async def bench_loop_dot(dut):
+    """Dot product: mul and add, mac, mac in a hardware loop"""
+    await bench_kernel(dut, "dot")
+
+@cocotb.test
+async def bench_loop_fir(dut):
+    """Four-tap FIR filter: mul and add, mac, mac in a hardware loop"""
+    await bench_kernel(dut, "fir")
@@ -0,0 +1,168 @@
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge
+
+# Transaction-level access to the bundles passed between pipeline stages.
+# Each transaction class lists its fields and the port names used on the
+# producing stage's outputs and on the consuming stage's inputs, so the same
+# transaction can be driven into one stage and monitored out of the previous.
+
+class Transaction:
+    __slots__ = ()
+    _producer_ports = {}
+    _consumer_ports = {}
+
+    def __init__(self, *args, **kwargs):
+        for name, value in zip(self.__slots__, args):
+            setattr(self, name, value)
+        for name in self.__slots__[len(args):]:
+            setattr(self, name, kwargs.pop(name, 0))
+        if kwargs:
+            raise TypeError(f"unknown {type(self).__name__} field(s): {', '.join(kwargs)}")
+
+    def as_tuple(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_tuple() == other.as_tuple()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}=0x{getattr(self, name):x}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class FetchDecodeTxn(Transaction):
+    __slots__ = ("pc", "instruction")
+    _producer_ports = {"pc": "pc_out", "instruction": "instruction"}
+    _consumer_ports = {"pc": "pc_in", "instruction": "instruction"}
+
+class DecodeExecuteTxn(Transaction):
+    __slots__ = ("pc", "operand_a", "operand_b", "operand_c", "rd_addr", "alu_op", "mem_read", "mem_write", "reg_write", "store_data", "mem_size", "atomic")
+    _producer_ports = {
+        "pc": "pc_out",
+        "operand_a": "operand_a",
+        "operand_b": "operand_b",
+        "operand_c": "operand_c",
+        "rd_addr": "rd_addr",
+        "alu_op": "alu_op",
+        "mem_read": "mem_read",
+        "mem_write": "mem_write",
+        "reg_write": "reg_write",
+        "store_data": "store_data",
+        "mem_size": "mem_size",
+        "atomic": "mem_atomic",
+    }
+    _consumer_ports = {**_producer_ports, "pc": "pc_in"}
+
+class ExecuteMemoryTxn(Transaction):
+    __slots__ = ("result", "mem_addr", "mem_write_data", "rd_addr", "mem_read", "mem_write", "reg_write", "mem_size", "atomic")
+    _producer_ports = {
+        "result": "result",
+        "mem_addr": "mem_addr",
+        "mem_write_data": "mem_write_data",
+        "rd_addr": "wb_rd_addr",
+        "mem_read": "wb_mem_read",
+        "mem_write": "wb_mem_write",
+        "reg_write": "wb_reg_write",
+        "mem_size": "wb_mem_size",
+        "atomic": "wb_mem_atomic",
+    }
+    _consumer_ports = {
+        **_producer_ports,
+        "result": "result_in",
+        "rd_addr": "wb_rd_addr_in",
+        "reg_write": "wb_reg_write_in",
+        "mem_size": "wb_mem_size_in",
+    }
+
+class MemoryWritebackTxn(Transaction):
+    __slots__ = ("result", "mem_data", "rd_addr", "reg_write", "from_mem", "mem_size", "byte_offset")
+    _producer_ports = {
+        "result": "result_out",
+        "mem_data": "mem_data",
+        "rd_addr": "wb_rd_addr_out",
+        "reg_write": "wb_reg_write_out",
+        "from_mem": "wb_from_mem",
+        "mem_size": "wb_mem_size_out",
+        "byte_offset": "wb_byte_offset",
+    }
+    _consumer_ports = {
+        "result": "result_in",
+        "mem_data": "mem_data",
+        "rd_addr": "wb_rd_addr",
+        "reg_write": "wb_reg_write",
+        "from_mem": "wb_from_mem",
+        "mem_size": "wb_mem_size",
+        "byte_offset": "wb_byte_offset",
+    }
+
+class WritebackForwardTxn(Transaction):
+    """Register file write from writeback, forwarded into decode"""
+    __slots__ = ("reg_write", "write_addr", "write_data")
+    _producer_ports = {"reg_write": "rf_write_enable", "write_addr": "rf_write_addr", "write_data": "rf_write_data"}
+    _consumer_ports = {"reg_write": "wb_reg_write", "write_addr": "wb_write_addr", "write_data": "wb_write_data"}
+
+class Driver:
+    """Drives a transaction onto a stage's input ports, all fields in one batch"""
+
+    def __init__(self, dut, txn_type):
+        self.txn_type = txn_type
+        self.ports = [(name, getattr(dut, port)) for name, port in txn_type._consumer_ports.items()]
+
+    def drive(self, txn):
+        for name, handle in self.ports:
+            handle.value = getattr(txn, name)
+
+    def idle(self):
+        self.drive(self.txn_type())
+
+class Monitor:
+    """Samples a stage's output ports into transactions"""
+
+    def __init__(self, dut, txn_type):
+        self.txn_type = txn_type
+        self.handles = [getattr(dut, port) for port in txn_type._producer_ports.values()]
+
+    def sample(self):
+        return self.txn_type(*(int(handle.value) for handle in self.handles))
+
+class StreamMonitor(Monitor):
+    """Collects one transaction per rising edge, sampled just before the edge"""
+
+    def __init__(self, dut, txn_type, clk):
+        super().__init__(dut, txn_type)
+        self.clk = clk
+        self.transactions = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await RisingEdge(self.clk)
+            self.transactions.append(self.sample())
+
+    def start(self):
+        self._task = cocotb.start_soon(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.kill()
+            self._task = None
+
+async def start_stage(dut, *drivers):
+    """Start the clock, put every driver's bundle in its idle state and reset the stage"""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    for driver in drivers:
+        driver.idle()
+    if hasattr(dut, "stall"):
+        dut.stall.value = 0
+    dut.reset.value = 1
+    await RisingEdge(dut.clk)
+    dut.reset.value = 0
+    await RisingEdge(dut.clk)
+
+async def stream(dut, driver, txns, sideband=None):
+    """Drive one transaction per cycle; `sideband(txn)` can set any other inputs for that cycle"""
+    for txn in txns:
+        driver.drive(txn)
+        if sideband is not None:
+            sideband(txn)
+        await RisingEdge(dut.clk)
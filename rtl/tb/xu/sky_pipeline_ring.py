@@ -0,0 +1,105 @@
+import functools
+import os
+from collections import deque
+
+import cocotb
+from cocotb.triggers import RisingEdge
+
+# cycles of pipeline state kept per test; 0 disables sampling entirely
+RING_ENV = "SKY_TRACE_RING"
+
+# (column, signal path relative to sky_xu)
+PIPELINE_SIGNALS = [
+    ("if_pc", "fetch.issue_pc"),
+    ("id_pc", "fetch.pc_out"),
+    ("id_instr", "fetch.instruction"),
+    ("ex_pc", "decode.pc_out"),
+    ("ex_rd", "decode.rd_addr"),
+    ("ex_op", "decode.alu_op"),
+    ("ex_a", "decode.operand_a"),
+    ("ex_b", "decode.operand_b"),
+    ("mem_rd", "execute.wb_rd_addr"),
+    ("mem_result", "execute.result"),
+    ("mem_rd_en", "mem_read_en"),
+    ("mem_wr_en", "mem_write_en"),
+    ("mem_addr", "mem_address"),
+    ("wb_en", "rf_write_enable"),
+    ("wb_rd", "rf_write_addr"),
+    ("wb_data", "rf_write_data"),
+]
+
+def ring_depth() -> int:
+    return int(os.getenv(RING_ENV, "0"))
+
+def _resolve(dut, path):
+    handle = dut
+    for name in path.split("."):
+        handle = getattr(handle, name)
+    return handle
+
+def _format(value):
+    try:
+        return f"{int(value):x}"
+    except ValueError:
+        return str(value)  # x/z bits
+
+class PipelineRing:
+    """Keeps the last `depth` cycles of sky_xu pipeline state for post-mortem dumps"""
+
+    def __init__(self, dut, depth):
+        self.dut = dut
+        self.columns = [column for column, _ in PIPELINE_SIGNALS]
+        self.handles = [_resolve(dut, path) for _, path in PIPELINE_SIGNALS]
+        self.samples = deque(maxlen=depth)
+        self.cycle = 0
+        self._task = None
+
+    async def _sample(self):
+        while True:
+            await RisingEdge(self.dut.clk)
+            self.cycle += 1
+            self.samples.append((self.cycle, [handle.value for handle in self.handles]))
+
+    def start(self):
+        self._task = cocotb.start_soon(self._sample())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.kill()
+            self._task = None
+
+    def format(self) -> str:
+        rows = [["cycle"] + self.columns]
+        for cycle, values in self.samples:
+            rows.append([str(cycle)] + [_format(value) for value in values])
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows)
+
+    def dump(self, path):
+        table = self.format()
+        with open(path, "w") as f:
+            f.write(table + "\n")
+        self.dut._log.error(f"last {len(self.samples)} cycles of pipeline state (also in {path}):\n{table}")
+
+def dump_on_failure(test_func):
+    """Sample pipeline state while the test runs and dump the ring buffer if an assertion fails
+
+    Place under @cocotb.test. Sampling is only enabled when SKY_TRACE_RING is set.
+    """
+    @functools.wraps(test_func)
+    async def wrapper(dut, *args, **kwargs):
+        depth = ring_depth()
+        if depth <= 0:
+            return await test_func(dut, *args, **kwargs)
+
+        ring = PipelineRing(dut, depth)
+        ring.start()
+        try:
+            return await test_func(dut, *args, **kwargs)
+        except AssertionError:
+            ring.dump(f"pipeline_ring_{test_func.__name__}.txt")
+            raise
+        finally:
+            ring.stop()
+
+    return wrapper
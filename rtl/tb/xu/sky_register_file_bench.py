@@ -0,0 +1,45 @@
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge
+
+import random
+
+from xu.sky_bench import BenchTimer, record
+
+NUM_BURSTS = 500
+
+@cocotb.test
+async def bench_register_file_bursts(dut):
+    """Alternate bursts writing all 15 registers with bursts reading them back on both ports"""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    dut.reset.value = 1
+    await RisingEdge(dut.clk)
+    dut.reset.value = 0
+    dut.write_enable.value = 0
+    await RisingEdge(dut.clk)
+
+    rng = random.Random(0)
+    writes = 0
+    reads = 0
+
+    timer = BenchTimer()
+    for _ in range(NUM_BURSTS):
+        values = [rng.getrandbits(32) for _ in range(16)]
+
+        dut.write_enable.value = 1
+        for reg in range(1, 16):
+            dut.write_addr.value = reg
+            dut.write_data.value = values[reg]
+            await RisingEdge(dut.clk)
+            writes += 1
+        dut.write_enable.value = 0
+
+        for reg in range(1, 16):
+            dut.read_addr1.value = reg
+            dut.read_addr2.value = 16 - reg
+            await RisingEdge(dut.clk)
+            assert dut.read_data1.value == values[reg], f"read1 from r{reg} failed"
+            assert dut.read_data2.value == values[16 - reg], f"read2 from r{16 - reg} failed"
+            reads += 2
+
+    record("register_file_bursts", timer, writes=writes, reads=reads)
@@ -0,0 +1,257 @@
+import math
+from dataclasses import dataclass, field
+
+import cocotb
+from cocotb.queue import Queue
+from cocotb.triggers import Event, RisingEdge
+from cocotb.utils import get_sim_time
+
+from xu.sky_bench import CLOCK_PERIOD_NS
+from xu.sky_dma import DmaDescriptor, DmaHost
+from xu.sky_isa import OPC_LOAD, OPC_STORE, OPC_ATOMIC, NOP, decode_fields, sign_extend
+from xu.sky_xu_harness import INSTR_MEM_WORDS, DATA_MEM_WORDS, reset_xu, read_data
+
+# Host runtime: drives sky_xu the way host software drives an accelerator.
+# launch() only queues work; a worker task drains the command queue, loading
+# programs into one of two instruction memory slots, streaming arguments in
+# through the DMA engine, starting kernels through the launch port and polling
+# for completion. While one kernel runs, the next one's program and arguments
+# are already being written, unless its arguments would overwrite data the
+# running kernel can touch.
+#
+#   runtime = Runtime(dut)
+#   await runtime.start()
+#   runtime.launch(compiled, args=lambda i: {"x": inputs[i]}, grid=8)
+#   launches = await runtime.synchronize()
+
+# instruction memory is split into slots so one program can load while another runs
+PROGRAM_SLOTS = 2
+SLOT_WORDS = INSTR_MEM_WORDS // PROGRAM_SLOTS
+
+# modeled host bus costs for the transfers that have no port on the chip yet
+LOAD_WORDS_PER_CYCLE = 1        # program words into instruction memory
+READ_WORDS_PER_CYCLE = 1        # result words out of data memory
+
+# cycles between completion polls
+POLL_INTERVAL = 8
+
+def footprint(program):
+    """Data memory words a program can access, or None if any address depends on a register"""
+    words = set()
+    for word in program:
+        opcode, rs1, _, _, _, imm = decode_fields(word)
+        if opcode in (OPC_LOAD, OPC_STORE, OPC_ATOMIC):
+            if rs1 != 0:
+                return None
+            # the address is the sign-extended imm, wrapped like _arg_words
+            words.add((sign_extend(imm) >> 2) % DATA_MEM_WORDS)
+    return words
+
+def _arg_words(args) -> set:
+    return {((base >> 2) + i) % DATA_MEM_WORDS for base, words in args.items() for i in range(len(words))}
+
+@dataclass
+class Launch:
+    index: int
+    program: list
+    args: dict                  # byte address -> words written before the start
+    outputs: dict               # name -> (byte address, words) read back after completion
+    footprint: object           # set of data memory words, None if unknown
+    submitted: int              # cycle launch() was called in
+    slot: int = None            # instruction memory slot it ran from
+    started: int = None         # cycle the launch port was pulsed in
+    finished: int = None        # cycle completion was seen
+    completed: int = None       # cycle the outputs were read back
+    results: dict = field(default_factory=dict)
+    done: Event = field(default_factory=Event)
+
+    @property
+    def latency(self) -> int:
+        return self.completed - self.submitted
+
+    @property
+    def run_cycles(self) -> int:
+        return self.finished - self.started
+
+@dataclass
+class RuntimeStats:
+    launches: int
+    cycles: int                 # first submission to last completion
+    mean_latency: float
+    max_latency: int
+
+    @property
+    def throughput(self) -> float:
+        """Launches completed per 1000 cycles"""
+        return 1000 * self.launches / self.cycles if self.cycles else 0.0
+
+class Runtime:
+    """Asynchronous kernel launches on a full-core DUT"""
+
+    def __init__(self, dut, pipelined=True, poll_interval=POLL_INTERVAL):
+        self.dut = dut
+        self.pipelined = pipelined
+        self.poll_interval = poll_interval
+        self.commands = Queue()
+        self.launches = []
+        self._dma = DmaHost(dut)
+        self._slots = [None] * PROGRAM_SLOTS
+        self._worker = None
+
+    def now(self) -> int:
+        return int(get_sim_time("ns") // CLOCK_PERIOD_NS)
+
+    async def start(self):
+        """Reset the XU with instruction memory cleared and park it until the first launch"""
+        for i in range(INSTR_MEM_WORDS):
+            self.dut.fetch.instr_mem[i].value = NOP
+        await reset_xu(self.dut)
+        await self._pulse_launch(0, 0)
+        self._slots = [None] * PROGRAM_SLOTS
+        self._worker = cocotb.start_soon(self._run())
+
+    def launch(self, kernel, args=None, grid=1, outputs=None) -> list:
+        """Queue `grid` launches of a kernel
+
+        `kernel` is a CompiledKernel or a list of instruction words. `args` maps
+        byte addresses, or array names of a CompiledKernel, to words; it can
+        also be a function of the grid index returning such a mapping.
+        `outputs` maps names to (byte address, words) to read back; by default
+        a CompiledKernel's arrays that have neither initial contents nor
+        arguments are read.
+        """
+        program, arrays, defaults = self._kernel(kernel)
+        if len(program) > SLOT_WORDS:
+            raise ValueError(f"program of {len(program)} words does not fit a {SLOT_WORDS}-word slot")
+
+        queued = []
+        for i in range(grid):
+            instance = args(i) if callable(args) else (args or {})
+            if outputs is None:
+                reads = {
+                    name: (array.base, array.length) for name, array in arrays.items()
+                    if array.init is None and name not in instance
+                }
+            else:
+                reads = outputs
+            data = dict(defaults)
+            for key, words in instance.items():
+                data[arrays[key].base if isinstance(key, str) else key] = [word & 0xFFFFFFFF for word in words]
+            launch = Launch(
+                index=len(self.launches),
+                program=list(program),
+                args=data,
+                outputs=dict(reads),
+                footprint=footprint(program),
+                submitted=self.now(),
+            )
+            self.launches.append(launch)
+            self.commands.put_nowait(launch)
+            queued.append(launch)
+        return queued
+
+    def stop(self):
+        """Stop the worker; launches still queued are dropped"""
+        if self._worker is not None:
+            self._worker.kill()
+            self._worker = None
+
+    async def synchronize(self) -> list:
+        """Wait for every launch queued so far"""
+        for launch in list(self.launches):
+            await launch.done.wait()
+        return self.launches
+
+    def stats(self) -> RuntimeStats:
+        done = [launch for launch in self.launches if launch.completed is not None]
+        latencies = [launch.latency for launch in done]
+        return RuntimeStats(
+            launches=len(done),
+            cycles=max(l.completed for l in done) - min(l.submitted for l in done) if done else 0,
+            mean_latency=sum(latencies) / len(latencies) if latencies else 0.0,
+            max_latency=max(latencies, default=0),
+        )
+
+    @staticmethod
+    def _kernel(kernel):
+        """(program, arrays by name, initial data) for a CompiledKernel or a word list"""
+        if hasattr(kernel, "program"):
+            return kernel.program, kernel.arrays, kernel.data
+        return list(kernel), {}, {}
+
+    async def _run(self):
+        running = None
+        while True:
+            if running is not None and self.commands.empty():
+                # nothing to overlap with, so just wait for it
+                await self._finish(running)
+                running = None
+            launch = await self.commands.get()
+
+            if running is not None and (not self.pipelined or self._conflicts(running, launch)):
+                await self._finish(running)
+                running = None
+            slot = await self._load(launch, running)
+            await self._write_args(launch)
+            if running is not None:
+                await self._finish(running)
+            await self._start(launch, slot)
+            running = launch
+
+    @staticmethod
+    def _conflicts(running, launch) -> bool:
+        """Whether writing `launch`'s arguments could change what `running` reads or writes"""
+        return running.footprint is None or bool(running.footprint & _arg_words(launch.args))
+
+    async def _cycles(self, count):
+        for _ in range(count):
+            await RisingEdge(self.dut.clk)
+
+    async def _load(self, launch, running) -> int:
+        """Slot holding the launch's program, loading it into one the running kernel isn't using"""
+        program = tuple(launch.program)
+        if program in self._slots:
+            return self._slots.index(program)
+        busy = running.slot if running is not None else None
+        slot = next(i for i in range(PROGRAM_SLOTS) if i != busy)
+        base = slot * SLOT_WORDS
+        for i, word in enumerate(program):
+            self.dut.fetch.instr_mem[base + i].value = word
+        self._slots[slot] = program
+        await self._cycles(math.ceil(len(program) / LOAD_WORDS_PER_CYCLE))
+        return slot
+
+    async def _write_args(self, launch):
+        for base, words in launch.args.items():
+            if words:
+                self._dma.queue(DmaDescriptor.from_host(base, words))
+        self._dma.start()
+        await self._dma.wait()
+
+    async def _pulse_launch(self, pc, count):
+        self.dut.launch_pc.value = pc
+        self.dut.launch_count.value = count
+        self.dut.launch.value = 1
+        await RisingEdge(self.dut.clk)
+        self.dut.launch.value = 0
+
+    async def _start(self, launch, slot):
+        launch.slot = slot
+        launch.started = self.now()
+        await self._pulse_launch(4 * slot * SLOT_WORDS, len(launch.program))
+
+    async def _finish(self, launch):
+        # flags read after an edge are the ones it sampled, so the first poll
+        # comes at least one edge after the launch pulse
+        while True:
+            await self._cycles(self.poll_interval)
+            if self.dut.done.value:
+                break
+        launch.finished = self.now()
+        words = 0
+        for name, (base, count) in launch.outputs.items():
+            launch.results[name] = read_data(self.dut, base, count)
+            words += count
+        await self._cycles(math.ceil(words / READ_WORDS_PER_CYCLE))
+        launch.completed = self.now()
+        launch.done.set()
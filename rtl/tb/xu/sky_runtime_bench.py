@@ -0,0 +1,69 @@
+import cocotb
+
+from xu.sky_bench import BenchTimer, record
+from xu.sky_kernel import Kernel
+from xu.sky_runtime import Runtime
+from xu.sky_xu_harness import start_clock
+
+# Launch latency and throughput through the host runtime, with the command
+# queue pipelined (next program and arguments written while a kernel runs)
+# and serialized. The double-buffered workload alternates two copies of a
+# kernel on separate buffers; the single-buffered one reuses one buffer, so
+# the runtime has to wait before writing the next arguments.
+
+LAUNCHES = 16
+LENGTH = 32
+
+def saxpy_kernel(base, length=LENGTH, a=5):
+    """y[i] = a * x[i] + y[i] on arrays starting at `base`"""
+    k = Kernel()
+    xs = k.array("x", base, length=length)
+    ys = k.array("y", base + 4 * length, length=length)
+    out = k.array("out", base + 8 * length, length=length)
+    for i in range(length):
+        out[i] = xs[i] * a + ys[i]
+    return k.compile()
+
+WORKLOADS = {
+    "double_buffered": lambda: [saxpy_kernel(0x000), saxpy_kernel(0x400)],
+    "single_buffered": lambda: [saxpy_kernel(0x000)],
+}
+
+async def bench_launches(dut, workload, pipelined):
+    start_clock(dut)
+    kernels = WORKLOADS[workload]()
+
+    timer = BenchTimer()
+    runtime = Runtime(dut, pipelined=pipelined)
+    await runtime.start()
+    for i in range(LAUNCHES):
+        args = {"x": [i + j for j in range(LENGTH)], "y": [7 * j for j in range(LENGTH)]}
+        runtime.launch(kernels[i % len(kernels)], args=args)
+    launches = await runtime.synchronize()
+    runtime.stop()
+    stats = runtime.stats()
+
+    record(
+        f"runtime_{workload}_{'pipelined' if pipelined else 'serialized'}", timer,
+        launches=stats.launches,
+        core_cycles=stats.cycles,
+        launches_per_kcycle=round(stats.throughput, 3),
+        mean_latency=round(stats.mean_latency, 1),
+        max_latency=stats.max_latency,
+        mean_run_cycles=round(sum(launch.run_cycles for launch in launches) / len(launches), 1),
+    )
+
+@cocotb.test
+async def bench_runtime_double_buffered_pipelined(dut):
+    """Alternating buffers, next launch prepared while the current one runs"""
+    await bench_launches(dut, "double_buffered", pipelined=True)
+
+@cocotb.test
+async def bench_runtime_double_buffered_serialized(dut):
+    """Alternating buffers, one launch at a time"""
+    await bench_launches(dut, "double_buffered", pipelined=False)
+
+@cocotb.test
+async def bench_runtime_single_buffered_pipelined(dut):
+    """One buffer, so arguments can't be written ahead"""
+    await bench_launches(dut, "single_buffered", pipelined=True)
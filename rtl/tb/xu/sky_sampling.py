@@ -0,0 +1,142 @@
+import json
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, asdict
+
+import cocotb
+
+from xu.sky_isa import read_program
+from xu.sky_iss import XuIss
+from xu.sky_xu_harness import PIPELINE_DEPTH, start_clock, run_program
+
+# Sampled simulation: the ISS fast-forwards through the program and, at evenly
+# spaced sample points, its architectural state is restored into sky_xu for a
+# short detailed window. The first `warmup` instructions of each window refill
+# the pipeline and are not measured; CPI over the rest of the window gives one
+# sample, and whole-program cycles are extrapolated from the sample mean.
+
+# settings for the sample_program test, see tb/sample.py
+PROGRAM_ENV = "SKY_SAMPLE_PROGRAM"
+CONFIG_ENV = "SKY_SAMPLE_CONFIG"
+RESULTS_ENV = "SKY_SAMPLE_RESULTS"
+
+# two-sided 95% critical values of Student's t by degrees of freedom
+_T95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+    10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980,
+}
+
+def t95(dof) -> float:
+    """Student's t critical value, rounding the degrees of freedom down to the table"""
+    if dof <= 0:
+        return float("inf")
+    keys = [key for key in _T95 if key <= dof]
+    return _T95[max(keys)] if dof <= 120 else 1.960
+
+@dataclass
+class SampledResult:
+    instructions: int       # whole program
+    detailed: int           # instructions simulated on the RTL (warm-up included)
+    samples: list           # measured CPI per window
+    cpi: float
+    cycles: float           # extrapolated whole-program cycles
+    cycles_ci: tuple        # 95% confidence interval on cycles
+    ipc: float
+    ipc_ci: tuple
+    wall_time_s: float
+
+def sample_points(length, samples, span, seed=None) -> list:
+    """Start indices of `samples` windows of `span` instructions, systematically spaced
+
+    With a seed, the whole grid is shifted by a random offset within one stride.
+    """
+    samples = max(1, min(samples, (length - span) // span + 1))
+    stride = (length - span) / samples
+    offset = random.Random(seed).uniform(0, stride) if seed is not None else stride / 2
+    return [min(int(offset + i * stride), length - span) for i in range(samples)]
+
+def estimate(length, cpis, window, wall_time_s=0.0, detailed=0) -> SampledResult:
+    """Extrapolate whole-program cycles and IPC from per-window CPI samples"""
+    count = len(cpis)
+    if count == 0:
+        raise ValueError("no CPI samples to estimate from")
+    mean = sum(cpis) / count
+    if count > 1:
+        variance = sum((cpi - mean) ** 2 for cpi in cpis) / (count - 1)
+        # windows are drawn without replacement from the program
+        fpc = max(0.0, 1 - count * window / length)
+        half_width = t95(count - 1) * math.sqrt(variance / count * fpc)
+    else:
+        half_width = float("inf")
+
+    fill = PIPELINE_DEPTH + 1
+    cycles = length * mean + fill
+    low = length * max(mean - half_width, 0.0) + fill
+    high = length * (mean + half_width) + fill
+    return SampledResult(
+        instructions=length,
+        detailed=detailed,
+        samples=cpis,
+        cpi=mean,
+        cycles=cycles,
+        cycles_ci=(low, high),
+        ipc=length / cycles,
+        ipc_ci=(length / high if high != float("inf") else 0.0, length / low),
+        wall_time_s=wall_time_s,
+    )
+
+async def sampled_run(dut, program, data=None, samples=10, window=100, warmup=20, seed=None) -> SampledResult:
+    """Estimate cycles and IPC of a straight-line program from detailed RTL windows
+
+    Needs at least one warm-up instruction so every window is measured from a
+    full pipeline, and at least one measured instruction per window.
+    """
+    if window < 1:
+        raise ValueError(f"window must be at least 1 instruction, got {window}")
+    start = time.perf_counter()
+    warmup = max(warmup, 1)
+    length = len(program)
+    span = warmup + window
+
+    if span >= length:
+        # too short to sample, simulate all of it
+        stats = await run_program(dut, program, data=data)
+        cycles = (stats.cycles, stats.cycles)
+        return SampledResult(length, length, [], stats.cycles / length, stats.cycles, cycles,
+                             stats.ipc, (stats.ipc, stats.ipc), time.perf_counter() - start)
+
+    iss = XuIss(program, data)
+    cpis = []
+    detailed = 0
+    for point in sample_points(length, samples, span, seed):
+        iss.run_to(4 * point)
+        end = min(point + span, length)
+        stats = await run_program(dut, program[:end], checkpoint=iss.checkpoint())
+        detailed += stats.retired
+
+        measured = stats.retire_cycles[min(warmup, stats.retired) - 1:]
+        if len(measured) > 1:
+            cpis.append((measured[-1] - measured[0]) / (len(measured) - 1))
+
+    return estimate(length, cpis, window, time.perf_counter() - start, detailed)
+
+@cocotb.test
+async def sample_program(dut):
+    """Sampled run of the program in SKY_SAMPLE_PROGRAM, results to SKY_SAMPLE_RESULTS"""
+    path = os.getenv(PROGRAM_ENV)
+    assert path, f"{PROGRAM_ENV} is not set"
+    config = json.loads(os.getenv(CONFIG_ENV, "{}"))
+    start_clock(dut)
+
+    result = await sampled_run(dut, read_program(path), **config)
+    dut._log.info(
+        f"{result.instructions} instructions, {result.detailed} detailed: "
+        f"cycles {result.cycles:.0f} [{result.cycles_ci[0]:.0f}, {result.cycles_ci[1]:.0f}] "
+        f"ipc {result.ipc:.3f} [{result.ipc_ci[0]:.3f}, {result.ipc_ci[1]:.3f}]"
+    )
+    results = os.getenv(RESULTS_ENV)
+    if results:
+        with open(results, "w") as f:
+            json.dump(asdict(result), f)
@@ -0,0 +1,311 @@
+from dataclasses import dataclass
+
+from xu.sky_isa import (
+    OPC_R_TYPE, OPC_I_TYPE, OPC_LOAD, OPC_STORE, OPC_LOOP, OPC_ATOMIC, OP_MAC, NOP, decode_fields, sign_extend, loop, loop_fields,
+)
+
+# List scheduler for straight-line XU code. Decode reads the register file and
+# the only bypass is writeback -> decode, so a result can be read by the
+# instruction three slots after its producer and no earlier. The scheduler
+# reorders independent instructions to fill those slots and only pads with
+# nops when nothing is ready.
+#
+# With ISSUE_WIDTH=2 fetch pairs two adjacent words when the second one passes
+# the pairing rules (see can_pair), and distances are counted in cycles rather
+# than slots. The scheduler then emits exactly two words per cycle, padding the
+# second slot with a nop, so the hardware pairs exactly what it planned.
+#
+# Hardware loops are not reordered across: schedule_loop schedules a loop body
+# on its own and pads it so one iteration can follow another, and join puts
+# scheduled pieces back to back with nops wherever a result would be read too
+# early across the seam.
+#
+# With data memory latency and non-blocking loads (sky_xu MEM_LATENCY), a
+# load's result arrives later than an alu result and decode waits for it;
+# scheduling with a larger `load_distance` fills that wait instead.
+
+# slots between a producer and the first instruction that can read its result
+FORWARD_DISTANCE = 3
+
+def load_use_distance(latency) -> int:
+    """Slots between a non-blocking load and the first reader that doesn't stall, `latency` cycles from data memory"""
+    return FORWARD_DISTANCE + max(latency - 1, 0)
+
+# cycles from the first fetch until the last instruction is written back,
+# beyond one per instruction (see sky_xu_harness.PIPELINE_DEPTH)
+PIPELINE_FILL = 4
+
+DATA_MEM_BYTES = 4096
+
+ISSUE_WIDTHS = (1, 2)
+
+@dataclass
+class Schedule:
+    program: list           # scheduled words, nops included
+    order: list             # original index of each slot, None for inserted nops
+    nops: int
+    cycles: int             # predicted cycles to retire the whole program
+
+def _registers(word) -> tuple:
+    """(registers read, register written or None, memory access) for one instruction"""
+    opcode, rs1, rs2, rd, funct, _ = decode_fields(word)
+    # mac also reads its destination, the accumulator
+    accumulator = {rd} if funct == OP_MAC else set()
+    if opcode == OPC_R_TYPE:
+        return {rs1, rs2} - {0} | accumulator - {0}, rd or None, None
+    if opcode == OPC_I_TYPE:
+        return {rs1} - {0} | accumulator - {0}, rd or None, None
+    if opcode == OPC_LOAD:
+        return {rs1} - {0}, rd or None, "load"
+    if opcode == OPC_STORE:
+        return {rs1, rs2} - {0}, None, "store"
+    if opcode == OPC_ATOMIC:
+        return {rs1, rs2} - {0}, rd or None, "atomic"
+    return None, None, None
+
+def can_pair(first, second) -> bool:
+    """Whether fetch issues `second` alongside `first` (mirrors sky_issue_pair.sv)"""
+    first_opcode, _, _, first_rd = decode_fields(first)[:4]
+    opcode, rs1, rs2, rd, funct = decode_fields(second)[:5]
+    if first_opcode == OPC_LOOP or opcode not in (OPC_R_TYPE, OPC_I_TYPE) or funct == OP_MAC:
+        return False
+    if first_opcode in (OPC_R_TYPE, OPC_I_TYPE, OPC_LOAD, OPC_ATOMIC) and first_rd:
+        reads = {rs1, rs2} if opcode == OPC_R_TYPE else {rs1}
+        return first_rd not in reads and first_rd != rd
+    return True
+
+def is_loop(word) -> bool:
+    return decode_fields(word)[0] == OPC_LOOP
+
+def _check_straight_line(program):
+    # inserting or moving words would change what a loop word's length covers
+    if any(is_loop(word) for word in program):
+        raise ValueError("program has hardware loops: schedule loop bodies with schedule_loop and combine with join")
+
+def fetch_trace(program, issue_width=1, max_iterations=None) -> list:
+    """(word index, cycle) of every word fetch issues, in order, following hardware loops
+
+    `max_iterations` caps how often each loop body is repeated.
+    """
+    if issue_width not in ISSUE_WIDTHS:
+        raise ValueError(f"unsupported issue width {issue_width}")
+    trace = []
+    active = None           # [body start, body end, iterations left]
+    cycle = 0
+    i = 0
+    while i < len(program):
+        trace.append((i, cycle))
+        if is_loop(program[i]):
+            count, length = loop_fields(program[i])
+            if max_iterations is not None:
+                count = min(count, max_iterations)
+            if count and length:
+                active = [i + 1, i + length, count]
+                i += 1
+            else:
+                i += 1 + length
+            cycle += 1
+            continue
+
+        last = i
+        pair = (
+            issue_width == 2 and i + 1 < len(program) and can_pair(program[i], program[i + 1])
+            and not (active is not None and i == active[1])
+        )
+        if pair:
+            last = i + 1
+            trace.append((last, cycle))
+        cycle += 1
+        if active is not None and last == active[1]:
+            if active[2] > 1:
+                active[2] -= 1
+                i = active[0]
+                continue
+            active = None
+        i = last + 1
+    return trace
+
+def issue_cycles(program, issue_width=1) -> list:
+    """Cycle in which fetch issues each word, in issue order (loop bodies once per iteration)"""
+    return [cycle for _, cycle in fetch_trace(program, issue_width)]
+
+def _may_alias(a, b) -> bool:
+    """Whether two accesses (base version, offset) can touch the same data memory word"""
+    (base_a, offset_a), (base_b, offset_b) = a, b
+    if base_a != base_b:
+        return True
+    delta = (offset_a - offset_b) % DATA_MEM_BYTES
+    return delta % 4 != 0 or delta == 0
+
+def dependences(program, distance=FORWARD_DISTANCE, load_distance=None) -> list:
+    """Predecessors of each instruction as {index: minimum cycle distance}
+
+    Results must be `distance` cycles old before they are read, or
+    `load_distance` (if given) for results of loads. Anti and output
+    dependences and conflicting memory accesses only need to keep their order,
+    a distance of 0: the pair may share a cycle as long as the predecessor takes
+    the first slot. Words the scheduler doesn't understand are kept in place
+    relative to everything else.
+    """
+    preds = [dict() for _ in program]
+    writer = {}             # register -> index of its last writer
+    readers = {}            # register -> indices reading it since that write
+    accesses = []           # (index, kind, (base version, offset)) of earlier memory ops
+    loads = set()
+    barrier = None
+
+    def need(i, j, gap):
+        preds[i][j] = max(preds[i].get(j, 0), gap)
+
+    for i, word in enumerate(program):
+        reads, write, memory = _registers(word)
+        if barrier is not None:
+            need(i, barrier, 0)
+        if reads is None:
+            for j in range(barrier or 0, i):
+                need(i, j, 0)
+            barrier = i
+            continue
+
+        for reg in reads:
+            if reg in writer:
+                j = writer[reg]
+                need(i, j, load_distance if load_distance is not None and j in loads else distance)
+        if write is not None:
+            if write in writer:
+                need(i, writer[write], 0)
+            for j in readers.get(write, ()):
+                need(i, j, 0)
+
+        if memory is not None:
+            rs1 = (word >> 24) & 0xF
+            # a base the program never writes holds whatever it held on entry,
+            # which is its own version, unrelated to any other register's
+            address = (writer.get(rs1, ("entry", rs1)) if rs1 else "r0", sign_extend(word & 0xFFF))
+            for j, kind, other in accesses:
+                # atomics write memory too
+                if {kind, memory} & {"store", "atomic"} and _may_alias(address, other):
+                    need(i, j, 0)
+            accesses.append((i, memory, address))
+            if memory in ("load", "atomic"):
+                loads.add(i)
+
+        for reg in reads:
+            readers.setdefault(reg, []).append(i)
+        if write is not None:
+            writer[write] = i
+            readers[write] = []
+    return preds
+
+def _heights(preds) -> list:
+    """Longest latency-weighted path from each instruction to the end of the program"""
+    heights = [1] * len(preds)
+    for i in reversed(range(len(preds))):
+        for j, gap in preds[i].items():
+            heights[j] = max(heights[j], heights[i] + max(gap, 1))
+    return heights
+
+def schedule(program, distance=FORWARD_DISTANCE, issue_width=1, load_distance=None) -> Schedule:
+    """Reorder a straight-line program so every result is read at least `distance` cycles after it is produced
+
+    `load_distance` spaces loads from their readers further (see load_use_distance).
+    """
+    if issue_width not in ISSUE_WIDTHS:
+        raise ValueError(f"unsupported issue width {issue_width}")
+    _check_straight_line(program)
+    body = [(i, word) for i, word in enumerate(program) if word != NOP]
+    words = [word for _, word in body]
+    preds = dependences(words, distance, load_distance)
+    heights = _heights(preds)
+
+    cycle = {}
+    remaining = set(range(len(words)))
+    out, order = [], []
+
+    def pick(t, first=None):
+        """Best instruction that can issue in cycle t, paired behind `first` if given"""
+        ready = [
+            i for i in remaining
+            if all(j in cycle and cycle[j] + gap <= t for j, gap in preds[i].items())
+            and (first is None or can_pair(first, words[i]))
+        ]
+        if not ready:
+            return None
+        # critical path first, then original order
+        best = min(ready, key=lambda i: (-heights[i], i))
+        cycle[best] = t
+        remaining.remove(best)
+        return best
+
+    t = 0
+    while remaining:
+        first = pick(t)
+        chosen = [first]
+        if issue_width == 2:
+            chosen.append(pick(t, NOP if first is None else words[first]))
+        for i in chosen:
+            out.append(NOP if i is None else words[i])
+            order.append(None if i is None else body[i][0])
+        t += 1
+
+    nops = order.count(None)
+    return Schedule(program=out, order=order, nops=nops, cycles=t + PIPELINE_FILL)
+
+def pad(program, distance=FORWARD_DISTANCE) -> Schedule:
+    """Insert nops in program order without reordering, the baseline `schedule` improves on"""
+    _check_straight_line(program)
+    body = [word for word in program if word != NOP]
+    preds = dependences(body, distance)
+    slot, out, order = [], [], []
+    for i, word in enumerate(body):
+        start = max([slot[j] + max(gap, 1) for j, gap in preds[i].items()] + [len(out)])
+        out += [NOP] * (start - len(out))
+        order += [None] * (start - len(order))
+        slot.append(len(out))
+        out.append(word)
+        order.append(i)
+    nops = order.count(None)
+    return Schedule(program=out, order=order, nops=nops, cycles=len(out) + PIPELINE_FILL)
+
+def hazards(program, distance=FORWARD_DISTANCE, issue_width=1) -> list:
+    """(producer, consumer) index pairs where a result is read too early
+
+    Loops are followed for two iterations, enough to see every hazard between
+    the end of a body and its start.
+    """
+    trace = fetch_trace(program, issue_width, max_iterations=2)
+    found = set()
+    for n, (i, cycle) in enumerate(trace):
+        reads, _, _ = _registers(program[i])
+        m = n - 1
+        while m >= 0 and cycle - trace[m][1] < distance:
+            _, write, _ = _registers(program[trace[m][0]])
+            if reads and write in reads:
+                found.add((trace[m][0], i))
+            m -= 1
+    return sorted(found)
+
+def predicted_cycles(program, issue_width=1) -> int:
+    """Cycles to run a program that is already hazard free"""
+    cycles = issue_cycles(program, issue_width)
+    return (cycles[-1] + 1 if cycles else 0) + PIPELINE_FILL
+
+def schedule_loop(body, count, distance=FORWARD_DISTANCE, issue_width=1) -> Schedule:
+    """A loop word and its scheduled body, padded so each iteration can follow the last"""
+    inner = schedule(body, distance, issue_width)
+    words = list(inner.program)
+    # a nop cycle at a time at the end, so a dual issue body stays in pairs
+    while hazards([loop(min(count, 2), len(words))] + words, distance, issue_width):
+        words += [NOP] * issue_width
+    program = [loop(count, len(words))] + words
+    order = [None] + inner.order + [None] * (len(words) - len(inner.program))
+    return Schedule(program=program, order=order, nops=words.count(NOP), cycles=predicted_cycles(program, issue_width))
+
+def join(parts, distance=FORWARD_DISTANCE, issue_width=1) -> list:
+    """Hazard-free pieces (scheduled straight-line code, loops) back to back, with nops at the seams as needed"""
+    program = []
+    for part in parts:
+        while hazards(program + list(part), distance, issue_width):
+            program += [NOP] * issue_width
+        program += list(part)
+    return program
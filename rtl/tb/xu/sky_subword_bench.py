@@ -0,0 +1,132 @@
+import cocotb
+
+from xu.sky_bench import BenchTimer, record
+from xu.sky_isa import NOP
+from xu.sky_kernel import Kernel
+from xu.sky_xu_harness import start_clock, run_program, read_data
+
+# Byte and halfword kernels written twice in the kernel DSL: once on narrow
+# arrays, which compile to lb/lbu/lh/sb/sh, and once on word arrays with every
+# element access done the way the XU had to before sized loads and stores:
+# shift and mask to read an element, load-modify-store to write one. Both are
+# scheduled the same way, so the difference is the sized accesses alone.
+
+LENGTH = 64
+
+def _read(words, i, width, signed):
+    """Element i of a packed word array, extracted with shifts and masks"""
+    per_word = 4 // width
+    bits = 8 * width
+    shift = bits * (i % per_word)
+    word = words[i // per_word]
+    if signed:
+        word = word << (32 - bits - shift) if 32 - bits - shift else word
+        return word >> (32 - bits)
+    word = word.srl(shift) if shift else word
+    return word & ((1 << bits) - 1) if shift + bits < 32 else word
+
+def _write(words, i, width, value):
+    """Store into element i of a packed word array with a load-modify-store"""
+    per_word = 4 // width
+    mask = (1 << 8 * width) - 1
+    shift = 8 * width * (i % per_word)
+    value = value & mask
+    words[i // per_word] = (words[i // per_word] & (~(mask << shift) & 0xFFFFFFFF)) | (value << shift if shift else value)
+
+class _Packed:
+    """Element access on the same elements packed into a word array"""
+
+    def __init__(self, array, width, signed):
+        self.array = array
+        self.width = width
+        self.signed = signed
+
+    def __getitem__(self, i):
+        return _read(self.array, i, self.width, self.signed)
+
+    def __setitem__(self, i, value):
+        _write(self.array, i, self.width, value)
+
+def _array(k, sized, name, base, width, length=LENGTH, init=None, signed=True):
+    """A narrow array, or its elements packed into a word array when not `sized`"""
+    if sized:
+        return k.array(name, base, length=length, init=init, width=width, signed=signed)
+    per_word = 4 // width
+    packed = None
+    if init is not None:
+        packed = [0] * (length // per_word)
+        for i, value in enumerate(init):
+            packed[i // per_word] |= (value & ((1 << 8 * width) - 1)) << 8 * width * (i % per_word)
+    return _Packed(k.array(name, base, length=length // per_word, init=packed), width, signed)
+
+def brighten_kernel(sized):
+    """y[i] = x[i] + 16 on unsigned bytes"""
+    k = Kernel()
+    x = _array(k, sized, "x", 0x000, 1, init=[(37 * i) & 0xFF for i in range(LENGTH)], signed=False)
+    y = _array(k, sized, "y", 0x100, 1)
+    for i in range(LENGTH):
+        y[i] = x[i] + 16
+    return k, "y"
+
+def halfword_add_kernel(sized):
+    """c[i] = a[i] - b[i] on signed halfwords"""
+    k = Kernel()
+    a = _array(k, sized, "a", 0x000, 2, init=[1000 * i for i in range(LENGTH)])
+    b = _array(k, sized, "b", 0x100, 2, init=[-300 * i for i in range(LENGTH)])
+    c = _array(k, sized, "c", 0x200, 2)
+    for i in range(LENGTH):
+        c[i] = a[i] - b[i]
+    return k, "c"
+
+def widen_kernel(sized):
+    """out[i] = 3 * x[i] + y[i], signed bytes widened into words"""
+    k = Kernel()
+    x = _array(k, sized, "x", 0x000, 1, init=[(-5 * i) & 0xFF for i in range(LENGTH)])
+    y = _array(k, sized, "y", 0x100, 2, init=[7 * i for i in range(LENGTH)])
+    out = k.array("out", 0x200, length=LENGTH)
+    for i in range(LENGTH):
+        out[i] = x[i] * 3 + y[i]
+    return k, "out"
+
+KERNELS = {
+    "brighten": brighten_kernel,
+    "halfword_add": halfword_add_kernel,
+    "widen": widen_kernel,
+}
+
+async def bench_kernel(dut, name):
+    start_clock(dut)
+    outputs, instructions = {}, {}
+    for sized in (False, True):
+        k, output = KERNELS[name](sized)
+        compiled = k.compile()
+        instructions[sized] = sum(word != NOP for word in compiled.program)
+
+        timer = BenchTimer()
+        stats = await run_program(dut, compiled.program, data=compiled.data)
+        array = compiled.arrays[output]
+        outputs[sized] = read_data(dut, array.base, (array.end - array.base) // 4)
+        record(
+            f"subword_{name}_{'sized' if sized else 'word'}", timer,
+            instructions=instructions[sized],
+            core_cycles=stats.cycles,
+            retired=stats.retired,
+            ipc=round(stats.ipc, 4),
+        )
+    assert outputs[True] == outputs[False], f"{name}: sized and word-only kernels disagree"
+    cocotb.log.info(f"{name}: {instructions[False]} -> {instructions[True]} instructions ({instructions[False] / instructions[True]:.2f}x)")
+
+@cocotb.test
+async def bench_subword_brighten(dut):
+    """Unsigned byte load, add, byte store"""
+    await bench_kernel(dut, "brighten")
+
+@cocotb.test
+async def bench_subword_halfword_add(dut):
+    """Signed halfword elementwise subtract"""
+    await bench_kernel(dut, "halfword_add")
+
+@cocotb.test
+async def bench_subword_widen(dut):
+    """Signed bytes and halfwords widened into words"""
+    await bench_kernel(dut, "widen")
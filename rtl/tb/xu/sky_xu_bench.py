@@ -0,0 +1,101 @@
+import cocotb
+
+from xu.sky_bench import BenchTimer, record
+from xu.sky_isa import assemble
+from xu.sky_kernel import Kernel
+from xu.sky_xu_harness import start_clock, run_program
+
+# the pipeline only forwards from writeback, so kernels keep dependent
+# instructions at least three slots apart by interleaving independent lanes
+LANES = 4
+
+def independent_alu_kernel(length=512):
+    """Round-robin accumulators, no dependencies closer than LANES instructions"""
+    ops = ["addi", "xori", "slli", "ori"]
+    lines = []
+    for i in range(length):
+        reg = 1 + i % LANES
+        lines.append(f"{ops[(i // LANES) % len(ops)]} r{reg}, r{reg}, {1 + i % 7}")
+    return assemble("\n".join(lines)), {}
+
+def vector_add_kernel(length=128, a=0x000, b=0x200, c=0x400):
+    """c[i] = a[i] + b[i], four elements in flight"""
+    lines = []
+    for base in range(0, length, LANES):
+        lanes = range(min(LANES, length - base))
+        for lane in lanes:
+            offset = 4 * (base + lane)
+            lines.append(f"lw r{1 + lane}, {a + offset}(r0)")
+            lines.append(f"lw r{5 + lane}, {b + offset}(r0)")
+        for lane in lanes:
+            lines.append(f"add r{9 + lane}, r{1 + lane}, r{5 + lane}")
+        for lane in lanes:
+            lines.append(f"sw r{9 + lane}, {c + 4 * (base + lane)}(r0)")
+    data = {a: list(range(length)), b: [3 * i for i in range(length)]}
+    return assemble("\n".join(lines)), data
+
+def dot_product_kernel(length=128, a=0x000, b=0x200):
+    """sum(a[i] * b[i]) with LANES partial sums"""
+    lines = []
+    for base in range(0, length, LANES):
+        for lane in range(LANES):
+            offset = 4 * (base + lane)
+            lines.append(f"lw r{1 + lane}, {a + offset}(r0)")
+            lines.append(f"lw r{5 + lane}, {b + offset}(r0)")
+        for lane in range(LANES):
+            lines.append(f"mul r{9 + lane}, r{1 + lane}, r{5 + lane}")
+        for lane in range(LANES):
+            lines.append(f"add r{13 + lane % 3}, r{13 + lane % 3}, r{9 + lane}")
+    data = {a: list(range(length)), b: [i + 1 for i in range(length)]}
+    return assemble("\n".join(lines)), data
+
+def compiled_saxpy_kernel(length=128, x=0x000, y=0x200, a=0x12345):
+    """y[i] = a * x[i] + y[i], written in the kernel DSL and compiled"""
+    k = Kernel()
+    xs = k.array("x", x, init=range(length))
+    ys = k.array("y", y, init=[7 * i for i in range(length)])
+    for i in range(length):
+        ys[i] = xs[i] * a + ys[i]
+    compiled = k.compile()
+    return compiled.program, compiled.data
+
+KERNELS = {
+    "independent_alu": independent_alu_kernel,
+    "vector_add": vector_add_kernel,
+    "dot_product": dot_product_kernel,
+    "compiled_saxpy": compiled_saxpy_kernel,
+}
+
+async def bench_kernel(dut, name):
+    start_clock(dut)
+    program, data = KERNELS[name]()
+
+    timer = BenchTimer()
+    stats = await run_program(dut, program, data=data)
+    record(
+        f"xu_{name}", timer,
+        instructions=len(program),
+        core_cycles=stats.cycles,
+        retired=stats.retired,
+        ipc=round(stats.ipc, 4),
+    )
+
+@cocotb.test
+async def bench_xu_independent_alu(dut):
+    """Independent ALU instruction stream"""
+    await bench_kernel(dut, "independent_alu")
+
+@cocotb.test
+async def bench_xu_vector_add(dut):
+    """Load/add/store vector kernel"""
+    await bench_kernel(dut, "vector_add")
+
+@cocotb.test
+async def bench_xu_dot_product(dut):
+    """Multiply-accumulate reduction kernel"""
+    await bench_kernel(dut, "dot_product")
+
+@cocotb.test
+async def bench_xu_compiled_saxpy(dut):
+    """Kernel DSL output: scaled vector add with a materialized constant"""
+    await bench_kernel(dut, "compiled_saxpy")
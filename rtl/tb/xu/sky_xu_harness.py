@@ -0,0 +1,257 @@
+import itertools
+import os
+
+import numpy as np
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, Timer
+from dataclasses import dataclass, field
+
+from xu.sky_isa import NOP
+from xu.sky_iss import executed
+from xu.sky_checkpoint import Checkpoint, PIPELINE_DEPTH, DRAIN_NOPS
+from xu.sky_commit_trace import CommitTraceWriter, FLAG_REG_WRITE, FLAG_MEM_READ, FLAG_MEM_WRITE
+
+INSTR_MEM_WORDS = 1024
+DATA_MEM_WORDS = 1024
+
+# directory the full-core tests write a commit trace per run into
+COMMIT_TRACE_ENV = "SKY_COMMIT_TRACE_DIR"
+
+# numbers unnamed traces in the order runs happen in this simulator process
+_trace_runs = itertools.count()
+
+@dataclass
+class RunStats:
+    cycles: int
+    retired: int
+    # cycle each instruction was written back in, in program order
+    retire_cycles: list = field(default_factory=list)
+    # cycles fetch was held, by the memory stage or decode's load scoreboard
+    stalls: int = 0
+
+    @property
+    def ipc(self) -> float:
+        return self.retired / self.cycles if self.cycles else 0.0
+
+def issue_width(dut) -> int:
+    """ISSUE_WIDTH the full-core DUT was built with"""
+    return int(dut.ISSUE_WIDTH.value)
+
+def mem_latency(dut) -> int:
+    """MEM_LATENCY the full-core DUT was built with"""
+    return int(dut.MEM_LATENCY.value)
+
+def nonblocking(dut) -> bool:
+    """Whether the full-core DUT completes loads behind the pipeline"""
+    return mem_latency(dut) > 0 and bool(int(dut.NONBLOCKING.value))
+
+def gate_idle(dut) -> bool:
+    """Whether the full-core DUT holds the data registers of idle stages"""
+    return bool(int(dut.GATE_IDLE.value))
+
+def prefetch_counters(dut) -> dict:
+    """sky_prefetcher's counts since reset: prefetches issued, hit by a load, dropped unhit, and loads that beat theirs"""
+    return {name: int(getattr(dut, f"prefetch_{name}").value) for name in ("issued", "useful", "useless", "late")}
+
+def fetch_queue_depth(dut) -> int:
+    """FETCH_QUEUE_DEPTH the full-core DUT was built with, 0 for fetch coupled to decode"""
+    return int(dut.FETCH_QUEUE_DEPTH.value)
+
+def fetch_queue_counters(dut) -> dict:
+    """Fetch queue counts since reset: words queued summed over every cycle, and cycles it was full"""
+    return {"occupancy": int(dut.fetch.queue_occupancy.value), "full": int(dut.fetch.queue_full_cycles.value)}
+
+def start_clock(dut):
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+
+def load_program(dut, program):
+    """Write a program into instruction memory, followed by enough nops to drain the pipeline"""
+    words = list(program) + [NOP] * DRAIN_NOPS
+    assert len(words) <= INSTR_MEM_WORDS, f"program too large: {len(program)} words"
+    for i, word in enumerate(words):
+        dut.fetch.instr_mem[i].value = word
+
+def load_data(dut, base, words):
+    """Write words into data memory starting at byte address `base`"""
+    for i, word in enumerate(words):
+        dut.data_mem.memory[(base >> 2) + i].value = word & 0xFFFFFFFF
+
+def read_register(dut, reg) -> int:
+    return 0 if reg == 0 else int(dut.regfile.registers[reg].value)
+
+def read_registers(dut) -> list:
+    return [read_register(dut, reg) for reg in range(16)]
+
+def read_data(dut, base, count) -> list:
+    return [int(dut.data_mem.memory[(base >> 2) + i].value) for i in range(count)]
+
+def capture_checkpoint(dut, pc=None) -> Checkpoint:
+    """Snapshot registers, both memories and the fetch pc
+
+    Only meaningful with the pipeline drained; `pc` overrides the fetch pc,
+    which has usually run ahead into the padding nops by then.
+    """
+    return Checkpoint(
+        pc=int(dut.fetch.pc.value) if pc is None else pc,
+        registers=read_registers(dut),
+        instr_mem=[int(dut.fetch.instr_mem[i].value) for i in range(INSTR_MEM_WORDS)],
+        data_mem=read_data(dut, 0, DATA_MEM_WORDS),
+    )
+
+async def restore_checkpoint(dut, checkpoint):
+    """Reset the XU and write a checkpoint into it, ready to fetch from `checkpoint.pc`"""
+    for i, word in enumerate(checkpoint.instr_mem):
+        dut.fetch.instr_mem[i].value = int(word)
+    await reset_xu(dut)
+
+    # reset already cleared the register file and data memory, so only
+    # nonzero words need writing
+    for reg in np.flatnonzero(checkpoint.registers[1:]) + 1:
+        dut.regfile.registers[int(reg)].value = int(checkpoint.registers[reg])
+    for i in np.flatnonzero(checkpoint.data_mem):
+        dut.data_mem.memory[int(i)].value = int(checkpoint.data_mem[i])
+    dut.fetch.pc.value = checkpoint.pc
+
+async def checkpoint_program(dut, program, count, data=None) -> Checkpoint:
+    """Run the first `count` instructions of a program and checkpoint the state before the next one"""
+    await run_program(dut, program[:count], data=data)
+    # put back the instructions the drain padding overwrote
+    load_program(dut, program)
+    return capture_checkpoint(dut, pc=4 * count)
+
+async def reset_xu(dut):
+    """Reset the XU, leaving reset released just after a rising edge"""
+    dut.dma_cfg_write.value = 0
+    dut.dma_host_valid.value = 0
+    dut.launch.value = 0
+    dut.reset.value = 1
+    await RisingEdge(dut.clk)
+    await RisingEdge(dut.clk)
+    dut.reset.value = 0
+
+def _commit_trace_path(name=None):
+    """Trace file for one run under SKY_COMMIT_TRACE_DIR, if set, numbered unless named"""
+    directory = os.getenv(COMMIT_TRACE_ENV)
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{name or f'run{next(_trace_runs):03d}'}.ctrace")
+
+async def run_program(dut, program, data=None, max_cycles=None, commit_trace=None, checkpoint=None, dma=None, trace_name=None) -> RunStats:
+    """Load and run a program until every instruction it executes has been written back
+
+    `data` maps byte addresses to lists of words preloaded into data memory.
+    With a `checkpoint` taken from this program, its state is restored instead
+    of loading the program and only the instructions from `checkpoint.pc` on
+    are run.
+    Retirement is tracked with a shadow copy of the pipeline: each unstalled
+    edge moves the pc fetch issues into decode and the instruction in the
+    memory stage out through writeback. When sky_xu is built with
+    ISSUE_WIDTH=2, a fetch that pairs two words retires both. Hardware loops
+    retire their body once per iteration; the ISS counts how many that is.
+    When decode's load scoreboard holds an instruction, only execute onwards
+    move and a bubble enters execute. With MEM_LATENCY the run continues
+    until loads and stores in flight have completed.
+
+    If `commit_trace` gives a path, a record for every retired instruction is
+    written there (see sky_commit_trace). Otherwise, with SKY_COMMIT_TRACE_DIR
+    set, the trace goes in that directory as `<trace_name>.ctrace`, or
+    run000.ctrace, run001.ctrace and so on for unnamed runs. Only
+    MEM_LATENCY=0 traces are complete: loads completing behind the pipeline
+    record no register write, and accesses are captured as they issue.
+
+    A `dma` host (sky_dma.DmaHost) is started alongside the program, once
+    data memory is loaded; the run doesn't wait for its transfers.
+    """
+    if checkpoint is None:
+        load_program(dut, program)
+        await reset_xu(dut)
+        program_start = 0
+    else:
+        await restore_checkpoint(dut, checkpoint)
+        program_start = checkpoint.pc
+
+    # data memory is cleared synchronously during reset, so preload afterwards
+    for base, words in (data or {}).items():
+        load_data(dut, base, words)
+    if dma is not None:
+        dma.start()
+
+    program_end = 4 * len(program)
+    count = executed(program, program_start)
+    if max_cycles is None:
+        max_cycles = (4 + mem_latency(dut)) * count + 100
+
+    commit_trace = commit_trace or _commit_trace_path(trace_name)
+    writer = CommitTraceWriter(commit_trace) if commit_trace else None
+
+    # shadow entries for the fetch, decode, execute and memory stage registers:
+    # [pc, memory flags, memory address, memory data, instructions issued]
+    stages = [None] * (PIPELINE_DEPTH + 1)
+    cycles = 0
+    stalls = 0
+    retired = 0
+    retire_cycles = []
+    try:
+        while retired < count:
+            assert cycles < max_cycles, f"program did not finish in {max_cycles} cycles ({retired}/{count} retired)"
+            await RisingEdge(dut.clk)
+            cycles += 1
+            held = bool(dut.scoreboard_stall.value)
+            if dut.pipeline_stall.value:
+                stalls += 1
+                continue
+
+            retiring = stages[-1]
+            for lane in range(retiring[4] if retiring is not None else 0):
+                if program_start <= retiring[0] + 4 * lane < program_end:
+                    retired += 1
+                    retire_cycles.append(cycles)
+                    if writer is not None:
+                        _write_commit(dut, writer, cycles, program, retiring, lane)
+
+            if writer is not None and stages[-2] is not None:
+                _capture_memory_access(dut, stages[-2])
+            if held:
+                stalls += 1
+                stages = [stages[0], None] + stages[1:-1]
+                continue
+            issued = 2 if dut.fetch.pair_issue.value else 1
+            stages = [[int(dut.fetch.issue_pc.value), 0, 0, 0, issued]] + stages[:-1]
+
+        while dut.mem_busy.value:
+            assert cycles < max_cycles, f"memory accesses still in flight after {max_cycles} cycles"
+            await RisingEdge(dut.clk)
+            cycles += 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+    # let the final register file write settle before anyone inspects state
+    await Timer(1, units="ns")
+    return RunStats(cycles=cycles, retired=retired, retire_cycles=retire_cycles, stalls=stalls)
+
+def _capture_memory_access(dut, entry):
+    """Record the access made by the instruction currently in the memory stage"""
+    if dut.mem_read_en.value:
+        entry[1:4] = [FLAG_MEM_READ, int(dut.mem_address.value), int(dut.mem_read_data.value)]
+    elif dut.mem_write_en.value:
+        entry[1:4] = [FLAG_MEM_WRITE, int(dut.mem_address.value), int(dut.mem_write_data_out.value)]
+
+def _write_commit(dut, writer, cycle, program, entry, lane=0):
+    """Record one retiring instruction; lane 1 never touches data memory"""
+    pc, flags, mem_addr, mem_data, _ = entry
+    if lane:
+        pc, flags, mem_addr, mem_data = pc + 4, 0, 0, 0
+    write_enable, write_addr, write_data = (
+        (dut.rf_write_enable2, dut.rf_write_addr2, dut.rf_write_data2) if lane
+        else (dut.rf_write_enable, dut.rf_write_addr, dut.rf_write_data)
+    )
+    rd = wdata = 0
+    if write_enable.value:
+        flags |= FLAG_REG_WRITE
+        rd = int(write_addr.value)
+        wdata = int(write_data.value)
+    writer.append(cycle, pc, program[pc >> 2], rd=rd, wdata=wdata, mem_addr=mem_addr, mem_data=mem_data, flags=flags)
@@ -0,0 +1,138 @@
+import random
+
+import cocotb
+
+from xu.sky_isa import NOP, assemble
+from xu.sky_iss import XuIss
+from xu.sky_scheduler import PIPELINE_FILL, FORWARD_DISTANCE, schedule, load_use_distance
+from xu.sky_xu_harness import start_clock, run_program, read_register, read_registers, read_data, mem_latency, nonblocking
+from xu.sky_pipeline_ring import dump_on_failure
+from xu.sky_xu_tb import random_body, memory_ops
+
+# Tests for sky_xu built with data memory latency (the sky_xu_latency and
+# sky_xu_latency_blocking manifest entries). The expected stall counts follow
+# from the memory stage: blocking holds the pipeline for the whole latency of
+# every access, non-blocking only holds a reader of a load that hasn't
+# returned yet, and a store buffer at least as deep as the latency takes a
+# store every cycle.
+
+def expected_stalls(dut, program, load_uses=0):
+    """Blocking: the latency per access. Non-blocking: `load_uses` reader stalls already worked out"""
+    return load_uses if nonblocking(dut) else mem_latency(dut) * memory_ops(program)
+
+@cocotb.test
+@dump_on_failure
+async def test_latency_matches_iss(dut):
+    """Test random programs with store to load reuse against the instruction set simulator"""
+    start_clock(dut)
+
+    latency = mem_latency(dut)
+    program = random_body(random.Random(3), 300, mix=(0.3, 0.5, 0.75), words=4, sized=True)
+    iss = XuIss(program)
+    iss.run(len(program))
+
+    plain = schedule(program)
+    aware = schedule(program, load_distance=load_use_distance(latency))
+    results = {}
+    for name, scheduled in (("plain", plain), ("latency aware", aware)):
+        stats = await run_program(dut, scheduled.program)
+        assert read_registers(dut) == iss.registers, f"{name}: registers differ: {read_registers(dut)} vs {iss.registers}"
+        assert read_data(dut, 0x100, 4) == iss.data_mem[0x40:0x44], f"{name}: data memory differs: {read_data(dut, 0x100, 4)}"
+        results[name] = stats
+
+    if nonblocking(dut):
+        # every load is far enough from its readers, so nothing waits on one
+        assert results["latency aware"].stalls == 0, f"latency aware schedule stalled {results['latency aware'].stalls} cycles"
+        assert results["latency aware"].retire_cycles[-1] == aware.cycles, f"predicted {aware.cycles} cycles, retired at {results['latency aware'].retire_cycles[-1]}"
+        assert results["plain"].stalls > 0, "plain schedule never waited on a load"
+    else:
+        for name, scheduled in (("plain", plain), ("latency aware", aware)):
+            want = expected_stalls(dut, scheduled.program)
+            assert results[name].stalls == want, f"{name}: expected {want} stall cycles, got {results[name].stalls}"
+
+@cocotb.test
+@dump_on_failure
+async def test_latency_store_forwarding(dut):
+    """Test that a load of a word still in the store buffer completes without waiting on memory"""
+    start_clock(dut)
+
+    program = assemble("""
+        addi r1, r0, 77
+        nop
+        nop
+        sw r1, 0x100(r0)
+        lw r2, 0x100(r0)
+        sb r1, 0x104(r0)
+        lw r3, 0x104(r0)
+        nop
+        addi r4, r2, 1
+    """)
+    stats = await run_program(dut, program)
+
+    assert read_register(dut, 4) == 78, f"r4 = {read_register(dut, 4)}, expected 78"
+    # the byte store doesn't cover the word load, which goes to memory and
+    # still sees the byte, since memory completes accesses in order
+    assert read_register(dut, 3) == 77, f"r3 = {read_register(dut, 3)}, expected 77"
+    assert read_data(dut, 0x100, 2) == [77, 77], f"data memory {read_data(dut, 0x100, 2)}, expected [77, 77]"
+    want = expected_stalls(dut, program)
+    assert stats.stalls == want, f"expected {want} stall cycles, got {stats.stalls}"
+    assert stats.retire_cycles[-1] == len(program) + PIPELINE_FILL + want, f"last instruction retired at {stats.retire_cycles[-1]}"
+
+@cocotb.test
+@dump_on_failure
+async def test_latency_load_use(dut):
+    """Test that a reader waits for a load exactly until its data returns"""
+    start_clock(dut)
+
+    latency = mem_latency(dut)
+    for distance in (FORWARD_DISTANCE, load_use_distance(latency)):
+        program = [*assemble("lw r1, 0x100(r0)"), *[NOP] * (distance - 1), *assemble("addi r2, r1, 1")]
+        stats = await run_program(dut, program, data={0x100: [41]})
+
+        assert read_register(dut, 2) == 42, f"distance {distance}: r2 = {read_register(dut, 2)}, expected 42"
+        load_uses = max(load_use_distance(latency) - distance, 0)
+        want = expected_stalls(dut, program, load_uses)
+        assert stats.stalls == want, f"distance {distance}: expected {want} stall cycles, got {stats.stalls}"
+
+@cocotb.test
+@dump_on_failure
+async def test_latency_load_overwritten(dut):
+    """Test that a load returning after a younger write to its register doesn't overwrite it"""
+    start_clock(dut)
+
+    program = assemble("""
+        lw r1, 0x100(r0)
+        addi r1, r0, 5
+        lw r2, 0x100(r0)
+        lw r2, 0x104(r0)
+        nop
+        nop
+        addi r3, r1, 1
+        add r4, r2, r0
+    """)
+    stats = await run_program(dut, program, data={0x100: [1000, 2000]})
+
+    iss = XuIss(program, data={0x100: [1000, 2000]})
+    iss.run(len(program))
+    assert read_registers(dut) == iss.registers, f"registers differ: {read_registers(dut)} vs {iss.registers}"
+    assert read_register(dut, 3) == 6, f"r3 = {read_register(dut, 3)}, expected 6"
+
+@cocotb.test
+@dump_on_failure
+async def test_latency_store_burst(dut):
+    """Test back to back stores of every width"""
+    start_clock(dut)
+
+    assert int(dut.STORE_BUFFER_DEPTH.value) >= mem_latency(dut), "store buffer shallower than the latency"
+    lines = ["addi r1, r0, 0x5a", "addi r2, r0, -3", "nop"]
+    for i in range(16):
+        store = ("sw", "sh", "sb")[i % 3]
+        lines.append(f"{store} r{1 + i % 2}, {0x100 + 4 * i + (i % 3 == 2) * (i % 4)}(r0)")
+    program = assemble("\n".join(lines))
+    stats = await run_program(dut, program)
+
+    iss = XuIss(program)
+    iss.run(len(program))
+    assert read_data(dut, 0x100, 16) == iss.data_mem[0x40:0x50], f"data memory differs: {read_data(dut, 0x100, 16)}"
+    want = expected_stalls(dut, program)
+    assert stats.stalls == want, f"expected {want} stall cycles, got {stats.stalls}"
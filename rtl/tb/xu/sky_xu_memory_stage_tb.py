@@ -2,6 +2,13 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 
+import random
+
+from xu.sky_iss import store_lanes
+from xu.sky_pipeline_bus import ExecuteMemoryTxn, MemoryWritebackTxn, Driver, Monitor, start_stage
+
+NUM_STREAM_TXNS = 5000
+
 @cocotb.test
 async def test_memory_stage_reset(dut):
     """Test that memory stage resets properly"""
@@ -179,3 +186,51 @@ async def test_stall(dut):
     # Check values didn't change despite new inputs
     assert dut.result_out.value == initial_result, f"result_out should not change during stall"
     assert dut.wb_rd_addr_out.value == initial_rd_addr, f"wb_rd_addr_out should not change during stall"
+
+@cocotb.test
+async def test_memory_stream(dut):
+    """Stream random loads, stores and ALU results through the memory stage"""
+    execute = Driver(dut, ExecuteMemoryTxn)
+    monitor = Monitor(dut, MemoryWritebackTxn)
+    dut.mem_read_data.value = 0
+    await start_stage(dut, execute)
+
+    rng = random.Random(0x3e3)
+    expected = None
+    for i in range(NUM_STREAM_TXNS):
+        kind = rng.choice(["alu", "load", "store"])
+        txn = ExecuteMemoryTxn(
+            result=rng.getrandbits(32),
+            mem_addr=rng.getrandbits(32),
+            mem_write_data=rng.getrandbits(32),
+            rd_addr=rng.randrange(16),
+            mem_read=int(kind == "load"),
+            mem_write=int(kind == "store"),
+            reg_write=int(kind != "store"),
+            mem_size=rng.randrange(8),
+        )
+        read_data = rng.getrandbits(32)
+
+        execute.drive(txn)
+        dut.mem_read_data.value = read_data
+        await RisingEdge(dut.clk)
+
+        # the memory interface is combinational, the writeback bundle is registered
+        assert dut.mem_address.value == txn.mem_addr, f"transaction {i}: mem_address mismatch"
+        assert dut.mem_read_en.value == txn.mem_read, f"transaction {i}: mem_read_en mismatch"
+        assert dut.mem_write_en.value == txn.mem_write, f"transaction {i}: mem_write_en mismatch"
+        write_data, byte_enable = store_lanes(txn.mem_write_data, txn.mem_size, txn.mem_addr)
+        assert dut.mem_write_data_out.value == write_data, f"transaction {i}: mem_write_data_out mismatch"
+        assert dut.mem_byte_enable.value == byte_enable, f"transaction {i}: mem_byte_enable mismatch"
+        if expected is not None:
+            got = monitor.sample()
+            assert got == expected, f"transaction {i - 1}: got {got}, expected {expected}"
+        expected = MemoryWritebackTxn(
+            result=txn.result,
+            mem_data=read_data,
+            rd_addr=txn.rd_addr,
+            reg_write=txn.reg_write,
+            from_mem=txn.mem_read,
+            mem_size=txn.mem_size,
+            byte_offset=txn.mem_addr & 0b11,
+        )
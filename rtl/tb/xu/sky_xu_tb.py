@@ -0,0 +1,552 @@
+import random
+
+import cocotb
+from cocotb.triggers import RisingEdge
+
+from xu.sky_isa import assemble, ALU_OPS, ALU_IMM_OPS, LOAD_OPS, STORE_OPS, OPC_LOAD, OPC_STORE
+from xu.sky_checkpoint import Checkpoint
+from xu.sky_commit_trace import FLAG_REG_WRITE, FLAG_MEM_READ, FLAG_MEM_WRITE, read_trace
+from xu.sky_iss import XuIss, executed
+from xu.sky_sampling import sampled_run
+from xu.sky_scheduler import schedule, schedule_loop, join, hazards, predicted_cycles
+from xu.sky_kernel import Kernel
+from xu.sky_dma import DmaDescriptor, DmaHost
+from xu.sky_runtime import Runtime
+from xu.sky_xu_harness import (
+    start_clock, run_program, reset_xu, load_data, read_register, read_registers, read_data, checkpoint_program, gate_idle,
+)
+from xu.sky_pipeline_ring import dump_on_failure
+
+def random_program(rng, length, lanes=4, sized=False):
+    """Random ALU/load/store mix that never reads a register written in the previous two instructions
+
+    With `sized`, loads and stores are any width at any byte offset.
+    """
+    loads, stores = (list(LOAD_OPS), list(STORE_OPS)) if sized else (["lw"], ["sw"])
+    lines = []
+    for i in range(length):
+        rd = 1 + i % lanes
+        # written at least three instructions ago, so forwarded or already in the register file
+        sources = [1 + i % lanes, 1 + (i + 1) % lanes] * 3 + [0]
+        rs1, rs2 = rng.choice(sources), rng.choice(sources)
+        kind = rng.random()
+        if kind < 0.4:
+            lines.append(f"{rng.choice(list(ALU_OPS))} r{rd}, r{rs1}, r{rs2}")
+        elif kind < 0.75:
+            lines.append(f"{rng.choice(list(ALU_IMM_OPS))} r{rd}, r{rs1}, {rng.randint(-2048, 2047)}")
+        elif kind < 0.9:
+            offset = rng.randrange(64) if sized else 4 * rng.randrange(16)
+            lines.append(f"{rng.choice(loads)} r{rd}, {0x100 + offset}(r0)")
+        else:
+            offset = rng.randrange(64) if sized else 4 * rng.randrange(16)
+            lines.append(f"{rng.choice(stores)} r{rs2}, {0x100 + offset}(r0)")
+    return assemble("\n".join(lines))
+
+def random_body(rng, length, registers=6, mix=(0.45, 0.8, 0.9), words=16, sized=False, walk=False):
+    """Random ALU/load/store mix in dependency order, left for the scheduler to space out
+
+    Registers are drawn from r0 to r`registers`. `mix` gives the cumulative
+    shares of register ALU ops, immediate ALU ops and loads; the rest are
+    stores. Accesses fall in the `words` words of data memory from 0x100: with
+    `sized`, any width at any byte offset, otherwise whole words. With `walk`,
+    addresses mostly step up through the window a word or two at a time, the
+    pattern a stride prefetcher follows, instead of landing anywhere in it.
+    """
+    loads, stores = (list(LOAD_OPS), list(STORE_OPS)) if sized else (["lw"], ["sw"])
+    lines = []
+    cursor = 0
+    for _ in range(length):
+        rd = rng.randint(1, registers)
+        rs1, rs2 = rng.randint(0, registers), rng.randint(0, registers)
+        if walk:
+            cursor = (cursor + rng.choice((1, 1, 1, 2, 5))) % words
+            address = 0x100 + 4 * cursor
+        else:
+            address = 0x100 + (rng.randrange(4 * words) if sized else 4 * rng.randrange(words))
+        kind = rng.random()
+        if kind < mix[0]:
+            lines.append(f"{rng.choice(list(ALU_OPS))} r{rd}, r{rs1}, r{rs2}")
+        elif kind < mix[1]:
+            lines.append(f"{rng.choice(list(ALU_IMM_OPS))} r{rd}, r{rs1}, {rng.randint(-2048, 2047)}")
+        elif kind < mix[2]:
+            lines.append(f"{rng.choice(loads)} r{rd}, {address}(r0)")
+        else:
+            lines.append(f"{rng.choice(stores)} r{rs2}, {address}(r0)")
+    return assemble("\n".join(lines))
+
+def memory_ops(program) -> int:
+    """Loads and stores in a program"""
+    return sum((word >> 28) in (OPC_LOAD, OPC_STORE) for word in program)
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_alu_program(dut):
+    """Test a straight-line ALU program through the full pipeline"""
+    start_clock(dut)
+
+    program = assemble("""
+        addi r1, r0, 5
+        addi r2, r0, 7
+        addi r3, r0, -3
+        nop
+        add  r4, r1, r2
+        sub  r5, r1, r2
+        mul  r6, r2, r3
+        xori r7, r1, 0xF
+    """)
+    stats = await run_program(dut, program)
+
+    assert read_register(dut, 4) == 12, f"add failed: got {read_register(dut, 4)}"
+    assert read_register(dut, 5) == (5 - 7) & 0xFFFFFFFF, f"sub failed: got {hex(read_register(dut, 5))}"
+    assert read_register(dut, 6) == (7 * -3) & 0xFFFFFFFF, f"mul failed: got {hex(read_register(dut, 6))}"
+    assert read_register(dut, 7) == 5 ^ 0xF, f"xori failed: got {read_register(dut, 7)}"
+    assert stats.retired == len(program), f"expected {len(program)} retired instructions, got {stats.retired}"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_writeback_forwarding(dut):
+    """Test that a result is forwarded from writeback three instructions later"""
+    start_clock(dut)
+
+    program = assemble("""
+        addi r1, r0, 21
+        nop
+        nop
+        add  r2, r1, r1
+    """)
+    await run_program(dut, program)
+
+    assert read_register(dut, 2) == 42, f"forwarded add failed: got {read_register(dut, 2)}"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_load_store(dut):
+    """Test storing a computed value and loading it back"""
+    start_clock(dut)
+
+    program = assemble("""
+        lw   r1, 0x40(r0)
+        lw   r2, 0x44(r0)
+        nop
+        nop
+        add  r3, r1, r2
+        nop
+        nop
+        sw   r3, 0x48(r0)
+        lw   r4, 0x48(r0)
+    """)
+    await run_program(dut, program, data={0x40: [0x1000, 0x0234]})
+
+    assert read_data(dut, 0x48, 1) == [0x1234], f"store failed: got {read_data(dut, 0x48, 1)}"
+    assert read_register(dut, 4) == 0x1234, f"load after store failed: got {hex(read_register(dut, 4))}"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_sized_load_store(dut):
+    """Test byte and halfword loads extending correctly and narrow stores leaving the rest of the word"""
+    start_clock(dut)
+
+    program = assemble("""
+        lb   r1, 0x41(r0)
+        lbu  r2, 0x41(r0)
+        lh   r3, 0x42(r0)
+        lhu  r4, 0x42(r0)
+        lb   r5, 0x40(r0)
+        addi r6, r0, 0x5A
+        addi r7, r0, -2
+        nop
+        sb   r6, 0x45(r0)
+        sh   r7, 0x46(r0)
+        sb   r7, 0x48(r0)
+        sh   r6, 0x48(r0)
+        lhu  r8, 0x46(r0)
+    """)
+    await run_program(dut, program, data={0x40: [0x8001_FF7F, 0x1122_3344, 0xAABB_CCDD]})
+
+    expected = {1: 0xFFFFFFFF, 2: 0xFF, 3: 0xFFFF8001, 4: 0x8001, 5: 0x7F, 8: 0xFFFE}
+    for reg, value in expected.items():
+        assert read_register(dut, reg) == value, f"r{reg}: got {hex(read_register(dut, reg))}, expected {hex(value)}"
+    got = read_data(dut, 0x44, 2)
+    assert got == [0xFFFE_5A44, 0xAABB_005A], f"narrow stores: got {[hex(word) for word in got]}"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_first_instruction_once(dut):
+    """Test that the instruction at pc 0 executes exactly once after reset"""
+    start_clock(dut)
+
+    program = assemble("""
+        addi r1, r1, 1
+    """)
+    await run_program(dut, program)
+    for _ in range(4):
+        await RisingEdge(dut.clk)
+
+    assert read_register(dut, 1) == 1, f"first instruction ran {read_register(dut, 1)} times"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_ipc(dut):
+    """Test that a hazard-free program issues one instruction per cycle"""
+    start_clock(dut)
+
+    program = assemble("\n".join(f"addi r{1 + i % 4}, r{1 + i % 4}, 1" for i in range(64)))
+    stats = await run_program(dut, program)
+
+    assert stats.cycles == len(program) + 4, f"expected {len(program) + 4} cycles, got {stats.cycles}"
+    for reg in range(1, 5):
+        assert read_register(dut, reg) == 16, f"r{reg} should be 16, got {read_register(dut, reg)}"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_checkpoint_restore(dut):
+    """Test that resuming from a saved checkpoint ends in the same state as running straight through"""
+    start_clock(dut)
+
+    program = assemble("""
+        lw   r1, 0x40(r0)
+        addi r2, r0, 3
+        addi r3, r0, 100
+        nop
+        add  r4, r1, r2
+        mul  r5, r2, r3
+        sw   r3, 0x80(r0)
+        nop
+        sub  r6, r4, r5
+        sw   r4, 0x84(r0)
+        lw   r7, 0x80(r0)
+        xori r8, r1, 0xFF
+    """)
+    data = {0x40: [0x1234]}
+    await run_program(dut, program, data=data)
+    expected_registers = read_registers(dut)
+    expected_data = read_data(dut, 0x80, 2)
+
+    # split after the first store, with its source registers still live
+    split = 7
+    checkpoint = await checkpoint_program(dut, program, split, data=data)
+    checkpoint.save("sky_xu_checkpoint.npz")
+    restored = Checkpoint.load("sky_xu_checkpoint.npz")
+    assert restored == checkpoint, "checkpoint changed across save/load"
+
+    stats = await run_program(dut, program, checkpoint=restored)
+
+    assert stats.retired == len(program) - split, f"expected {len(program) - split} retired instructions, got {stats.retired}"
+    assert read_registers(dut) == expected_registers, f"registers differ: {read_registers(dut)} vs {expected_registers}"
+    assert read_data(dut, 0x80, 2) == expected_data, f"data memory differs: {read_data(dut, 0x80, 2)} vs {expected_data}"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_matches_iss(dut):
+    """Test that the ISS and the RTL end a random program in the same architectural state"""
+    start_clock(dut)
+
+    program = random_program(random.Random(11), 600)
+    data = {0x100: [random.Random(12).getrandbits(32) for _ in range(16)]}
+    await run_program(dut, program, data=data)
+
+    iss = XuIss(program, data)
+    iss.run(len(program))
+    assert read_registers(dut) == iss.registers, f"registers differ: {read_registers(dut)} vs {iss.registers}"
+    assert read_data(dut, 0x100, 16) == iss.data_mem[0x40:0x50], "data memory differs"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_sized_matches_iss(dut):
+    """Test the ISS and the RTL agree on a random program with loads and stores of every width"""
+    start_clock(dut)
+
+    program = random_program(random.Random(13), 600, sized=True)
+    data = {0x100: [random.Random(14).getrandbits(32) for _ in range(16)]}
+    await run_program(dut, program, data=data)
+
+    iss = XuIss(program, data)
+    iss.run(len(program))
+    assert read_registers(dut) == iss.registers, f"registers differ: {read_registers(dut)} vs {iss.registers}"
+    assert read_data(dut, 0x100, 16) == iss.data_mem[0x40:0x50], "data memory differs"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_sampled_simulation(dut):
+    """Test that sampled simulation brackets the cycle count of a full run"""
+    start_clock(dut)
+
+    program = random_program(random.Random(21), 900)
+    stats = await run_program(dut, program)
+
+    result = await sampled_run(dut, program, samples=5, window=60, warmup=10, seed=1)
+    low, high = result.cycles_ci
+    assert result.detailed < len(program) // 2, f"sampled run simulated {result.detailed} of {len(program)} instructions"
+    assert low <= stats.cycles <= high, f"full run took {stats.cycles} cycles, sampled estimate {result.cycles} [{low}, {high}]"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_commit_trace(dut):
+    """Test that a commit trace records every retired instruction with its register write and memory access"""
+    start_clock(dut)
+
+    program = assemble("""
+        addi r1, r0, 0x55
+        addi r2, r0, 0x100
+        nop
+        nop
+        sw   r1, 0(r2)
+        lw   r3, 0x40(r0)
+        nop
+        nop
+        add  r4, r3, r3
+    """)
+    stats = await run_program(dut, program, data={0x40: [9]}, commit_trace="sky_xu_commit.ctrace")
+    trace = read_trace("sky_xu_commit.ctrace")
+
+    assert len(trace) == stats.retired == len(program), f"expected {len(program)} records, got {len(trace)}"
+    assert list(trace["pc"]) == [4 * i for i in range(len(program))], f"pcs out of order: {list(trace['pc'])}"
+    assert list(trace["instr"]) == program, "recorded instruction words differ from the program"
+    assert list(trace["cycle"]) == stats.retire_cycles, f"commit cycles {list(trace['cycle'])} vs {stats.retire_cycles}"
+
+    store, load, add = trace[4], trace[5], trace[8]
+    assert store["flags"] == FLAG_MEM_WRITE, f"store flags {store['flags']}"
+    assert (store["mem_addr"], store["mem_data"]) == (0x100, 0x55), f"store recorded {store['mem_addr']:#x} <- {store['mem_data']:#x}"
+    assert load["flags"] == FLAG_MEM_READ | FLAG_REG_WRITE, f"load flags {load['flags']}"
+    assert (load["mem_addr"], load["mem_data"]) == (0x40, 9), f"load recorded {load['mem_addr']:#x} -> {load['mem_data']}"
+    assert (load["rd"], load["wdata"]) == (3, 9), f"load wrote r{load['rd']} = {load['wdata']}"
+    assert (add["rd"], add["wdata"], add["flags"]) == (4, 18, FLAG_REG_WRITE), f"add wrote r{add['rd']} = {add['wdata']}"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_scheduled_program(dut):
+    """Test that a scheduled naive kernel runs hazard free in the predicted number of cycles"""
+    start_clock(dut)
+
+    # dot product written in dependency order, every result used immediately
+    lines = []
+    for i in range(8):
+        lines += [f"lw r1, {4 * i}(r0)", f"lw r2, {0x40 + 4 * i}(r0)", "mul r3, r1, r2", "add r4, r4, r3"]
+    lines.append("sw r4, 0x80(r0)")
+    program = assemble("\n".join(lines))
+    data = {0x00: list(range(1, 9)), 0x40: list(range(10, 18))}
+
+    scheduled = schedule(program)
+    assert not hazards(scheduled.program), f"scheduled program has hazards: {hazards(scheduled.program)}"
+    stats = await run_program(dut, scheduled.program, data=data)
+
+    iss = XuIss(program, data)
+    iss.run(len(program))
+    expected = sum(a * b for a, b in zip(range(1, 9), range(10, 18)))
+    assert read_data(dut, 0x80, 1) == [expected], f"dot product failed: got {read_data(dut, 0x80, 1)}, expected {expected}"
+    assert read_registers(dut) == iss.registers, f"registers differ: {read_registers(dut)} vs {iss.registers}"
+    assert stats.cycles == scheduled.cycles, f"predicted {scheduled.cycles} cycles, took {stats.cycles}"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_scheduled_entry_bases(dut):
+    """Test that accesses through two base registers set before the scheduled code keep their order"""
+    start_clock(dut)
+
+    # r1 and r2 point at the same word, but the scheduled part never writes
+    # either, so it can't tell their values apart
+    setup = assemble("addi r1, r0, 0x100\naddi r2, r0, 0xFC")
+    body = assemble("addi r3, r0, 7\nsw r3, 0(r1)\nlw r4, 4(r2)\nadd r5, r4, r4")
+    scheduled = schedule(body)
+    order = [scheduled.order.index(i) for i in (1, 2)]
+    assert order[0] < order[1], f"load hoisted above the store: {scheduled.order}"
+
+    program = join([schedule(setup).program, scheduled.program])
+    await run_program(dut, program)
+    assert read_register(dut, 4) == 7, f"load missed the store: r4 = {read_register(dut, 4)}"
+    assert read_register(dut, 5) == 14, f"expected r5 = 14, got {read_register(dut, 5)}"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_hardware_loop_mac(dut):
+    """Test a dot product as a hardware loop around a mac, with no cycles spent on the loop"""
+    start_clock(dut)
+
+    program = assemble("""
+        addi r3, r0, 0x00
+        addi r4, r0, 0x40
+        loop 8, 5
+        lw   r1, 0(r3)
+        lw   r2, 0(r4)
+        addi r3, r3, 4
+        addi r4, r4, 4
+        mac  r5, r1, r2
+        loop 0, 1
+        addi r5, r5, 1
+        nop
+        sw   r5, 0x80(r0)
+    """)
+    data = {0x00: list(range(1, 9)), 0x40: list(range(10, 18))}
+    assert not hazards(program), f"program has hazards: {hazards(program)}"
+    stats = await run_program(dut, program, data=data)
+
+    expected = sum(a * b for a, b in zip(range(1, 9), range(10, 18)))
+    assert read_data(dut, 0x80, 1) == [expected], f"dot product failed: got {read_data(dut, 0x80, 1)}, expected {expected}"
+    assert stats.retired == executed(program), f"expected {executed(program)} retired instructions, got {stats.retired}"
+    assert stats.cycles == executed(program) + 4, f"expected {executed(program) + 4} cycles, got {stats.cycles}"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_hardware_loops_match_iss(dut):
+    """Test random loop bodies joined with straight-line code against the ISS"""
+    start_clock(dut)
+
+    rng = random.Random(41)
+    parts = []
+    for _ in range(4):
+        parts.append(schedule(random_program(rng, 16)).program)
+        parts.append(schedule_loop(random_program(rng, rng.randint(1, 12)), rng.randint(0, 6)).program)
+    program = join(parts)
+    data = {0x100: [rng.getrandbits(32) for _ in range(16)]}
+    assert not hazards(program), f"program has hazards: {hazards(program)}"
+    stats = await run_program(dut, program, data=data)
+
+    iss = XuIss(program, data)
+    iss.run_to(4 * len(program))
+    assert read_registers(dut) == iss.registers, f"registers differ: {read_registers(dut)} vs {iss.registers}"
+    assert read_data(dut, 0x100, 16) == iss.data_mem[0x40:0x50], "data memory differs"
+    assert stats.cycles == predicted_cycles(program), f"predicted {predicted_cycles(program)} cycles, took {stats.cycles}"
+
+async def watch_alu_operands(dut, changes):
+    """Count edges that change the alu's inputs, by whether an instruction entered execute on them"""
+    signals = (dut.alu_operand_a, dut.alu_operand_b, dut.alu_operand_c, dut.alu_operation)
+    previous = None
+    while True:
+        await RisingEdge(dut.clk)
+        operands = tuple(signal.value.binstr for signal in signals)
+        valid = bool(dut.id_reg_write.value or dut.id_mem_read.value or dut.id_mem_write.value)
+        if previous is not None and operands != previous:
+            changes[valid] += 1
+        previous = operands
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_idle_alu_operands(dut):
+    """Test that with GATE_IDLE the alu's inputs only change for instructions with an effect"""
+    start_clock(dut)
+
+    rng = random.Random(46)
+    program = join([
+        schedule(random_program(rng, 24)).program,
+        schedule_loop(random_program(rng, 6), 5).program,
+        assemble("addi r0, r1, 5\nnop\nadd r0, r2, r3"),
+        schedule(random_program(rng, 24)).program,
+    ])
+    data = {0x100: [rng.getrandbits(32) for _ in range(16)]}
+    changes = {False: 0, True: 0}
+    watcher = cocotb.start_soon(watch_alu_operands(dut, changes))
+    await run_program(dut, program, data=data)
+    watcher.kill()
+
+    iss = XuIss(program, data)
+    iss.run_to(4 * len(program))
+    assert read_registers(dut) == iss.registers, f"registers differ: {read_registers(dut)} vs {iss.registers}"
+    assert read_data(dut, 0x100, 16) == iss.data_mem[0x40:0x50], "data memory differs"
+    assert changes[True] > 0, "the alu's inputs never changed"
+    if gate_idle(dut):
+        assert changes[False] == 0, f"the alu's inputs changed on {changes[False]} bubbles"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_compiled_kernel(dut):
+    """Test a DSL kernel that needs constant materialization and spilling"""
+    start_clock(dut)
+
+    k = Kernel()
+    xs = k.array("x", 0x000, init=range(1, 25))
+    out = k.array("out", 0x100, length=24)
+    # every load stays live until the end, more values than registers
+    values = [xs[i] for i in range(len(xs))]
+    total = k.const(0x12345678)
+    for value in values:
+        total = total + value
+    for i, value in enumerate(values):
+        out[i] = (value - 0x1000) ^ total
+    compiled = k.compile()
+
+    assert compiled.spills > 0, "kernel was expected to spill"
+    stats = await compiled.run(dut)
+
+    total = (0x12345678 + sum(range(1, 25))) & 0xFFFFFFFF
+    expected = [((x - 0x1000) & 0xFFFFFFFF) ^ total for x in range(1, 25)]
+    assert compiled.read(dut, "out") == expected, f"got {compiled.read(dut, 'out')}, expected {expected}"
+    assert stats.cycles == compiled.cycles, f"predicted {compiled.cycles} cycles, took {stats.cycles}"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_dma_strided_copy(dut):
+    """Test a strided memory-to-memory DMA copy with the pipeline idle"""
+    start_clock(dut)
+    await reset_xu(dut)
+
+    source = [0x1000 + 3 * i for i in range(64)]
+    load_data(dut, 0x000, source)
+    dma = DmaHost(dut)
+    # every other word, packed into a contiguous destination
+    dma.queue(DmaDescriptor.copy(src=0x000, dst=0x400, length=32, src_stride=8))
+    dma.start()
+    await dma.wait()
+
+    assert read_data(dut, 0x400, 32) == source[::2], f"copy failed: got {read_data(dut, 0x400, 32)}"
+    assert read_data(dut, 0x480, 1) == [0], "copy wrote past its length"
+    _, cycles = dma.completed[0]
+    # two cycles a word on the shared port, plus programming and completion
+    assert cycles <= 2 * 32 + 10, f"copy of 32 words took {cycles} cycles"
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_dma_alongside_program(dut):
+    """Test that DMA transfers and a load/store program share data memory correctly"""
+    start_clock(dut)
+
+    program = random_program(random.Random(8), 300)
+    words = [(0xA5A50000 + i) for i in range(48)]
+    dma = DmaHost(dut)
+    # the program only touches 0x100-0x13f
+    dma.queue(DmaDescriptor.from_host(0x400, words))
+    dma.queue(DmaDescriptor.copy(src=0x400, dst=0x800, length=48, dst_stride=8))
+    stats = await run_program(dut, program, dma=dma)
+    await dma.wait()
+
+    iss = XuIss(program)
+    iss.run(len(program))
+    assert read_registers(dut) == iss.registers, f"registers differ: {read_registers(dut)} vs {iss.registers}"
+    assert read_data(dut, 0x100, 16) == iss.data_mem[0x40:0x50], f"program data differs: {read_data(dut, 0x100, 16)}"
+    assert read_data(dut, 0x400, 48) == words, f"host transfer failed: got {read_data(dut, 0x400, 48)}"
+    assert read_data(dut, 0x800, 96)[::2] == words, f"strided copy failed: got {read_data(dut, 0x800, 96)}"
+    assert stats.cycles == len(program) + 4, f"dma slowed the pipeline: {stats.cycles} cycles"
+
+def scale_kernel(base, length=32):
+    """out[i] = 3 * x[i] + 7, with x at `base` and out right after it"""
+    k = Kernel()
+    xs = k.array("x", base, length=length)
+    out = k.array("out", base + 4 * length, length=length)
+    for i in range(length):
+        out[i] = xs[i] * 3 + 7
+    return k.compile()
+
+@cocotb.test
+@dump_on_failure
+async def test_xu_runtime_launches(dut):
+    """Test queued kernel launches, pipelined and one at a time"""
+    start_clock(dut)
+
+    # two copies of the kernel on separate buffers, so one can be fed while the other runs
+    kernels = [scale_kernel(0x000), scale_kernel(0x200)]
+    inputs = [[100 * i + j for j in range(32)] for i in range(6)]
+
+    cycles = {}
+    for pipelined in (False, True):
+        runtime = Runtime(dut, pipelined=pipelined)
+        await runtime.start()
+        for i, words in enumerate(inputs):
+            runtime.launch(kernels[i % 2], args={"x": words})
+        launches = await runtime.synchronize()
+        runtime.stop()
+
+        for launch, words in zip(launches, inputs):
+            expected = [3 * x + 7 for x in words]
+            assert launch.results["out"] == expected, f"launch {launch.index} got {launch.results['out']}"
+        cycles[pipelined] = runtime.stats().cycles
+
+    assert cycles[True] < cycles[False], f"pipelined launches took {cycles[True]} cycles, serialized {cycles[False]}"
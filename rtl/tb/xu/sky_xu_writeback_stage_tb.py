@@ -1,6 +1,13 @@
 import cocotb
 from cocotb.triggers import Timer
 
+import random
+
+from xu.sky_iss import load_value
+from xu.sky_pipeline_bus import MemoryWritebackTxn, WritebackForwardTxn, Driver, Monitor
+
+NUM_STREAM_TXNS = 5000
+
 @cocotb.test
 async def test_alu_result_writeback(dut):
     """Test writeback of ALU result to register file"""
@@ -51,3 +58,31 @@ async def test_write_disabled(dut):
     
     # Check register file control signals
     assert dut.rf_write_enable.value == 0, f"rf_write_enable should be 0, got {dut.rf_write_enable.value}"
+
+@cocotb.test
+async def test_writeback_stream(dut):
+    """Stream random memory stage bundles through writeback"""
+    memory = Driver(dut, MemoryWritebackTxn)
+    monitor = Monitor(dut, WritebackForwardTxn)
+
+    rng = random.Random(0xb4c)
+    for i in range(NUM_STREAM_TXNS):
+        txn = MemoryWritebackTxn(
+            result=rng.getrandbits(32),
+            mem_data=rng.getrandbits(32),
+            rd_addr=rng.randrange(16),
+            reg_write=rng.randint(0, 1),
+            from_mem=rng.randint(0, 1),
+            mem_size=rng.randrange(8),
+            byte_offset=rng.randrange(4),
+        )
+        memory.drive(txn)
+        await Timer(1, units="ns")
+
+        expected = WritebackForwardTxn(
+            reg_write=txn.reg_write,
+            write_addr=txn.rd_addr,
+            write_data=load_value(txn.mem_data, txn.mem_size, txn.byte_offset) if txn.from_mem else txn.result,
+        )
+        got = monitor.sample()
+        assert got == expected, f"transaction {i}: got {got}, expected {expected}"